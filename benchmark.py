@@ -0,0 +1,359 @@
+import argparse
+from collections import OrderedDict
+import gc
+import json
+import os
+import random
+import time
+import typing
+
+import xmltodict
+
+from comparator.assignment import AssignmentSolver, numpy_available
+from comparator.comparison_engine import ComparisonEngine
+from comparator.report_builder import ComparisonReportEngine
+from comparator.report_writer import ComparisonReports
+from logger.logging import Logger
+from models.element_base_model import BaseElement
+from models.element_loader import ElementLoader
+from models.urla_xml_model import UrlaXML
+from utils.mismo_generator import MismoGenerator
+from utils.table_renderer import ColumnarTable
+
+
+log = Logger()
+
+
+class CLIArgs:
+    """
+    CLI Arguments available for the benchmark application.
+    See _defined_args for list and description of the available arguments
+    """
+
+    def __init__(self) -> typing.NoReturn:
+        self.parser = argparse.ArgumentParser(
+            description="Time each phase of a comparison (parse, model build, compare per tag, reports) on "
+                        "generated MISMO-like documents of increasing size.")
+        self._defined_args()
+        self.args = self.parser.parse_args()
+
+    def _defined_args(self) -> typing.NoReturn:
+        self.parser.add_argument(
+            "-s", "--scales", type=int, nargs="+", default=ScalingBenchmark.DEFAULT_SCALES,
+            help="[OPTIONAL] Document sizes, as multiples of the sample file size (Default: %(default)s)")
+        self.parser.add_argument(
+            "--phases", nargs="+", choices=ScalingBenchmark.PHASES, default=list(ScalingBenchmark.PHASES),
+            help="[OPTIONAL] Phases to time (Default: all)")
+        self.parser.add_argument(
+            "-t", "--tags", nargs="+", default=None,
+            help="[OPTIONAL] Specific XML tags to compare")
+        self.parser.add_argument(
+            "-r", "--repeat", type=int, default=1,
+            help="[OPTIONAL] Number of times each phase is timed (the fastest time is reported) "
+                 "(Default: %(default)s)")
+        self.parser.add_argument(
+            "-o", "--output", default="benchmark.jsonl",
+            help="[OPTIONAL] Results file: one JSON record per scale, phase (and tag) (Default: %(default)s)")
+        self.parser.add_argument(
+            "--work-dir", default="benchmark",
+            help="[OPTIONAL] Directory of the generated documents and reports (Default: %(default)s)")
+        self.parser.add_argument(
+            "--seed", type=int, default=0,
+            help="[OPTIONAL] Random seed of the generated documents (Default: %(default)s)")
+        self.parser.add_argument(
+            "--depth", type=int, default=2,
+            help="[OPTIONAL] Nesting depth of the generated entity sections (Default: %(default)s)")
+        self.parser.add_argument(
+            "--sections", type=int, default=2,
+            help="[OPTIONAL] Number of sections per generated entity (Default: %(default)s)")
+        self.parser.add_argument(
+            "--attributes", type=int, default=4,
+            help="[OPTIONAL] Number of leaf values per section (Default: %(default)s)")
+        self.parser.add_argument(
+            "--mutation-rate", type=float, default=0.2,
+            help="[OPTIONAL] Fraction of the actual entities with changed leaf values (Default: %(default)s)")
+        self.parser.add_argument(
+            "--missing-rate", type=float, default=0.05,
+            help="[OPTIONAL] Fraction of the expected entities replaced by new entities in the actual document "
+                 "(Default: %(default)s)")
+        self.parser.add_argument(
+            "--counts", nargs="+", default=[], metavar="TAG=COUNT",
+            help="[OPTIONAL] Number of entities of specific tags at scale 1 (e.g. PARTY=50 ASSET=100)")
+        self.parser.add_argument(
+            "-m", "--match-strategy", choices=ComparisonEngine.MATCH_STRATEGIES, default=ComparisonEngine.GREEDY,
+            help="[OPTIONAL] How closest matches are assigned (see compare.py --help) (Default: %(default)s)")
+        self.parser.add_argument(
+            "--assignment-sizes", type=int, nargs="+", default=ScalingBenchmark.DEFAULT_ASSIGNMENT_SIZES,
+            help="[OPTIONAL] Matrix sizes (N x N) of the 'assign' phase (Default: %(default)s)")
+        self.parser.add_argument(
+            "--assignment-max-weight", type=int, default=4,
+            help="[OPTIONAL] Weights of the 'assign' phase matrices are random integers 0..N: few distinct values "
+                 "(many ties), as the shared leaf entry counts of the optimal match strategy (Default: %(default)s)")
+
+
+class ScalingBenchmark:
+    """
+    Times the phases of a comparison, per document size:
+      * parse: XML --> xmltodict OrderedDict (UrlaXML, 'xmltodict' parser)
+      * build: OrderedDict --> BaseElement model
+      * load: XML --> BaseElement model, directly from the expat parser events (default UrlaXML parser)
+      * compare: ComparisonEngine.compare, per tag (models from the 'load' phase)
+      * report: text reports of all tags + symmetrical differences (ComparisonReports)
+    and, once for all scales:
+      * assign: AssignmentSolver.solve (optimal match strategy) on random N x N integer weight matrices
+    Each phase records the wall and CPU time, and the number of nodes processed.
+    """
+
+    PARSE = 'parse'
+    BUILD = 'build'
+    LOAD = 'load'
+    COMPARE = 'compare'
+    REPORT = 'report'
+    ASSIGN = 'assign'
+    PHASES = (PARSE, BUILD, LOAD, COMPARE, REPORT, ASSIGN)
+
+    DEFAULT_SCALES = [1, 10, 100, 1000]
+    DEFAULT_ASSIGNMENT_SIZES = [100, 300, 500]
+
+    # Summary table columns
+    SCALE = 'Scale'
+    PHASE = 'Phase'
+    TAG = 'Tag'
+    NODES = 'Nodes'
+    WALL = 'Wall (s)'
+    CPU = 'CPU (s)'
+    PER_NODE = 'us/node'
+
+    def __init__(self, generator: MismoGenerator, work_dir: str, phases: typing.Iterable[str] = PHASES,
+                 tag_list: typing.Optional[typing.List[str]] = None, repeat: int = 1,
+                 counts: typing.Optional[typing.Dict[str, int]] = None,
+                 match_strategy: str = ComparisonEngine.GREEDY,
+                 assignment_sizes: typing.Optional[typing.List[int]] = None, assignment_max_weight: int = 4) \
+            -> typing.NoReturn:
+        """
+        :param generator: Generator of the (actual, expected) documents
+        :param work_dir: Directory of the generated documents and reports
+        :param phases: Phases to time (see PHASES)
+        :param tag_list: Tags to compare (Default: ComparisonEngine.DEFAULT_TAGS)
+        :param repeat: Number of times each phase is timed (the fastest time is reported)
+        :param counts: Number of entities of specific tags at scale 1
+        :param match_strategy: ComparisonEngine match strategy
+        :param assignment_sizes: Matrix sizes (N x N) of the assign phase
+        :param assignment_max_weight: Assign phase weights are random integers 0..assignment_max_weight
+
+        """
+        self.generator = generator
+        self.work_dir = work_dir
+        self.phases = set(phases)
+        self.tag_list = tag_list or ComparisonEngine.DEFAULT_TAGS
+        self.repeat = max(repeat, 1)
+        self.counts = counts or {}
+        self.match_strategy = match_strategy
+        self.assignment_sizes = assignment_sizes or self.DEFAULT_ASSIGNMENT_SIZES
+        self.assignment_max_weight = assignment_max_weight
+
+    def run(self, scales: typing.List[int]) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """
+        Generate the documents of each scale and time the phases.
+
+        :param scales: Document sizes (multiples of the default number of entities)
+
+        :return: Iterator of result records (one per scale, phase and tag)
+        """
+        if self.ASSIGN in self.phases:
+            yield from self.run_assignment()
+
+        for scale in scales:
+            counts = {tag: count * scale for tag, count in self.counts.items()}
+            actual_file, expected_file = self.generator.write_documents(
+                target_dir=self.work_dir, scale=scale, counts=counts)
+            log.info(f"Scale {scale}x: '{actual_file}' ({os.path.getsize(actual_file)} bytes), "
+                     f"'{expected_file}' ({os.path.getsize(expected_file)} bytes)")
+            yield from self.run_scale(scale=scale, actual_file=actual_file, expected_file=expected_file)
+
+    def run_scale(self, scale: int, actual_file: str, expected_file: str) \
+            -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """
+        Time the phases on a pair of documents
+
+        :param scale: Document size (recorded in the results)
+        :param actual_file: filespec of the actual XML file
+        :param expected_file: filespec of the expected XML file
+
+        :return: Iterator of result records
+        """
+        file_size = os.path.getsize(actual_file) + os.path.getsize(expected_file)
+        record = {"scale": scale, "bytes": file_size}
+
+        if self.PARSE in self.phases or self.BUILD in self.phases:
+            (actual_data, expected_data), wall, cpu = self._time(
+                lambda: (xmltodict.parse(self._read(actual_file), dict_constructor=OrderedDict),
+                         xmltodict.parse(self._read(expected_file), dict_constructor=OrderedDict)))
+            if self.PARSE in self.phases:
+                yield dict(record, phase=self.PARSE, tag=None, nodes=None, wall=wall, cpu=cpu)
+
+            if self.BUILD in self.phases:
+                models, wall, cpu = self._time(
+                    lambda: (BaseElement(data=actual_data), BaseElement(data=expected_data)))
+                yield dict(record, phase=self.BUILD, tag=None, nodes=sum(model.node_count() for model in models),
+                           wall=wall, cpu=cpu)
+            del actual_data, expected_data
+
+        if not self.phases & {self.LOAD, self.COMPARE, self.REPORT}:
+            return
+
+        (actual, expected), wall, cpu = self._time(
+            lambda: (UrlaXML(data_file_name=actual_file, is_primary_source=True, parser=ElementLoader.EXPAT),
+                     UrlaXML(data_file_name=expected_file, is_primary_source=False, parser=ElementLoader.EXPAT)))
+        if self.LOAD in self.phases:
+            yield dict(record, phase=self.LOAD, tag=None,
+                       nodes=actual.model.node_count() + expected.model.node_count(), wall=wall, cpu=cpu)
+
+        if not self.phases & {self.COMPARE, self.REPORT}:
+            return
+
+        # Each repetition uses a new engine (the expected indexes are built by the first comparison of each tag)
+        all_results = {}
+        for tag in self.tag_list:
+            results, wall, cpu = self._time(
+                lambda: ComparisonEngine(actual=actual, expected=expected,
+                                         match_strategy=self.match_strategy).compare(tag_name=tag))
+            all_results[tag] = results
+            if self.COMPARE in self.phases:
+                yield dict(record, phase=self.COMPARE, tag=tag, nodes=len(results), wall=wall, cpu=cpu)
+
+        if self.REPORT in self.phases:
+            _, wall, cpu = self._time(lambda: self._write_reports(actual, expected, all_results))
+            yield dict(record, phase=self.REPORT, tag=None, nodes=sum(len(results) for results in all_results.values()),
+                       wall=wall, cpu=cpu)
+
+    def run_assignment(self) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """
+        Time the assignment solver on random square matrices of few distinct integer weights (many ties: the
+        worst case of the shortest augmenting path searches)
+
+        :return: Iterator of result records (one per matrix size)
+        """
+        rnd = random.Random(f"{self.generator.seed}:assign")
+        for size in self.assignment_sizes:
+            weights = [[rnd.randint(0, self.assignment_max_weight) for _ in range(size)] for _ in range(size)]
+            if numpy_available:
+                weights = AssignmentSolver.build_matrix(
+                    num_rows=size, num_cols=size,
+                    weights=((row, col, weight) for row, values in enumerate(weights)
+                             for col, weight in enumerate(values)))
+            _, wall, cpu = self._time(lambda: AssignmentSolver.solve(weights))
+            yield {"scale": None, "bytes": None, "phase": self.ASSIGN, "tag": f"{size}x{size}", "nodes": size,
+                   "max_weight": self.assignment_max_weight, "wall": wall, "cpu": cpu}
+
+    def _write_reports(self, actual: UrlaXML, expected: UrlaXML, all_results: typing.Dict[str, dict]) \
+            -> typing.NoReturn:
+        """
+        Write the text reports of all tags (report phase)
+
+        :param actual: Actual UrlaXML model
+        :param expected: Expected UrlaXML model
+        :param all_results: Dictionary of tag: comparison results
+
+        :return: None
+        """
+        current_dir = os.getcwd()
+        os.chdir(self.work_dir)
+        try:
+            with ComparisonReports(actual_xml_model=actual, expected_xml_model=expected) as reporter:
+                for tag, results in all_results.items():
+                    reporter.generate_reports_per_tag(results_dict=results, tag_name=tag)
+                reporter.build_sym_diff_reports()
+        finally:
+            os.chdir(current_dir)
+
+    def _time(self, routine: typing.Callable[[], typing.Any]) -> typing.Tuple[typing.Any, float, float]:
+        """
+        Time a routine (fastest of 'repeat' runs). Garbage is collected before each run.
+
+        :param routine: Routine to time (no arguments)
+
+        :return: (routine result of the last run, wall time (sec), CPU time (sec))
+        """
+        best_wall = best_cpu = None
+        result = None
+        for _ in range(self.repeat):
+            result = None
+            gc.collect()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            result = routine()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            if best_wall is None or wall < best_wall:
+                best_wall, best_cpu = wall, cpu
+        return result, best_wall, best_cpu
+
+    @staticmethod
+    def _read(file_spec: str) -> str:
+        """
+        Read the XML file (as UrlaXML does for the 'xmltodict' parser)
+
+        :param file_spec: filespec of the XML file
+
+        :return: File contents
+        """
+        with open(file_spec, "r") as XML:
+            return XML.read()
+
+    def summary_table(self, records: typing.List[typing.Dict[str, typing.Any]]) -> ColumnarTable:
+        """
+        Build the summary table: one row per scale, phase and tag
+
+        :param records: Result records (see run)
+
+        :return: ColumnarTable
+        """
+        column = ComparisonReportEngine.COLUMN_DEF
+        left, right = ComparisonReportEngine.LEFT, ComparisonReportEngine.RIGHT
+        table = ColumnarTable(columns=[column(self.SCALE, right), column(self.PHASE, left), column(self.TAG, left),
+                                       column(self.NODES, right), column(self.WALL, right), column(self.CPU, right),
+                                       column(self.PER_NODE, right)])
+        for record in records:
+            nodes = record["nodes"]
+            per_node = f"{record['wall'] * 1e6 / nodes:.2f}" if nodes else ""
+            table.add_row([f"{record['scale']}x" if record['scale'] is not None else "", record["phase"], record["tag"] or "",
+                           nodes if nodes is not None else "", f"{record['wall']:.4f}", f"{record['cpu']:.4f}",
+                           per_node])
+        return table
+
+
+if __name__ == '__main__':
+    # Parse CLI args
+    cli = CLIArgs()
+
+    # The comparison modules only log warnings and errors (the benchmark times the phases, not the logging)
+    os.makedirs(cli.args.work_dir, exist_ok=True)
+    log_filename = os.path.abspath(os.path.join(cli.args.work_dir, "benchmark.log"))
+    print(f"Logging to: {log_filename}.")
+    log = Logger(default_level=Logger.WARN, set_root=True, project="XMLComparison", filename=log_filename)
+
+    entity_counts = {}
+    for tag_count in cli.args.counts:
+        tag, _, count = tag_count.partition("=")
+        entity_counts[tag] = int(count)
+
+    generator = MismoGenerator(seed=cli.args.seed, depth=cli.args.depth, sections=cli.args.sections,
+                               attributes=cli.args.attributes, mutation_rate=cli.args.mutation_rate,
+                               missing_rate=cli.args.missing_rate)
+    benchmark = ScalingBenchmark(generator=generator, work_dir=cli.args.work_dir, phases=cli.args.phases,
+                                 tag_list=cli.args.tags, repeat=cli.args.repeat, counts=entity_counts,
+                                 match_strategy=cli.args.match_strategy, assignment_sizes=cli.args.assignment_sizes,
+                                 assignment_max_weight=cli.args.assignment_max_weight)
+
+    # Results are written as they are measured (one JSON record per line)
+    benchmark_records = []
+    with open(cli.args.output, "w") as RESULTS:
+        for benchmark_record in benchmark.run(scales=cli.args.scales):
+            RESULTS.write(json.dumps(benchmark_record) + "\n")
+            RESULTS.flush()
+            benchmark_records.append(benchmark_record)
+            scale_label = f"{benchmark_record['scale']}x " if benchmark_record['scale'] is not None else ""
+            print(f"{scale_label}{benchmark_record['phase']} {benchmark_record['tag'] or ''}: "
+                  f"{benchmark_record['wall']:.4f}s")
+
+    print(f"\nBenchmark Summary:\n{benchmark.summary_table(records=benchmark_records)}\n")
+    print(f"Results: {os.path.abspath(cli.args.output)}")
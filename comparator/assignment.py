@@ -0,0 +1,210 @@
+"""
+    Maximum-weight bipartite assignment (shortest augmenting path algorithms).
+
+    Uses NumPy (Jonker-Volgenant algorithm, vectorized path search) when it is installed, otherwise falls back to
+    a pure-Python implementation of the Hungarian / Kuhn-Munkres algorithm. SciPy is not required.
+
+"""
+import typing
+
+try:
+    import numpy
+    numpy_available = True
+except ModuleNotFoundError:
+    numpy_available = False
+
+
+class AssignmentSolver:
+    """
+    Solves the assignment problem for a (rows x columns) weight matrix: each row is assigned to at most one
+    column (and vice versa), maximizing the total weight of the assigned pairs.
+    """
+
+    @staticmethod
+    def build_matrix(num_rows: int, num_cols: int,
+                     weights: typing.Iterable[typing.Tuple[int, int, float]]) -> typing.Any:
+        """
+        Build a dense weight matrix from sparse (row, column, weight) entries. Unlisted cells are 0.
+
+        :param num_rows: Number of rows
+        :param num_cols: Number of columns
+        :param weights: Iterable of (row, column, weight) tuples
+
+        :return: numpy 2D array (list of row lists if NumPy is not installed)
+        """
+        if numpy_available:
+            matrix = numpy.zeros((num_rows, num_cols), dtype=numpy.float64)
+            entries = numpy.array(list(weights), dtype=numpy.float64).reshape(-1, 3)
+            matrix[entries[:, 0].astype(numpy.int64), entries[:, 1].astype(numpy.int64)] = entries[:, 2]
+            return matrix
+
+        matrix = [[0.0] * num_cols for _ in range(num_rows)]
+        for row, col, weight in weights:
+            matrix[row][col] = weight
+        return matrix
+
+    @classmethod
+    def solve(cls, weights: typing.Any) -> typing.List[typing.Tuple[int, int]]:
+        """
+        Find the assignment that maximizes the total weight.
+
+        :param weights: Matrix of non-negative weights (numpy 2D array or list of row lists)
+
+        :return: List of (row, column) tuples, sorted by row. Rows and columns without a partner
+                 (matrix is not square) are not listed.
+        """
+        if numpy_available:
+            weights = numpy.asarray(weights, dtype=numpy.float64)
+            num_rows, num_cols = weights.shape if weights.ndim == 2 else (0, 0)
+        else:
+            num_rows, num_cols = len(weights), len(weights[0]) if weights else 0
+
+        if num_rows == 0 or num_cols == 0:
+            return []
+
+        # The algorithm requires rows <= columns: solve the transposed problem if needed.
+        transposed = num_rows > num_cols
+        if transposed:
+            weights = weights.T if numpy_available else [list(column) for column in zip(*weights)]
+
+        solver = cls._solve_numpy if numpy_available else cls._solve_python
+        pairs = solver(weights)
+
+        if transposed:
+            pairs = [(row, col) for col, row in pairs]
+        return sorted(pairs)
+
+    @staticmethod
+    def _solve_numpy(weights: "numpy.ndarray") -> typing.List[typing.Tuple[int, int]]:
+        """
+        NumPy implementation (Jonker-Volgenant): minimizes cost = max(weights) - weights. Requires rows <= columns.
+
+        Rows are first assigned to a free column of minimum cost (row reduction); the remaining rows are assigned
+        with shortest augmenting paths over the reduced costs. Each step of a path search scans all the columns
+        at the current shortest distance at once, so tie-heavy weights (e.g. shared leaf entry counts) need a few
+        vectorized steps per path instead of one step per column.
+
+        :param weights: 2D numpy array of weights
+
+        :return: List of (row, column) tuples
+        """
+        num_rows, num_cols = weights.shape
+        cost = weights.max() - weights
+
+        row_potential = cost.min(axis=1)
+        col_potential = numpy.zeros(num_cols)
+        col_owner = numpy.full(num_cols, -1, dtype=numpy.int64)    # Row assigned to column (-1 = unassigned)
+        row_col = numpy.full(num_rows, -1, dtype=numpy.int64)      # Column assigned to row (-1 = unassigned)
+
+        # Row reduction: assign each row to a free column of zero reduced cost, if there is one left
+        tight = cost == row_potential[:, None]
+        for row in range(num_rows):
+            free_tight = numpy.flatnonzero(tight[row] & (col_owner < 0))
+            if free_tight.size:
+                col_owner[free_tight[0]] = row
+                row_col[row] = free_tight[0]
+
+        for start_row in numpy.flatnonzero(row_col < 0):
+            shortest = numpy.full(num_cols, numpy.inf)             # Shortest path distance to each column
+            path = numpy.full(num_cols, -1, dtype=numpy.int64)     # Previous row in the path to each column
+            scanned = numpy.zeros(num_cols, dtype=bool)
+            rows = numpy.array([start_row])
+            distance = 0.0
+
+            # Grow the shortest path tree until a free column is reached
+            while True:
+                cols = numpy.flatnonzero(~scanned)
+                reduced = (distance + cost[numpy.ix_(rows, cols)] - row_potential[rows][:, None]
+                           - col_potential[cols])
+                nearest = reduced.argmin(axis=0)
+                nearest_reduced = reduced[nearest, numpy.arange(cols.size)]
+                improved = nearest_reduced < shortest[cols]
+                shortest[cols[improved]] = nearest_reduced[improved]
+                path[cols[improved]] = rows[nearest[improved]]
+
+                distance = shortest[cols].min()
+                reached = cols[shortest[cols] == distance]
+                free = reached[col_owner[reached] < 0]
+                if free.size:
+                    sink = free[0]
+                    break
+                scanned[reached] = True
+                rows = col_owner[reached]
+
+            # Update the potentials (assigned pairs stay at zero reduced cost)
+            scanned_cols = numpy.flatnonzero(scanned)
+            row_potential[start_row] += distance
+            row_potential[col_owner[scanned_cols]] += distance - shortest[scanned_cols]
+            col_potential[scanned_cols] -= distance - shortest[scanned_cols]
+
+            # Flip the augmenting path
+            col = sink
+            while True:
+                row = path[col]
+                col_owner[col] = row
+                row_col[row], col = col, row_col[row]
+                if row == start_row:
+                    break
+
+        return [(int(row), int(col)) for row, col in enumerate(row_col)]
+
+    @staticmethod
+    def _solve_python(weights: typing.List[typing.List[float]]) -> typing.List[typing.Tuple[int, int]]:
+        """
+        Pure-Python implementation: minimizes cost = max(weights) - weights. Requires rows <= columns.
+
+        :param weights: List of row lists of weights
+
+        :return: List of (row, column) tuples
+        """
+        num_rows, num_cols = len(weights), len(weights[0])
+        max_weight = max(max(row) for row in weights)
+        cost = [[max_weight - value for value in row] for row in weights]
+        infinity = float('inf')
+
+        # Lists are 1-indexed (index 0 = virtual column/row used as the augmenting path start)
+        row_potential = [0.0] * (num_rows + 1)
+        col_potential = [0.0] * (num_cols + 1)
+        col_owner = [0] * (num_cols + 1)
+        way = [0] * (num_cols + 1)
+
+        for row in range(1, num_rows + 1):
+            col_owner[0] = row
+            current_col = 0
+            min_slack = [infinity] * (num_cols + 1)
+            used = [False] * (num_cols + 1)
+
+            while True:
+                used[current_col] = True
+                current_row = col_owner[current_col]
+                row_cost = cost[current_row - 1]
+                delta = infinity
+                next_col = 0
+
+                for col in range(1, num_cols + 1):
+                    if not used[col]:
+                        slack = row_cost[col - 1] - row_potential[current_row] - col_potential[col]
+                        if slack < min_slack[col]:
+                            min_slack[col] = slack
+                            way[col] = current_col
+                        if min_slack[col] < delta:
+                            delta = min_slack[col]
+                            next_col = col
+
+                for col in range(num_cols + 1):
+                    if used[col]:
+                        row_potential[col_owner[col]] += delta
+                        col_potential[col] -= delta
+                    else:
+                        min_slack[col] -= delta
+
+                current_col = next_col
+                if col_owner[current_col] == 0:
+                    break
+
+            while current_col != 0:
+                previous_col = way[current_col]
+                col_owner[current_col] = col_owner[previous_col]
+                current_col = previous_col
+
+        return [(col_owner[col] - 1, col - 1) for col in range(1, num_cols + 1) if col_owner[col] != 0]
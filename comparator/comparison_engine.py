@@ -1,9 +1,20 @@
+from array import array
+import os
 import pprint
 import typing
 
+from comparator.assignment import AssignmentSolver
+from comparator.leaf_index import LeafIndex
+from comparator.similarity_matrix import numpy_available
+from comparator.tag_index import TagIndex
 from logger import logging
-from models.element_base_model import BaseElement
+from models.element_base_model import BaseElement, LeafSets
+from models.symbol_table import SymbolTable
 from models.urla_xml_model import UrlaXML
+from utils.profiler import Profiler
+
+if numpy_available:
+    import numpy
 
 log = logging.Logger()
 
@@ -17,16 +28,64 @@ class ComparisonEngine:
     TOTAL = 'Total'
     HEADER_LENGTH = 120
 
-    def __init__(self, actual: UrlaXML, expected: UrlaXML) -> typing.NoReturn:
+    # Tags compared when no specific tags are requested
+    DEFAULT_TAGS = ["ASSET", "COLLATERAL", "EXPENSE", "LIABILITY", "LOAN", "PARTY"]
+
+    # Match strategies:
+    #   GREEDY: Each actual node (document order) claims the first exact match; the closest match is chosen
+    #           independently per actual node (several actual nodes can report the same closest node).
+    #   OPTIMAL: Exact matches are claimed as in GREEDY, then the remaining nodes are paired one-to-one,
+    #            maximizing the total number of shared leaf entries (maximum-weight bipartite assignment).
+    GREEDY = 'greedy'
+    OPTIMAL = 'optimal'
+    MATCH_STRATEGIES = (GREEDY, OPTIMAL)
+
+    # Vectorized scoring (similarity matrix): smallest number of node pairs (actual x expected) scored with the
+    # matrix (the per-node leaf index is faster below), claiming position of comparison nodes that are not claimed,
+    # and the shape ID of source nodes with a shape not found in the comparison nodes
+    MATRIX_MIN_PAIRS = 1024
+    UNCLAIMED = (1 << 63) - 1
+    UNKNOWN_SHAPE = -1
+
+    # Approximate mode (LSH candidates, see comparator.minhash_index): smallest number of node pairs of a tag
+    # compared approximately (smaller tags are compared exactly), and number of source nodes sampled to estimate
+    # the recall (fraction of nodes whose best closest match is among their LSH candidates)
+    APPROXIMATE_MIN_PAIRS = 250000
+    RECALL_SAMPLE = 100
+
+    def __init__(self, actual: UrlaXML, expected: UrlaXML, match_strategy: str = GREEDY,
+                 expected_indexes: typing.Optional[typing.Dict[str, TagIndex]] = None,
+                 symbols: typing.Optional[SymbolTable] = None, approximate: bool = False) -> typing.NoReturn:
         """
         Instantiate the Comparison Engine
 
         :param actual: Primary Model (model that should be correct)
         :param expected: Source of Truth (compare primary to this and report results)
+        :param match_strategy: How exact/closest matches are assigned (see MATCH_STRATEGIES)
+        :param expected_indexes: Per-tag indexes of the expected model (tag: TagIndex), built as the tags are
+                                 compared. Provide the same dictionary to engines sharing the expected model, so
+                                 the indexes are only built once.
+        :param symbols: Symbol table of the leaf entries of both models (created if not provided). Engines sharing
+                        expected_indexes must use the symbol table that built them, or an overlay of it (see
+                        SymbolTable base).
+        :param approximate: Find the closest match candidates of large tags (see APPROXIMATE_MIN_PAIRS) through
+                            MinHash/LSH, rather than scoring all pairs. Candidates are scored exactly, and the
+                            estimated recall of each approximate tag is logged (see recall_estimates).
 
         """
+        if match_strategy not in self.MATCH_STRATEGIES:
+            raise ValueError(f"Unknown match strategy: '{match_strategy}'. "
+                             f"Available: {', '.join(self.MATCH_STRATEGIES)}")
+
         self.actual = actual
         self.expected = expected
+        self.match_strategy = match_strategy
+        self.expected_indexes = expected_indexes if expected_indexes is not None else {}
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.approximate = approximate
+
+        # Key: Tag compared approximately, Value: estimated recall (None = no sampled node has a closest match)
+        self.recall_estimates = {}
 
     def compare(self, tag_name: str) -> typing.Dict[str, dict]:
         """
@@ -46,29 +105,90 @@ class ComparisonEngine:
         # Log the "boxed" tag section header to record what is being evaluated.
         log.info(self._build_log_header(f"Comparing element: '{tag_name}'"))
 
-        # Get the target nodes from each XML file
-        log.debug(f"Getting SRC (ACTUAL) NODES")
-        src_nodes = self.get_elements(element_name=tag_name, root=self.actual.model)
-        log.debug(f"Getting CMP (EXPECTED) NODES")
-        cmp_nodes = self.get_elements(element_name=tag_name, root=self.expected.model)
+        with Profiler.phase("compare", label=tag_name) as phase:
+
+            # Get the target nodes from each XML file
+            log.debug("Getting SRC (ACTUAL) NODES")
+            src_nodes = self.get_elements(element_name=tag_name, root=self.actual.model)
+            expected_index = self.get_expected_index(tag_name=tag_name)
+
+            # Do analysis and return results
+            results = self._compare_element_lists(
+                actual_list=src_nodes, expected_list=expected_index.nodes, expected_index=expected_index)
+
+            if phase is not None:
+                Profiler.count(
+                    actual=len(src_nodes), expected=len(expected_index.nodes),
+                    pairs=len(src_nodes) * len(expected_index.nodes),
+                    exact=sum(1 for data in results.values() if data[self.MATCH] is not None),
+                    closest=sum(1 for data in results.values() if data[self.CLOSEST_OBJ] is not None))
+            return results
+
+    def compare_tags(self, tag_names: typing.List[str]) \
+            -> typing.Iterator[typing.Tuple[str, typing.Dict[str, dict]]]:
+        """
+        Compare several tags, sharing the work between them: the leaf entries of the nodes of all the tags are
+        interned in a single pass per model first (see build_leaf_sets), so nested tags expand and intern the
+        leaves they have in common once. The node shape hashes are computed once per node and reused by every
+        tag.
+
+        :param tag_names: XML tags to compare
+
+        :return: Iterator of (tag name, results dictionary (see compare)), in tag order
+        """
+        self.build_leaf_sets(tag_names=tag_names)
+        for tag_name in tag_names:
+            yield tag_name, self.compare(tag_name=tag_name)
+
+    def build_leaf_sets(self, tag_names: typing.List[str]) -> typing.NoReturn:
+        """
+        Intern the leaf entries of the nodes of the tags, in both models, in a single pass per model (see
+        LeafSets.intern_tree). Called before the tags are compared (see compare_tags), or before they are compared
+        concurrently, so the comparisons share the interned leaf sets.
+
+        :param tag_names: XML tags to compare
+
+        :return: None
+        """
+        for model in (self.actual, self.expected):
+            if model is None:
+                continue
+            with Profiler.phase("leaf sets", label=os.path.basename(model.data_file_name)):
+                num_elements = LeafSets.intern_tree(root=model.model, symbols=self.symbols,
+                                                    element_types=set(tag_names))
+                Profiler.count(elements=num_elements)
+
+    def get_expected_index(self, tag_name: str) -> TagIndex:
+        """
+        Get the index of the expected nodes for the provided tag (built on first request, then reused)
 
-        # Do analysis and return results
-        return self._compare_element_lists(actual_list=src_nodes, expected_list=cmp_nodes)
+        :param tag_name: XML tag
 
-    def _compare_element_lists(self, actual_list: typing.List[BaseElement],
-                               expected_list: typing.List[BaseElement]) -> typing.Dict[str, dict]:
+        :return: TagIndex of the expected nodes
+        """
+        expected_index = self.expected_indexes.get(tag_name)
+        if expected_index is None:
+            log.debug("Getting CMP (EXPECTED) NODES")
+            expected_index = TagIndex(nodes=self.get_elements(element_name=tag_name, root=self.expected.model),
+                                      symbols=self.symbols)
+            self.expected_indexes[tag_name] = expected_index
+        return expected_index
+
+    def _compare_element_lists(self, actual_list: typing.List[BaseElement], expected_list: typing.List[BaseElement],
+                               expected_index: typing.Optional[TagIndex] = None) -> typing.Dict[str, dict]:
         """
         Given two nodes (one from each source), comnpare the node attributes and children to find the matches and
         provide closest matches.
 
         :param actual_list: List of nodes to compare and verify
         :param expected_list: List of nodes to compare (source of truth)
+        :param expected_index: Index of the expected_list nodes (built if not provided)
 
         :return: dictionary of: key=src node xpaths, value={dict of source data, match data, and nearest match)
 
         """
-        log.debug(f"SRC (ACTUAL) NODES:   {[x.xpath_str for x in actual_list]}")
-        log.debug(f"CMP (EXPECTED) NODES: {[x.xpath_str for x in expected_list]}")
+        log.debug(lambda: f"SRC (ACTUAL) NODES:   {[x.xpath_str for x in actual_list]}")
+        log.debug(lambda: f"CMP (EXPECTED) NODES: {[x.xpath_str for x in expected_list]}")
 
         # Define the result tracking structure (for each element with the target tag)
         # Key: The XPATH for each target
@@ -80,68 +200,498 @@ class ComparisonEngine:
                               self.CLOSEST_MATCH_COUNT: 0,
                               self.TOTAL: 0,
                               self.CLOSEST_OBJ: None}) for src in actual_list])
-        cmp_match_found = []
 
-        for act_node in actual_list:
-            log.debug(f"SOURCE NODE XPATH: {act_node.xpath_str}")
+        if expected_index is None:
+            expected_index = TagIndex(nodes=expected_list, symbols=self.symbols)
+
+        # Exact matches: pair nodes with the same shape and leaf set through a hash table lookup (no scoring).
+        # Key: Position (in expected_list) of a matched comparison node,
+        # Value: Position (in actual_list) of the source node that claimed it.
+        cmp_match_found = self._match_exact_leaf_sets(
+            results_dict=results_dict, actual_list=actual_list, expected_index=expected_index)
+
+        # Closest matches: candidates from the LSH index (approximate mode, large tags), otherwise scored with the
+        # similarity matrix (all pairs at once) when NumPy is installed
+        num_pairs = len(actual_list) * len(expected_list)
+        approximate = self.approximate and num_pairs >= self.APPROXIMATE_MIN_PAIRS
+        vectorized = not approximate and numpy_available and num_pairs >= self.MATRIX_MIN_PAIRS
+        if len(cmp_match_found) < len(actual_list) and vectorized:
+            if self.match_strategy == self.OPTIMAL:
+                self._assign_optimal_matches_vectorized(
+                    results_dict=results_dict, actual_list=actual_list, expected_list=expected_list,
+                    expected_index=expected_index, cmp_match_found=cmp_match_found)
+            else:
+                self._assign_greedy_matches_vectorized(
+                    results_dict=results_dict, actual_list=actual_list, expected_list=expected_list,
+                    expected_index=expected_index, cmp_match_found=cmp_match_found)
+
+        elif len(cmp_match_found) < len(actual_list):
+
+            # Expected nodes indexed by expanded leaf entry ID (leaf sets are memoized per node: node.leaf_sets)
+            expected_sets = expected_index.leaf_sets
+            if approximate:
+                self._estimate_recall(actual_list=actual_list, expected_index=expected_index,
+                                      cmp_match_found=cmp_match_found)
+                index = expected_index.minhash_index.with_symbols(self.symbols)
+            else:
+                index = expected_index.leaf_index
 
-            for exp_node in expected_list:
-                log.debug(f"COMPARISON NODE XPATH: {exp_node.xpath_str}")
+            if self.match_strategy == self.OPTIMAL:
+                self._assign_optimal_matches(results_dict=results_dict, actual_list=actual_list,
+                                             expected_list=expected_list, expected_sets=expected_sets,
+                                             shapes=expected_index.shapes, index=index,
+                                             cmp_match_found=cmp_match_found)
+            else:
+                self._assign_greedy_matches(results_dict=results_dict, actual_list=actual_list,
+                                            expected_list=expected_list, expected_sets=expected_sets,
+                                            shapes=expected_index.shapes, index=index,
+                                            cmp_match_found=cmp_match_found)
 
-                # Don't compare this comparison node if the comparison node has already been matched.
-                if exp_node.xpath_str in cmp_match_found:
-                    log.debug(f"COMPARISON NODE ({exp_node.xpath_str}) ALREADY MATCHED.")
+        self._debug_print_results(results_dict)
+        return results_dict
+
+    def _match_exact_leaf_sets(self, results_dict: typing.Dict[str, dict], actual_list: typing.List[BaseElement],
+                               expected_index: TagIndex) -> typing.Dict[int, int]:
+        """
+        Exact match pre-pass: a source and a comparison node are an exact match if they have the same shape and
+        the same expanded leaf set (see TagIndex.exact_key), so they are paired through a hash table lookup. Each
+        source node (document order) claims the first unclaimed exact match (document order), so the claims are
+        the same as claiming exact matches while scoring the nodes in document order: a source node left
+        unmatched here has no exact match that is not claimed by a previous source node.
+
+        :param results_dict: Results dictionary (updated in place)
+        :param actual_list: List of nodes to compare and verify
+        :param expected_index: Index of the nodes to compare (source of truth)
+
+        :return: Dictionary of matched comparison node position: position of the source node that claimed it
+        """
+        cmp_match_found = {}
+
+        # The index is shared (not modified): track the number of claimed positions of each bucket instead (the
+        # positions are claimed in bucket order).
+        # Key: Exact match key, Value: Number of claimed positions at the start of the bucket
+        claimed_prefix = {}
+
+        for act_position, act_node in enumerate(actual_list):
+            actual_child_set = act_node.leaf_sets.entry_ids(self.symbols)
+            key = TagIndex.exact_key(node=act_node, leaf_set=actual_child_set)
+            bucket = expected_index.buckets.get(key)
+            start = claimed_prefix.get(key, 0)
+            if not bucket or start == len(bucket):
+                continue
+
+            # The digest is verified, so a hash collision cannot be reported as a match.
+            position = bucket[start]
+            if expected_index.leaf_sets[position] != actual_child_set:
+                continue
+
+            exp_node = expected_index.nodes[position]
+            log.debug("**MATCH** (LEAF SET HASH): %s and %s", act_node.xpath_str, exp_node.xpath_str)
+            result = results_dict[act_node.xpath_str]
+            result[self.MATCH] = exp_node
+            result[self.CLOSEST_MATCH_COUNT] = -1
+
+            # Same leaf data: the union of both key sets is the source node's key set.
+            result[self.TOTAL] = len(act_node.leaf_sets.key_ids(self.symbols))
+            cmp_match_found[position] = act_position
+            claimed_prefix[key] = start + 1
+
+        log.debug("EXACT LEAF SETS: %s of %s source node(s) matched", len(cmp_match_found), len(actual_list))
+        return cmp_match_found
+
+    def _estimate_recall(self, actual_list: typing.List[BaseElement], expected_index: TagIndex,
+                         cmp_match_found: typing.Dict[int, int]) -> typing.Optional[float]:
+        """
+        Estimate the recall of the LSH candidate search of a tag: for a sample of the source nodes without an
+        exact match, the best number of shared entries over all comparison nodes (leaf index) is
+        compared to the best number over the node's LSH candidates. (Claims are ignored: this measures the
+        candidate search, not the assignment.) The estimate is logged and kept in recall_estimates.
+
+        :param actual_list: List of nodes to compare and verify
+        :param expected_index: Index of the nodes to compare
+        :param cmp_match_found: Comparison node position: claiming source node position (exact matches)
+
+        :return: Estimated recall (0 - 1), or None if no sampled node shares entries with a comparison node
+        """
+        tag_name = actual_list[0].type
+        claimed = set(cmp_match_found.values())
+        pool = [node for position, node in enumerate(actual_list) if position not in claimed]
+        sample = pool[::max(1, len(pool) // self.RECALL_SAMPLE)][:self.RECALL_SAMPLE]
+
+        shapes = expected_index.shapes
+        sample_sets = [node.leaf_sets.entry_ids(self.symbols) for node in sample]
+        sample_shapes = [shapes.get(node.shape_hash, self.UNKNOWN_SHAPE) for node in sample]
+
+        # Best number of shared entries of each sampled node (same shape): scored with the similarity matrix when
+        # NumPy is installed (no leaf index is built for the sample)
+        if numpy_available:
+            column_shapes = expected_index.similarity_matrix.column_shapes
+            best_counts = []
+            for first, counts in expected_index.similarity_matrix.blocks(sample_sets):
+                compatible = column_shapes == numpy.array(sample_shapes[first:first + len(counts)])[:, None]
+                best_counts.extend(numpy.where(compatible, counts, 0).max(axis=1, initial=0).tolist())
+        else:
+            best_counts = [max(expected_index.leaf_index.overlap_counts(leaf_set, shape).values(), default=0)
+                           for leaf_set, shape in zip(sample_sets, sample_shapes)]
+
+        minhash_index = expected_index.minhash_index.with_symbols(self.symbols)
+        found = scored = 0
+        for leaf_set, shape, best in zip(sample_sets, sample_shapes, best_counts):
+            if best:
+                scored += 1
+                found += best in minhash_index.overlap_counts(leaf_set, shape).values()
+
+        recall = found / scored if scored else None
+        self.recall_estimates[tag_name] = recall
+        log.info("APPROXIMATE '%s': estimated recall %s (%s of %s sampled node(s) have their best closest match "
+                 "among the LSH candidates)", tag_name, f"{recall:.1%}" if recall is not None else "n/a",
+                 found, scored)
+        return recall
+
+    def _assign_greedy_matches(self, results_dict: typing.Dict[str, dict], actual_list: typing.List[BaseElement],
+                               expected_list: typing.List[BaseElement], expected_sets: typing.List[array],
+                               shapes: typing.Dict[bytes, int], index: LeafIndex,
+                               cmp_match_found: typing.Dict[int, int]) -> typing.NoReturn:
+        """
+        GREEDY strategy: for each source node without an exact match (document order), claim the first unclaimed
+        exact match, otherwise record the comparison node sharing the most leaf entries as the closest match
+        (the first one in document order, on a tie).
+
+        Comparison nodes claimed by the exact match pre-pass are only skipped for the source nodes that come
+        after the claiming node, so the results are the same as a single pass in document order.
+
+        The candidates of a source node are visited by decreasing upper bound: the number of shared entries cannot
+        exceed the size of either leaf set. A candidate is only scored if its bound can beat the best score so far,
+        or if it can be an exact match; the search stops at an exact match (perfect score), or as soon as no
+        remaining candidate can do either. The results are the same as scoring every candidate in document order.
+        The number of scored and pruned candidates is recorded for profiling (Profiler counts).
+
+        :param results_dict: Results dictionary (updated in place)
+        :param actual_list: List of nodes to compare and verify
+        :param expected_list: List of nodes to compare (source of truth)
+        :param expected_sets: Expanded leaf entry IDs of each expected node
+        :param shapes: Shape IDs of the expected nodes (see TagIndex.shapes)
+        :param index: Leaf entry index (or LSH index) of the expected nodes
+        :param cmp_match_found: Claimed comparison node position: claiming source node position (updated in place)
+
+        :return: None
+        """
+        for act_position, act_node in enumerate(actual_list):
+            result = results_dict[act_node.xpath_str]
+            if result[self.MATCH] is not None:
+                continue
+
+            log.debug("SOURCE NODE XPATH: %s", act_node.xpath_str)
+            actual_child_set = act_node.leaf_sets.entry_ids(self.symbols)
+            num_entries = len(actual_child_set)
+
+            # Only comparison nodes of the same shape (attributes + child types, see _compare_node) that share at
+            # least one leaf entry can be an exact or closest match: the index only returns those nodes.
+            candidates, score = index.candidates(actual_child_set, shapes.get(act_node.shape_hash, self.UNKNOWN_SHAPE))
+            log.debug("CANDIDATE COMPARISON NODES (attr + child types match): %s of %s",
+                      len(candidates), len(expected_list))
+
+            # Decreasing upper bound; document order for equal bounds (sorted() is stable, also in reverse)
+            ranked = sorted(sorted(candidates), key=lambda position: min(num_entries, len(expected_sets[position])),
+                            reverse=True)
+            best_count, best_position = result[self.CLOSEST_MATCH_COUNT], None
+            scored = 0
+            for rank, position in enumerate(ranked):
+                expected_size = len(expected_sets[position])
+                bound = min(num_entries, expected_size)
+
+                # No remaining candidate can be an exact match (bound = number of source entries) or beat the
+                # best score: the remaining candidates are pruned.
+                if bound < num_entries and bound < best_count:
+                    break
+
+                # Don't compare this comparison node if the comparison node has already been matched (by a
+                # previous source node).
+                claimed_by = cmp_match_found.get(position)
+                if claimed_by is not None and claimed_by < act_position:
+                    log.debug("COMPARISON NODE (%s) ALREADY MATCHED.", expected_list[position].xpath_str)
                     continue
 
-                # If the src node matches current cmp node, then compare elements (including children)
-                # Match = data elements match + same number of children
-                if self._compare_node(src_node=act_node, cmp_node=exp_node):
-                    log.debug(f"CMP node matches (attr + #_child): {exp_node.xpath_str} -> Checking descendants...")
-
-                    # Get all descendant nodes (down to the leaf elements)
-                    actual_children = self.get_leaf_nodes(act_node)
-                    expected_children = self.get_leaf_nodes(exp_node)
-
-                    # For a detailed analyses, expand the data nodes to be separate XPATH entries
-                    # By default, all data nodes are combined with the parent for quicker comparison of nodes
-                    # with children and data, but in this case, it will provide a less accurate comparison.
-                    actual_child_set = self._expand_objpath_pathsets(children=actual_children)
-                    expected_child_set = self._expand_objpath_pathsets(children=expected_children)
-
-                    log.debug(f"EXPANDED SOURCE (ACTUAL) OBJ_PATH SET:\n{pprint.pformat(actual_child_set)}")
-                    log.debug(f"EXPANDED COMPARISON (EXPECTED) OBJ_PATH SET:\n{pprint.pformat(expected_child_set)}")
-
-                    # Determine the total number of unique xpaths/traversal paths in this comparison
-                    max_count = self._get_max_unique_count(set_1=actual_child_set, set_2=expected_child_set)
-
-                    # Exact match
-                    if actual_child_set == expected_child_set:
-                        log.debug(f"**MATCH**: {act_node.xpath_str} and {exp_node.xpath_str}")
-                        results_dict[act_node.xpath_str][self.MATCH] = exp_node
-                        results_dict[act_node.xpath_str][self.CLOSEST_OBJ] = None
-                        results_dict[act_node.xpath_str][self.CLOSEST_MATCH_COUNT] = -1
-                        results_dict[act_node.xpath_str][self.TOTAL] = max_count
-                        cmp_match_found.append(exp_node.xpath_str)
-                        break
-
-                    # Check if this cmp node is the closest match compared to previous comparisons.
-                    # If so, store the cmp_node (BaseElement), number of matches, + total number of compared elements.
-                    else:
-                        log.debug(f"DID NOT MATCH: {act_node.xpath_str} and {exp_node.xpath_str}")
-
-                        num_matches = len(actual_child_set.intersection(expected_child_set))
-                        if num_matches > results_dict[act_node.xpath_str][self.CLOSEST_MATCH_COUNT]:
-                            results_dict[act_node.xpath_str][self.CLOSEST_MATCH_COUNT] = num_matches
-                            results_dict[act_node.xpath_str][self.CLOSEST_OBJ] = exp_node
-                            results_dict[act_node.xpath_str][self.TOTAL] = max_count
-
-                # C0mp node did not match the source node (in format/size), so move to the next comp node.
-                else:
-                    log.debug("SRC node and CMP node did not match (attributes and number of children)")
+                # Can this candidate be an exact match, or score better than the best candidate so far (on a tie,
+                # the first candidate in document order is kept)?
+                exact_possible = expected_size == num_entries and claimed_by is None
+                if not exact_possible and (bound < best_count or (bound == best_count and
+                                                                  (best_position is None or position > best_position))):
+                    continue
+
+                exp_node = expected_list[position]
+                log.debug("COMPARISON NODE XPATH: %s", exp_node.xpath_str)
+
+                # Number of expanded leaf entries (XPATH + data) found in both nodes
+                num_matches = score(position)
+                scored += 1
+
+                log.debug(lambda: f"EXPANDED SOURCE (ACTUAL) OBJ_PATH SET:\n"
+                                  f"{pprint.pformat(self.symbols.symbols(actual_child_set))}")
+                log.debug(lambda: f"EXPANDED COMPARISON (EXPECTED) OBJ_PATH SET:\n"
+                                  f"{pprint.pformat(self.symbols.symbols(expected_sets[position]))}")
+
+                # Exact match (perfect score): all entries are shared (and the node is not claimed by a later
+                # source node). Nothing can beat it: stop the search.
+                if num_matches == num_entries and exact_possible:
+                    self._record_match(result=result, act_node=act_node, exp_node=exp_node)
+                    cmp_match_found[position] = act_position
+                    break
+
+                # Check if this cmp node is the closest match compared to previous comparisons.
+                log.debug("DID NOT MATCH: %s and %s", act_node.xpath_str, exp_node.xpath_str)
+                if num_matches > best_count or (num_matches == best_count and best_position is not None and
+                                                position < best_position):
+                    best_count, best_position = num_matches, position
                 log.debug("")
 
-        self._debug_print_results(results_dict)
-        return results_dict
+            Profiler.count(candidates=len(ranked), scored=scored, pruned=len(ranked) - scored)
+
+            # Store the closest cmp_node (BaseElement), number of matches, + total number of compared elements.
+            if result[self.MATCH] is None and best_position is not None:
+                exp_node = expected_list[best_position]
+                log.debug("CLOSEST: %s and %s (%s)", act_node.xpath_str, exp_node.xpath_str, best_count)
+                result[self.CLOSEST_MATCH_COUNT] = best_count
+                result[self.CLOSEST_OBJ] = exp_node
+                result[self.TOTAL] = self._get_max_unique_node_count(node_1=act_node, node_2=exp_node)
+
+    def _assign_optimal_matches(self, results_dict: typing.Dict[str, dict], actual_list: typing.List[BaseElement],
+                                expected_list: typing.List[BaseElement], expected_sets: typing.List[array],
+                                shapes: typing.Dict[bytes, int], index: LeafIndex,
+                                cmp_match_found: typing.Dict[int, int]) -> typing.NoReturn:
+        """
+        OPTIMAL strategy: exact matches are claimed first (same as GREEDY: an exact match cannot be improved upon).
+        The remaining actual and expected nodes are then paired one-to-one so the total number of shared leaf
+        entries is maximized; each expected node is reported as the closest match of at most one actual node.
+
+        :param results_dict: Results dictionary (updated in place)
+        :param actual_list: List of nodes to compare and verify
+        :param expected_list: List of nodes to compare (source of truth)
+        :param expected_sets: Expanded leaf entry IDs of each expected node
+        :param shapes: Shape IDs of the expected nodes (see TagIndex.shapes)
+        :param index: Leaf entry index of the expected nodes
+        :param cmp_match_found: Claimed comparison node position: claiming source node position (updated in place)
+
+        :return: None
+        """
+        # Actual nodes without an exact match: (node, {expected position: number of shared leaf entries}); the
+        # index only lists the expected nodes passing the attribute/child type check (same shape).
+        unmatched = []
+
+        for act_position, act_node in enumerate(actual_list):
+            result = results_dict[act_node.xpath_str]
+            if result[self.MATCH] is not None:
+                continue
+
+            actual_child_set = act_node.leaf_sets.entry_ids(self.symbols)
+            overlap_counts = index.overlap_counts(actual_child_set, shapes.get(act_node.shape_hash, self.UNKNOWN_SHAPE))
+            Profiler.count(candidates=len(overlap_counts))
+            for position in sorted(overlap_counts):
+                if (position not in cmp_match_found and
+                        overlap_counts[position] == len(actual_child_set) == len(expected_sets[position])):
+                    self._record_match(result=result, act_node=act_node, exp_node=expected_list[position])
+                    cmp_match_found[position] = act_position
+                    break
+            else:
+                unmatched.append((act_node, dict(sorted(overlap_counts.items()))))
+
+        self._assign_closest_matches(results_dict=results_dict, unmatched=unmatched, expected_list=expected_list,
+                                     cmp_match_found=cmp_match_found)
+
+    def _assign_closest_matches(self, results_dict: typing.Dict[str, dict],
+                                unmatched: typing.List[typing.Tuple[BaseElement, typing.Dict[int, int]]],
+                                expected_list: typing.List[BaseElement],
+                                cmp_match_found: typing.Dict[int, int]) -> typing.NoReturn:
+        """
+        OPTIMAL strategy, closest matches: pair the actual nodes without an exact match with the unclaimed expected
+        nodes (maximum-weight bipartite assignment of the number of shared leaf entries).
+
+        :param results_dict: Results dictionary (updated in place)
+        :param unmatched: Actual nodes without an exact match, with the number of leaf entries shared with each
+                          expected node passing the attribute/child type check: (node, {position: count})
+        :param expected_list: List of nodes to compare (source of truth)
+        :param cmp_match_found: Claimed comparison node position: claiming source node position
+
+        :return: None
+        """
+        # Similarity matrix: rows = unmatched actual nodes, columns = unclaimed expected nodes that share at least
+        # one leaf entry with an unmatched actual node (and pass the attribute/child type check).
+        columns = {}
+        weights = []
+        for row, (act_node, overlap_counts) in enumerate(unmatched):
+            for position, num_matches in overlap_counts.items():
+                if position not in cmp_match_found:
+                    col = columns.setdefault(position, len(columns))
+                    weights.append((row, col, num_matches))
+
+        if not weights:
+            return
+
+        positions = list(columns)
+        log.debug("OPTIMAL ASSIGNMENT: %s actual node(s) x %s comparison node(s), %s candidate pair(s)",
+                  len(unmatched), len(positions), len(weights))
+        matrix = AssignmentSolver.build_matrix(num_rows=len(unmatched), num_cols=len(positions), weights=weights)
+
+        for row, col in AssignmentSolver.solve(matrix):
+            num_matches = int(matrix[row][col])
+
+            # Pairs without shared entries (or failing the node check) only fill out the assignment.
+            if num_matches <= 0:
+                continue
+
+            act_node, _ = unmatched[row]
+            exp_node = expected_list[positions[col]]
+            log.debug("CLOSEST (ASSIGNED): %s and %s (%s)", act_node.xpath_str, exp_node.xpath_str, num_matches)
+
+            result = results_dict[act_node.xpath_str]
+            result[self.CLOSEST_MATCH_COUNT] = num_matches
+            result[self.CLOSEST_OBJ] = exp_node
+            result[self.TOTAL] = self._get_max_unique_node_count(node_1=act_node, node_2=exp_node)
+
+    def _assign_greedy_matches_vectorized(self, results_dict: typing.Dict[str, dict],
+                                          actual_list: typing.List[BaseElement],
+                                          expected_list: typing.List[BaseElement], expected_index: TagIndex,
+                                          cmp_match_found: typing.Dict[int, int]) -> typing.NoReturn:
+        """
+        GREEDY strategy, scored with the similarity matrix (see _assign_greedy_matches for the rules): the leaf
+        entry intersection counts of all pairs are computed in blocks of source nodes, and each source node picks
+        its exact or closest match with array operations over its row (no per-pair Python loop). The results are
+        the same as _assign_greedy_matches.
+
+        :param results_dict: Results dictionary (updated in place)
+        :param actual_list: List of nodes to compare and verify
+        :param expected_list: List of nodes to compare (source of truth)
+        :param expected_index: Index of the expected_list nodes
+        :param cmp_match_found: Claimed comparison node position: claiming source node position (updated in place)
+
+        :return: None
+        """
+        matrix = expected_index.similarity_matrix
+        actual_sets, row_shapes = self._matrix_rows(actual_list=actual_list, expected_index=expected_index)
+        claimed_by = numpy.full(matrix.num_columns, self.UNCLAIMED, dtype=numpy.int64)
+        for position, act_position in cmp_match_found.items():
+            claimed_by[position] = act_position
+
+        for first_row, counts in matrix.blocks(actual_sets):
+            for offset, row_counts in enumerate(counts):
+                act_position = first_row + offset
+                act_node = actual_list[act_position]
+                result = results_dict[act_node.xpath_str]
+                if result[self.MATCH] is not None:
+                    continue
+
+                num_entries = len(actual_sets[act_position])
+                candidates = row_counts > 0
+                num_candidates = int(numpy.count_nonzero(candidates))
+                log.debug("SOURCE NODE XPATH: %s", act_node.xpath_str)
+                log.debug("CANDIDATE COMPARISON NODES: %s of %s", num_candidates, len(expected_list))
+                Profiler.count(candidates=num_candidates)
+
+                # Candidates: shared entries, same shape (see _compare_node), not claimed by a previous source node
+                valid = candidates & (matrix.column_shapes == row_shapes[act_position]) & (claimed_by >= act_position)
+
+                # Exact match: first unclaimed candidate sharing all entries
+                exact = numpy.flatnonzero(valid & (row_counts == num_entries) &
+                                          (matrix.column_sizes == num_entries) & (claimed_by == self.UNCLAIMED))
+                if exact.size:
+                    position = int(exact[0])
+                    self._record_match(result=result, act_node=act_node, exp_node=expected_list[position])
+                    claimed_by[position] = act_position
+                    cmp_match_found[position] = act_position
+                    continue
+
+                # Closest match: first candidate with the largest number of shared entries
+                scores = numpy.where(valid, row_counts, 0)
+                position = int(scores.argmax()) if scores.size else 0
+                if scores.size and scores[position] > 0:
+                    exp_node = expected_list[position]
+                    log.debug("CLOSEST: %s and %s (%s)", act_node.xpath_str, exp_node.xpath_str, scores[position])
+                    result[self.CLOSEST_MATCH_COUNT] = int(scores[position])
+                    result[self.CLOSEST_OBJ] = exp_node
+                    result[self.TOTAL] = self._get_max_unique_node_count(node_1=act_node, node_2=exp_node)
+
+    def _assign_optimal_matches_vectorized(self, results_dict: typing.Dict[str, dict],
+                                           actual_list: typing.List[BaseElement],
+                                           expected_list: typing.List[BaseElement], expected_index: TagIndex,
+                                           cmp_match_found: typing.Dict[int, int]) -> typing.NoReturn:
+        """
+        OPTIMAL strategy, scored with the similarity matrix (see _assign_optimal_matches for the rules): exact
+        matches and the candidate weights are taken from the intersection count rows of the source nodes.
+
+        :param results_dict: Results dictionary (updated in place)
+        :param actual_list: List of nodes to compare and verify
+        :param expected_list: List of nodes to compare (source of truth)
+        :param expected_index: Index of the expected_list nodes
+        :param cmp_match_found: Claimed comparison node position: claiming source node position (updated in place)
+
+        :return: None
+        """
+        matrix = expected_index.similarity_matrix
+        actual_sets, row_shapes = self._matrix_rows(actual_list=actual_list, expected_index=expected_index)
+        claimed = numpy.zeros(matrix.num_columns, dtype=bool)
+        claimed[list(cmp_match_found)] = True
+
+        # Actual nodes without an exact match: (node, {expected position: number of shared leaf entries})
+        unmatched = []
+
+        for first_row, counts in matrix.blocks(actual_sets):
+            for offset, row_counts in enumerate(counts):
+                act_position = first_row + offset
+                act_node = actual_list[act_position]
+                result = results_dict[act_node.xpath_str]
+                if result[self.MATCH] is not None:
+                    continue
+
+                num_entries = len(actual_sets[act_position])
+                Profiler.count(candidates=int(numpy.count_nonzero(row_counts)))
+                valid = (row_counts > 0) & (matrix.column_shapes == row_shapes[act_position])
+
+                exact = numpy.flatnonzero(valid & ~claimed & (row_counts == num_entries) &
+                                          (matrix.column_sizes == num_entries))
+                if exact.size:
+                    position = int(exact[0])
+                    self._record_match(result=result, act_node=act_node, exp_node=expected_list[position])
+                    claimed[position] = True
+                    cmp_match_found[position] = act_position
+                else:
+                    positions = numpy.flatnonzero(valid)
+                    unmatched.append((act_node, dict(zip(positions.tolist(), row_counts[positions].tolist()))))
+
+        self._assign_closest_matches(results_dict=results_dict, unmatched=unmatched, expected_list=expected_list,
+                                     cmp_match_found=cmp_match_found)
+
+    def _matrix_rows(self, actual_list: typing.List[BaseElement],
+                     expected_index: TagIndex) -> typing.Tuple[typing.List[array], "numpy.ndarray"]:
+        """
+        Row data of the source nodes for the similarity matrix: expanded leaf entry IDs and shape IDs (see
+        TagIndex.shapes; UNKNOWN_SHAPE if no comparison node has the shape)
+
+        :param actual_list: List of nodes to compare and verify
+        :param expected_index: Index of the nodes to compare
+
+        :return: Tuple of (list of entry ID arrays, array of shape IDs)
+        """
+        shapes = expected_index.shapes
+        actual_sets = [node.leaf_sets.entry_ids(self.symbols) for node in actual_list]
+        row_shapes = numpy.fromiter((shapes.get(node.shape_hash, self.UNKNOWN_SHAPE) for node in actual_list),
+                                    dtype=numpy.int64, count=len(actual_list))
+        return actual_sets, row_shapes
+
+    def _record_match(self, result: dict, act_node: BaseElement, exp_node: BaseElement) -> typing.NoReturn:
+        """
+        Record an exact match in the result of a source node
+
+        :param result: Result of the source node (updated in place)
+        :param act_node: Source node
+        :param exp_node: Matching comparison node
+
+        :return: None
+        """
+        log.debug("**MATCH**: %s and %s", act_node.xpath_str, exp_node.xpath_str)
+        result[self.MATCH] = exp_node
+        result[self.CLOSEST_OBJ] = None
+        result[self.CLOSEST_MATCH_COUNT] = -1
+        result[self.TOTAL] = self._get_max_unique_node_count(node_1=act_node, node_2=exp_node)
 
     @staticmethod
     def _get_max_unique_count(set_1: typing.Set[str], set_2: typing.Set[str]) -> int:
@@ -154,56 +704,38 @@ class ComparisonEngine:
         :return: Number of unique obj_paths contained between the two sets
 
         """
+        # Accumulate all traversal_paths (without data value) down to each leaf node
+        total_set = {LeafSets.entry_key(item) for item in set_1}
+        total_set.update(LeafSets.entry_key(item) for item in set_2)
 
-        def _build_value(entry_str):
-            """
-            Quick string processing routine (specific to singular BaseElement entity storage)
-            :param entry_str: entity string (traversal_path|attribute_key:entity_value)
-
-            :return: String of traversal_path|entity_key
+        # Return the number of unique traversal_paths
+        return len(total_set)
 
-            """
-            path_segment, entity = entry_str.split(BaseElement.OBJ_PATH_DELIMITER)
-            attr = entity.split(BaseElement.ENTRY_DELIMITER)[0]
-            return BaseElement.OBJ_PATH_DELIMITER.join([path_segment, attr])
+    def _get_max_unique_node_count(self, node_1: BaseElement, node_2: BaseElement) -> int:
+        """
+        Same as _get_max_unique_count(), using the nodes' memoized key ID arrays (see BaseElement.leaf_sets):
+        the union size is computed from the integer intersection size, without building a merged set.
+        :param node_1: BaseElement
+        :param node_2: BaseElement
 
-        # Accumulate all traversal_paths (without data value) down to each leaf node
-        total_list = [_build_value(item) for item in set_1]
-        total_list.extend([_build_value(item) for item in set_2])
+        :return: Number of unique obj_paths (without data values) contained between the two nodes
 
-        # Return the number of unique traversal_paths
-        return len(set(total_list))
+        """
+        return SymbolTable.union_size(node_1.leaf_sets.key_ids(self.symbols), node_2.leaf_sets.key_ids(self.symbols))
 
     @staticmethod
     def _expand_objpath_pathsets(children: typing.List[BaseElement]) -> typing.Set[str]:
         """
         BaseElement obj_paths contain the traversal_path and all leaf data:value nodes.
         For a better comparison, break the obj_path into individual traversal_path + single leaf
-        data:value node entities.
+        data:value node entities. (The expanded set of a node's leaves is memoized: node.leaf_sets.entries)
 
         :param children: BaseElement child nodes of current parent
 
         :return: Set of unique traversal_path + single leaf data:value node entities.
 
         """
-        final_list = []
-
-        # Get list of all traversal_paths
-        starting_list = [x.obj_path_str for x in children]
-
-        # Break each traversal_path|[entity_key:value] into individual path|entity:value strings
-        for path in starting_list:
-
-            # If the traversal_path has attribute
-            if BaseElement.OBJ_PATH_DELIMITER in path:
-                parts = path.split(BaseElement.OBJ_PATH_DELIMITER)
-                current_path = parts.pop(0)
-                final_list.extend([BaseElement.OBJ_PATH_DELIMITER.join([current_path, entity]) for entity in parts])
-            else:
-                final_list.append(path)
-
-        # Return all unique paths (as a set)
-        return set(final_list)
+        return set(LeafSets.expand_obj_paths(x.obj_path_str for x in children))
 
     @classmethod
     def get_leaf_nodes(cls, node: BaseElement) -> typing.List[BaseElement]:
@@ -213,35 +745,28 @@ class ComparisonEngine:
         :return: List of leaf nodes (List of BaseElements)
 
         """
-        leaves = []
-        if not node.children:
-            leaves.append(node)
-        else:
-            for child in node.children:
-                leaves.extend(cls.get_leaf_nodes(node=child))
-        return leaves
+        return list(node.leaf_sets.leaves)
 
     # -------------------------------------------------------------------------------------
     @staticmethod
     def _compare_node(src_node: BaseElement, cmp_node: BaseElement) -> bool:
         """
-        Compare the attributes and the number of children. If they match, the nodes are considered equal.
+        Compare the attributes and the number/type of children. If they match, the nodes are considered equal.
+        The sorted attributes and child types of each node are hashed once (see BaseElement.shape_hash), so the
+        check is a single digest comparison.
 
         :param src_node: Source Node
         :param cmp_node: Comparisan Node
 
         :return: Bool: True = nodes match.
         """
-        # Check if attributes (data) match and number/type of children
-        attrs = sorted(src_node.attributes) == sorted(cmp_node.attributes)
-        child_types = (sorted([child.type for child in src_node.children]) ==
-                       sorted([child.type for child in cmp_node.children]))
-
-        return attrs & child_types
+        return src_node.shape_hash == cmp_node.shape_hash
 
     def get_elements(self, element_name: str, root: BaseElement) -> typing.List[BaseElement]:
         """
-        Get the child elements of the element_name using the relative "root" node
+        Get the child elements of the element_name using the relative "root" node. For the root of a model, the
+        elements are fetched from the model's type index (see BaseElement.build_indexes); otherwise, the paths
+        are walked from the relative root.
 
         :param element_name: Name of element tag to to find
         :param root: relative starting node
@@ -252,12 +777,17 @@ class ComparisonEngine:
         # Get the XPATH tag list that corresponds to the final destination tag name
         paths = root.path_dict[element_name]
 
-        log.debug(f"List of XPath(s) to '{element_name}': {paths}")
+        log.debug("List of XPath(s) to '%s': %s", element_name, paths)
+
+        if root.type_index is not None:
+            results = list(root.type_index[element_name])
+            log.debug(lambda: f"RESULTS: {[x.xpath_str for x in results]}")
+            return results
 
         results = []
         for path in paths:
             results.extend(self._get_elements(path=path.split(root.XPATH_DELIMITER), starting_node=root))
-        log.debug(f"RESULTS: {[x.xpath_str for x in results]}")
+        log.debug(lambda: f"RESULTS: {[x.xpath_str for x in results]}")
         return results
 
     def _get_elements(self, starting_node: BaseElement, path: typing.List[str]) -> typing.List[BaseElement]:
@@ -290,9 +820,9 @@ class ComparisonEngine:
             # If there are no more nodes to traverse beyond the current node, return
             if len(path) == 1:
 
-                log.debug(f"Node type ({starting_node.type}) has children of current type ({current_type}) "
-                          f"and path has single element ({path}).\nReturning matching child nodes: "
-                          f"{[x.xpath_str for x in matching_child_nodes]}\n")
+                log.debug(lambda: f"Node type ({starting_node.type}) has children of current type ({current_type}) "
+                                  f"and path has single element ({path}).\nReturning matching child nodes: "
+                                  f"{[x.xpath_str for x in matching_child_nodes]}\n")
 
                 return matching_child_nodes
 
@@ -309,6 +839,9 @@ class ComparisonEngine:
 
         :return: None
         """
+        if not log.is_enabled_for(logging.Logger.DEBUG):
+            return
+
         for xpath, data in results_dict.items():
             debug_msg = f"XPATH: {xpath} --> "
             if data[self.MATCH] is not None:
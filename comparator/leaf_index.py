@@ -0,0 +1,69 @@
+from collections import Counter
+import itertools
+import typing
+
+from models.element_base_model import BaseElement
+
+
+class LeafIndex:
+    """
+    Inverted index of expanded leaf entries (traversal_path|key:value, as symbol table IDs) to the nodes that
+    contain the entry, bucketed by node shape (see TagIndex.shapes).
+
+    Built once per compared tag (over the expected nodes), so each actual node is only scored against the nodes
+    of its own shape (the only nodes that can pass the attribute/child type check) that share at least one leaf
+    entry with it; the number of shared entries (intersection size) for every candidate is gathered from the
+    index postings in a single pass.
+    """
+
+    def __init__(self, nodes: typing.List[BaseElement], leaf_sets: typing.List[typing.Iterable[int]],
+                 shape_ids: typing.List[int]) -> typing.NoReturn:
+        """
+        :param nodes: List of nodes to index (order is retained: node position = list index)
+        :param leaf_sets: Expanded leaf entry IDs for each node (same order as nodes)
+        :param shape_ids: Shape ID of each node (same order as nodes)
+
+        """
+        self.nodes = nodes
+        self.leaf_sets = leaf_sets
+
+        # Key: Shape ID, Value: postings of the nodes of the shape
+        # (Key: Expanded leaf entry ID, Value: List of node positions (ascending) containing the entry)
+        self.postings = {}
+        for position, (leaf_set, shape) in enumerate(zip(leaf_sets, shape_ids)):
+            postings = self.postings.setdefault(shape, {})
+            for entry in leaf_set:
+                if entry in postings:
+                    postings[entry].append(position)
+                else:
+                    postings[entry] = [position]
+
+    def overlap_counts(self, leaf_set: typing.Iterable[int], shape: int) -> typing.Dict[int, int]:
+        """
+        Determine the number of leaf entries each indexed node of a shape shares with the provided leaf set.
+
+        :param leaf_set: Expanded leaf entry IDs (unique) of the node being matched
+        :param shape: Shape ID of the node being matched
+
+        :return: Dictionary of node position: number of shared entries (only nodes of the shape sharing at least
+                 one entry)
+        """
+        postings = self.postings.get(shape)
+        if postings is None:
+            return {}
+        empty = ()
+        return Counter(itertools.chain.from_iterable(postings.get(entry, empty) for entry in leaf_set))
+
+    def candidates(self, leaf_set: typing.Iterable[int],
+                   shape: int) -> typing.Tuple[typing.Collection[int], typing.Callable[[int], int]]:
+        """
+        Candidate nodes of a leaf set (see overlap_counts) and their scoring function. The counts of all the
+        candidates are gathered in a single pass, so scoring a candidate is a lookup.
+
+        :param leaf_set: Expanded leaf entry IDs (unique) of the node being matched
+        :param shape: Shape ID of the node being matched
+
+        :return: Tuple of (candidate node positions, function: node position -> number of shared entries)
+        """
+        counts = self.overlap_counts(leaf_set, shape)
+        return counts, counts.__getitem__
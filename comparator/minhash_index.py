@@ -0,0 +1,237 @@
+"""
+    Approximate candidate search for closest matches (MinHash signatures + LSH banding), for tags with very many
+    nodes (see ComparisonEngine approximate).
+
+    Each indexed node's expanded leaf set (entry IDs, see models.symbol_table) is summarized by a MinHash signature
+    of NUM_HASHES values, computed over the entries' content hashes (so the signatures do not depend on the order
+    the entries were interned in). Two nodes with a Jaccard similarity s have the same value at each signature
+    position with probability s. The signature is cut into BANDS bands, and the nodes are bucketed per band: a node
+    is a candidate for another node when both have the same band values in at least one band, which happens with
+    probability 1 - (1 - s^rows)^bands (rows = NUM_HASHES / BANDS). Candidates are then scored exactly
+    (intersection size), so the reported counts are exact; only the candidate search is approximate (a best match
+    can be missed).
+
+    Uses NumPy to compute the signatures when it is installed.
+
+"""
+from array import array
+import copy
+import random
+import typing
+
+from models.element_base_model import BaseElement
+from models.symbol_table import SymbolTable
+
+try:
+    import numpy
+    numpy_available = True
+except ModuleNotFoundError:
+    numpy_available = False
+
+
+class MinHashIndex:
+    """
+    LSH index of the expanded leaf sets of a list of nodes. overlap_counts() and candidates() have the same
+    interface as in LeafIndex, limited to the candidates found through the LSH buckets.
+    """
+
+    NUM_HASHES = 128
+    BANDS = 32
+
+    # Hash functions: h(x) = (a * x + b) mod PRIME (a, b drawn from a seeded generator: the signatures are
+    # reproducible, and comparable between the indexed nodes and the queried nodes)
+    PRIME = (1 << 31) - 1
+    SEED = 0
+
+    # Maximum number of (hash function x entry) values computed at once (bulk signatures)
+    MAX_CHUNK_CELLS = 1 << 22
+
+    def __init__(self, nodes: typing.List[BaseElement], leaf_sets: typing.List[array], shape_ids: typing.List[int],
+                 symbols: SymbolTable) -> typing.NoReturn:
+        """
+        :param nodes: List of nodes to index (order is retained: node position = list index)
+        :param leaf_sets: Expanded leaf entry IDs for each node (same order as nodes)
+        :param shape_ids: Shape ID of each node (same order as nodes)
+        :param symbols: Symbol table of the entry IDs
+
+        """
+        self.nodes = nodes
+        self.leaf_sets = leaf_sets
+        self.shape_ids = shape_ids
+        self.symbols = symbols
+        self.rows = self.NUM_HASHES // self.BANDS
+
+        rnd = random.Random(self.SEED)
+        self._a = [rnd.randrange(1, self.PRIME) for _ in range(self.NUM_HASHES)]
+        self._b = [rnd.randrange(0, self.PRIME) for _ in range(self.NUM_HASHES)]
+        if numpy_available:
+            self._a_array = numpy.array(self._a, dtype=numpy.uint64)[:, None]
+            self._b_array = numpy.array(self._b, dtype=numpy.uint64)[:, None]
+
+            # Band values are combined into a single (64-bit) band hash
+            self._band_multipliers = numpy.array([rnd.getrandbits(64) | 1 for _ in range(self.rows)],
+                                                 dtype=numpy.uint64)
+
+        # LSH buckets. With NumPy: bucket keys (band in the top bits, band hash below; see _bucket_keys), sorted,
+        # with the node position of each key; the nodes of a bucket are found by binary search. Without NumPy: one
+        # bucket table per band (Key: Band hash, Value: List of node positions).
+        # Empty leaf sets are not indexed.
+        positions = [position for position, leaf_set in enumerate(leaf_sets) if leaf_set]
+        band_hashes = self._bulk_band_hashes([leaf_sets[position] for position in positions])
+        if numpy_available:
+            keys = self._bucket_keys(numpy.array(band_hashes, dtype=numpy.uint64).reshape(-1, self.BANDS))
+            order = numpy.argsort(keys.ravel(), kind='stable')
+            self.bucket_keys = keys.ravel()[order]
+            self.bucket_positions = numpy.repeat(numpy.array(positions, dtype=numpy.int64), self.BANDS)[order]
+        else:
+            self.buckets = [{} for _ in range(self.BANDS)]
+            for position, node_hashes in zip(positions, band_hashes):
+                for buckets, band_hash in zip(self.buckets, node_hashes):
+                    buckets.setdefault(band_hash, []).append(position)
+
+    def with_symbols(self, symbols: SymbolTable) -> "MinHashIndex":
+        """
+        Index view querying leaf sets interned with another symbol table: an overlay of the index's table (see
+        SymbolTable base), so the entries added by the overlay are hashed as well. The buckets are shared.
+
+        :param symbols: Symbol table of the queried leaf sets
+
+        :return: MinHashIndex (self if the table is the index's table)
+        """
+        if symbols is self.symbols:
+            return self
+        view = copy.copy(self)
+        view.symbols = symbols
+        return view
+
+    def signature(self, leaf_set: array) -> typing.List[int]:
+        """
+        MinHash signature of a leaf set: the minimum value of each hash function over the set's entry hashes
+
+        :param leaf_set: Expanded leaf entry IDs (not empty)
+
+        :return: List of NUM_HASHES values
+        """
+        hashes = self.symbols.content_hashes(leaf_set)
+        return [min((a * entry_hash + b) % self.PRIME for entry_hash in hashes) for a, b in zip(self._a, self._b)]
+
+    def band_hashes(self, leaf_set: array) -> typing.List[int]:
+        """
+        LSH bucket keys of a leaf set: one hash of the signature values per band
+
+        :param leaf_set: Expanded leaf entry IDs (not empty)
+
+        :return: List of BANDS band hashes
+        """
+        if numpy_available:
+            return self._bulk_band_hashes([leaf_set])[0]
+        signature = self.signature(leaf_set)
+        return [hash(tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.BANDS)]
+
+    def _bulk_band_hashes(self, leaf_sets: typing.List[array]) -> typing.List[typing.List[int]]:
+        """
+        Band hashes (see band_hashes) of a list of leaf sets; with NumPy, the signatures are computed for blocks of
+        leaf sets at once (the minimum of each hash function per leaf set: numpy.minimum.reduceat).
+
+        :param leaf_sets: Expanded leaf entry IDs (not empty)
+
+        :return: List of band hashes per leaf set
+        """
+        if not numpy_available:
+            return [self.band_hashes(leaf_set) for leaf_set in leaf_sets]
+
+        band_hashes = []
+        max_entries = max(1, self.MAX_CHUNK_CELLS // self.NUM_HASHES)
+        first = 0
+        while first < len(leaf_sets):
+            last, entries = first, 0
+            while last < len(leaf_sets) and (last == first or entries + len(leaf_sets[last]) <= max_entries):
+                entries += len(leaf_sets[last])
+                last += 1
+
+            chunk = leaf_sets[first:last]
+            entry_hashes = numpy.concatenate([numpy.frombuffer(self.symbols.content_hashes(leaf_set),
+                                                               dtype=numpy.uint32) for leaf_set in chunk])
+            offsets = numpy.cumsum([0] + [len(leaf_set) for leaf_set in chunk[:-1]])
+            hashes = (self._a_array * entry_hashes.astype(numpy.uint64) + self._b_array) % self.PRIME
+            signatures = numpy.minimum.reduceat(hashes, offsets, axis=1).T
+
+            # Band hash: sum of the band values times odd 64-bit multipliers (modulo 2^64)
+            bands = signatures.reshape(len(chunk), self.BANDS, self.rows) * self._band_multipliers
+            band_hashes.extend(bands.sum(axis=2, dtype=numpy.uint64).tolist())
+            first = last
+        return band_hashes
+
+    def _bucket_keys(self, band_hashes: "numpy.ndarray") -> "numpy.ndarray":
+        """
+        Bucket keys of band hashes: the band number replaces the top bits of the band hash, so the buckets of all
+        the bands are kept in a single sorted array (candidates are scored exactly: a lost hash bit only adds
+        candidates).
+
+        :param band_hashes: uint64 array of (nodes x BANDS) band hashes
+
+        :return: uint64 array of (nodes x BANDS) bucket keys
+        """
+        band_bits = max(1, (self.BANDS - 1).bit_length())
+        bands = numpy.arange(self.BANDS, dtype=numpy.uint64) << numpy.uint64(64 - band_bits)
+        return (band_hashes >> numpy.uint64(band_bits)) | bands
+
+    def bucket_candidates(self, leaf_set: array) -> typing.List[int]:
+        """
+        Positions of the indexed nodes sharing at least one LSH bucket with the leaf set
+
+        :param leaf_set: Expanded leaf entry IDs
+
+        :return: List of node positions (ascending)
+        """
+        if not leaf_set:
+            return []
+        if not numpy_available:
+            positions = set()
+            for buckets, band_hash in zip(self.buckets, self.band_hashes(leaf_set)):
+                positions.update(buckets.get(band_hash, ()))
+            return sorted(positions)
+
+        keys = self._bucket_keys(numpy.array(self.band_hashes(leaf_set), dtype=numpy.uint64))
+        starts = numpy.searchsorted(self.bucket_keys, keys, side='left')
+        ends = numpy.searchsorted(self.bucket_keys, keys, side='right')
+        found = ends > starts
+        if not found.any():
+            return []
+        return numpy.unique(numpy.concatenate(
+            [self.bucket_positions[start:end] for start, end in zip(starts[found], ends[found])])).tolist()
+
+    def candidates(self, leaf_set: array,
+                   shape: int) -> typing.Tuple[typing.Collection[int], typing.Callable[[int], int]]:
+        """
+        Candidate nodes of a shape sharing an LSH bucket with the leaf set (see bucket_candidates), and their
+        scoring function: the number of shared entries is computed when a candidate is scored, so candidates that
+        are not scored cost nothing.
+
+        :param leaf_set: Expanded leaf entry IDs (unique) of the node being matched
+        :param shape: Shape ID of the node being matched
+
+        :return: Tuple of (candidate node positions, function: node position -> number of shared entries (may be 0))
+        """
+        entries = set(leaf_set)
+        positions = [position for position in self.bucket_candidates(leaf_set) if self.shape_ids[position] == shape]
+        return positions, lambda position: len(entries.intersection(self.leaf_sets[position]))
+
+    def overlap_counts(self, leaf_set: array, shape: int) -> typing.Dict[int, int]:
+        """
+        Determine the number of leaf entries each candidate node (see candidates) of a shape shares with the leaf
+        set.
+
+        :param leaf_set: Expanded leaf entry IDs (unique) of the node being matched
+        :param shape: Shape ID of the node being matched
+
+        :return: Dictionary of node position: number of shared entries (only candidates of the shape sharing at
+                 least one entry)
+        """
+        positions, score = self.candidates(leaf_set, shape)
+        counts = {}
+        for position in positions:
+            count = score(position)
+            if count:
+                counts[position] = count
+        return counts
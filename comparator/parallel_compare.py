@@ -0,0 +1,176 @@
+"""
+    Runs the per-tag comparisons (ComparisonEngine.compare) concurrently.
+
+    * Small inputs: thread pool; the threads share the models of the main process.
+    * Large inputs: process pool. The models are never pickled per task: forked workers inherit the models of the
+      main process (copy-on-write); otherwise each worker builds (or loads from the model cache) its own models
+      once, when it is started.
+      Workers return compact (xpath-based) results, which are resolved against the main process models.
+
+    Results are yielded in tag order, regardless of the order in which the comparisons complete.
+
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import os
+import typing
+
+from comparator.comparison_engine import ComparisonEngine
+from logger.logging import Logger
+from models.model_cache import ModelCache
+from models.urla_xml_model import UrlaXML
+
+log = Logger()
+
+# Comparison engine of the worker process (inherited from the main process, or built by _initialize_worker)
+_worker_engine = None
+
+
+def _initialize_worker(actual_file: str, expected_file: str, parser: str, match_strategy: str, approximate: bool,
+                       cache_dir: typing.Optional[str]) -> typing.NoReturn:
+    """
+    Process pool initializer: build the worker's comparison engine (once per worker), unless the engine was
+    inherited from the main process (fork).
+
+    :param actual_file: filespec of the actual XML file
+    :param expected_file: filespec of the expected XML file
+    :param parser: XML parser used to build the models
+    :param match_strategy: ComparisonEngine match strategy
+    :param approximate: ComparisonEngine approximate mode
+    :param cache_dir: Directory of the model cache (None = model cache disabled)
+
+    :return: None
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        cache = ModelCache(cache_dir=cache_dir) if cache_dir is not None else None
+        actual = UrlaXML(data_file_name=actual_file, is_primary_source=True, parser=parser, cache=cache)
+        expected = UrlaXML(data_file_name=expected_file, is_primary_source=False, parser=parser, cache=cache)
+        _worker_engine = ComparisonEngine(actual=actual, expected=expected, match_strategy=match_strategy,
+                                          approximate=approximate)
+
+
+def _compare_tag(tag_name: str) -> typing.Dict[str, tuple]:
+    """
+    Process pool task: compare a single tag using the worker's comparison engine.
+
+    :param tag_name: XML tag to compare
+
+    :return: Compact results (see ParallelComparison.pack_results)
+    """
+    return ParallelComparison.pack_results(_worker_engine.compare(tag_name=tag_name))
+
+
+class ParallelComparison:
+    """
+    Compares a list of tags using a pool of N workers (threads or processes, see module description).
+    With a single job, the tags are compared sequentially in the main process.
+    """
+
+    PROCESS = 'process'
+    THREAD = 'thread'
+
+    # Inputs (combined size of both XML files) below this size are compared in a thread pool: the comparisons
+    # are short, so starting (and populating) worker processes would cost more than it saves.
+    THREAD_POOL_MAX_INPUT_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, engine: ComparisonEngine, jobs: int = 1, pool_type: typing.Optional[str] = None) \
+            -> typing.NoReturn:
+        """
+        :param engine: Comparison engine (main process)
+        :param jobs: Number of concurrent comparisons (0 or less = number of CPUs)
+        :param pool_type: PROCESS or THREAD (default: based on the input size)
+
+        """
+        self.engine = engine
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+
+        if pool_type is None:
+            input_size = sum(os.path.getsize(model.data_file_name) for model in (engine.actual, engine.expected))
+            pool_type = self.THREAD if input_size < self.THREAD_POOL_MAX_INPUT_SIZE else self.PROCESS
+        self.pool_type = pool_type
+
+    def compare(self, tag_list: typing.List[str]) -> typing.Iterator[typing.Tuple[str, typing.Dict[str, dict]]]:
+        """
+        Compare the tags, yielding the results in tag order (as soon as the tag and all preceding tags are done).
+
+        :param tag_list: List of XML tags to compare
+
+        :return: Iterator of (tag name, results dictionary (see ComparisonEngine.compare))
+        """
+        workers = min(self.jobs, len(tag_list))
+        if workers <= 1:
+            yield from self.engine.compare_tags(tag_names=tag_list)
+            return
+
+        log.info(f"Comparing {len(tag_list)} tags using {workers} {self.pool_type} workers.")
+        if self.pool_type == self.THREAD:
+
+            # The threads share the models: intern the leaf sets of all the tags once, up front. (Worker processes
+            # intern the leaf sets of their own tags, in parallel.)
+            self.engine.build_leaf_sets(tag_names=tag_list)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                yield from zip(tag_list, executor.map(lambda tag: self.engine.compare(tag_name=tag), tag_list))
+            return
+
+        global _worker_engine
+        context = (multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else
+                   multiprocessing.get_context())
+        if context.get_start_method() == 'fork':
+            _worker_engine = self.engine
+
+        cache = self.engine.actual.cache
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=context, initializer=_initialize_worker,
+                    initargs=(self.engine.actual.data_file_name, self.engine.expected.data_file_name,
+                              self.engine.actual.parser, self.engine.match_strategy, self.engine.approximate,
+                              cache.cache_dir if cache is not None else None)) as executor:
+                for tag, packed in zip(tag_list, executor.map(_compare_tag, tag_list)):
+                    yield tag, self.unpack_results(tag_name=tag, packed=packed)
+        finally:
+            _worker_engine = None
+
+    @staticmethod
+    def pack_results(results_dict: typing.Dict[str, dict]) -> typing.Dict[str, tuple]:
+        """
+        Reduce a results dictionary to the node xpaths and counts, so it can be returned by a worker process
+        without pickling the models.
+
+        :param results_dict: Results dictionary (see ComparisonEngine.compare)
+
+        :return: Dictionary of source xpath: (match xpath, closest xpath, closest match count, total)
+        """
+        return {xpath: (data[ComparisonEngine.MATCH].xpath_str if data[ComparisonEngine.MATCH] is not None else None,
+                        (data[ComparisonEngine.CLOSEST_OBJ].xpath_str if data[ComparisonEngine.CLOSEST_OBJ] is not None
+                         else None),
+                        data[ComparisonEngine.CLOSEST_MATCH_COUNT],
+                        data[ComparisonEngine.TOTAL])
+                for xpath, data in results_dict.items()}
+
+    def unpack_results(self, tag_name: str, packed: typing.Dict[str, tuple]) -> typing.Dict[str, dict]:
+        """
+        Rebuild a results dictionary from the compact results, using the nodes of the main process models.
+
+        :param tag_name: Compared XML tag
+        :param packed: Compact results (see pack_results)
+
+        :return: Results dictionary (see ComparisonEngine.compare)
+        """
+        if not packed:
+            return {}
+
+        actual_nodes = {node.xpath_str: node for node in self.engine.get_elements(
+            element_name=tag_name, root=self.engine.actual.model)}
+
+        expected_nodes = {}
+        if any(match or closest for match, closest, _, _ in packed.values()):
+            expected_nodes = {node.xpath_str: node for node in self.engine.get_elements(
+                element_name=tag_name, root=self.engine.expected.model)}
+
+        return {xpath: {ComparisonEngine.SRC_OBJ: actual_nodes[xpath],
+                        ComparisonEngine.MATCH: expected_nodes.get(match),
+                        ComparisonEngine.CLOSEST_MATCH_COUNT: count,
+                        ComparisonEngine.TOTAL: total,
+                        ComparisonEngine.CLOSEST_OBJ: expected_nodes.get(closest)}
+                for xpath, (match, closest, count, total) in packed.items()}
@@ -1,10 +1,9 @@
 from collections import namedtuple
 import typing
 
-import prettytable
-
 from comparator.comparison_engine import ComparisonEngine
 from logger.logging import Logger
+from utils.table_renderer import ColumnarTable
 
 log = Logger()
 
@@ -40,6 +39,13 @@ class ComparisonReportEngine:
     # Named Tuple for column definition
     COLUMN_DEF = namedtuple('column', field_names=("name", "alignment"))
 
+    # Result record (JSON Lines) types and match types
+    NODE_RECORD = "node"
+    SYM_DIFF_RECORD = "symmetrical_difference"
+    EXACT_MATCH = "exact"
+    CLOSEST_MATCH = "closest"
+    NO_MATCH = "none"
+
     def __init__(self, actual_model, expected_model, results=None) -> typing.NoReturn:
         """
         Initialize the reporting engine
@@ -52,7 +58,7 @@ class ComparisonReportEngine:
         self.expected_model = expected_model
         self.results = results
 
-    def symmetrical_differences(self) -> prettytable:
+    def symmetrical_differences(self) -> ColumnarTable:
         """
         Create a report of symmetrical ELEMENT (not attribute) differences between the data sets.
         (Symmetrical = found in one dataset, but not the other, irrespective if source or comparison)
@@ -63,16 +69,13 @@ class ComparisonReportEngine:
         # Determine difference between models tags (list all tags only present in either model but not both)
         diff = set(list(self.actual_model.path_dict)) ^ set(list(self.expected_model.path_dict))
 
-        # Instantiate table
-        table = prettytable.PrettyTable()
-
         # Column name, order, and alignment
         setup = [self.COLUMN_DEF(self.SOURCE, self.CENTER),
                  self.COLUMN_DEF(self.TAG, self.CENTER),
                  self.COLUMN_DEF(self.PATH, self.LEFT)]
-        table.field_names = [col.name for col in setup]
-        for col in setup:
-            table.align[col.name] = col.alignment
+
+        # Instantiate table
+        table = ColumnarTable(columns=setup)
 
         # Build table
         for elem in sorted(diff):
@@ -88,7 +91,7 @@ class ComparisonReportEngine:
             table.add_row(row)
         return table
 
-    def comparison_summary(self, results=None) -> prettytable:
+    def comparison_summary(self, results=None) -> ColumnarTable:
         """
         Builds table of overall results (exact and closest matches)
         :param results: Results dictionary (defined in ComparisonEngine)
@@ -97,15 +100,12 @@ class ComparisonReportEngine:
 
         """
         results = results or self.results
-        table = prettytable.PrettyTable()
 
         # Column name, order, and alignment
         setup = [self.COLUMN_DEF(self.PRIMARY_PATH, self.LEFT),
                  self.COLUMN_DEF(self.EXACT, self.LEFT),
                  self.COLUMN_DEF(self.CLOSEST, self.LEFT)]
-        table.field_names = [x.name for x in setup]
-        for col in setup:
-            table.align[col.name] = col.alignment
+        table = ColumnarTable(columns=setup)
 
         # if the results are a dictionary (should be!)
         if isinstance(results, dict):
@@ -136,7 +136,85 @@ class ComparisonReportEngine:
 
         return table
 
-    def closest_match_info(self, results: typing.Dict[str, dict] = None) -> prettytable:
+    def result_records(self, tag_name: str, results: typing.Dict[str, dict] = None) \
+            -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """
+        Generates one record (dictionary of JSON types) per actual node: match type, matched or closest xpath,
+        match counts and (closest match) per-attribute differences. Records are built one at a time, from the same
+        data as comparison_summary() and closest_match_info(), once the tag's comparison is complete. Exact matches
+        report match_count == total.
+
+        :param tag_name: Name of XML tag that represents current comparison results
+        :param results: Results dictionary (defined in ComparisonEngine)
+
+        :return: Iterator of records
+        """
+        results = results or self.results or {}
+        for xpath, data in results.items():
+            record = {"record": self.NODE_RECORD,
+                      "tag": tag_name,
+                      "xpath": xpath,
+                      "match_type": self.NO_MATCH,
+                      "match_xpath": None,
+                      "match_count": data[ComparisonEngine.CLOSEST_MATCH_COUNT],
+                      "total": data[ComparisonEngine.TOTAL],
+                      "differences": []}
+
+            if data[ComparisonEngine.MATCH] is not None:
+                record["match_type"] = self.EXACT_MATCH
+                record["match_xpath"] = data[ComparisonEngine.MATCH].xpath_str
+
+                # The engine records -1 as the match count of exact matches: all the entries match
+                record["match_count"] = data[ComparisonEngine.TOTAL]
+
+            elif data[ComparisonEngine.CLOSEST_OBJ] is not None:
+                record["match_type"] = self.CLOSEST_MATCH
+                record["match_xpath"] = data[ComparisonEngine.CLOSEST_OBJ].xpath_str
+
+                # Same attribute data as the closest match table; only the attributes with different values
+                if data[ComparisonEngine.CLOSEST_MATCH_COUNT] > 0:
+                    for src_data in self._build_differences(xpath, data).values():
+                        for dst_data in src_data.values():
+                            for attr, attr_data in sorted(
+                                    dst_data.items(), key=lambda key_value_tuple: key_value_tuple[1][self.XPATH]):
+                                actual_value = self._record_value(attr_data[self.ACTUAL_VALUE])
+                                expected_value = self._record_value(attr_data[self.EXPECTED_VALUE])
+                                if actual_value != expected_value:
+                                    record["differences"].append({"attribute": attr,
+                                                                  "xpath": attr_data[self.XPATH],
+                                                                  "actual": actual_value,
+                                                                  "expected": expected_value})
+            yield record
+
+    def symmetrical_difference_records(self) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """
+        Generates one record per element only found in one of the models (see symmetrical_differences()).
+
+        :return: Iterator of records
+        """
+        diff = set(self.actual_model.path_dict) ^ set(self.expected_model.path_dict)
+        for elem in sorted(diff):
+            if elem in self.actual_model.path_dict:
+                source, model = self.PRIMARY.lower(), self.actual_model
+            else:
+                source, model = self.EXPECTED.lower(), self.expected_model
+            yield {"record": self.SYM_DIFF_RECORD,
+                   "source": source,
+                   "tag": elem,
+                   "xpath": '//' + model.XPATH_DELIMITER.join(model.path_dict[elem])}
+
+    @classmethod
+    def _record_value(cls, value: str) -> typing.Optional[str]:
+        """
+        Record value of an attribute (missing attribute --> None)
+
+        :param value: Attribute value (or NO_ENTRY)
+
+        :return: value or None
+        """
+        return None if value in (cls.NO_ENTRY, "") else value
+
+    def closest_match_info(self, results: typing.Dict[str, dict] = None) -> ColumnarTable:
         """
         Generates element-by-element comparison of closest match to source element.
         :param results: Results Data dictionary (defined by comparison_engine._compare_element_lists())
@@ -154,10 +232,7 @@ class ComparisonReportEngine:
         ]
 
         # Define table
-        table = prettytable.PrettyTable()
-        table.field_names = [col.name for col in columns]
-        for col in columns:
-            table.align[col.name] = col.alignment
+        table = ColumnarTable(columns=columns)
 
         # Assess results
         results = results or self.results
@@ -220,35 +295,33 @@ class ComparisonReportEngine:
         src = data[ComparisonEngine.SRC_OBJ]
         cmp = data[ComparisonEngine.CLOSEST_OBJ]
 
-        # Get children of the nodes
-        src_children = ComparisonEngine.get_leaf_nodes(src)
-        cmp_children = ComparisonEngine.get_leaf_nodes(cmp)
+        # Get the (memoized) leaf data of the nodes: sets of leaf obj_paths for easy comparison, plus the
+        # obj_paths split into traversal path and (key, value) entries.
+        src_leaf_sets = src.leaf_sets
+        cmp_leaf_sets = cmp.leaf_sets
+        src_child_set = src_leaf_sets.obj_paths
+        cmp_child_set = cmp_leaf_sets.obj_paths
 
-        # Convert child data to sets for easy comparison
-        src_child_set = set([x.obj_path_str for x in src_children])
-        cmp_child_set = set([x.obj_path_str for x in cmp_children])
+        # Determine the cmp_xpath (Add the tag name attribute since XPATH index != name/index)
+        cmp_xpath = cmp.xpath_str
+        if cmp.name != cmp.VALUE_NOT_SET:
+            cmp_xpath += f" (NAME: {cmp.name})"
 
         # For all element identified...
         for attr_found in sorted(src_child_set.union(cmp_child_set)):
 
-            # Spilt obj_path based on OBJ_PATH_DELIMITER: '|' --> traversal_path | attributes
-            attr_xpath = attr_found.split(src.OBJ_PATH_DELIMITER)[0]
-            for attr_num, entry in enumerate(attr_found.split(src.OBJ_PATH_DELIMITER)[1:]):
-
-                # Determine the cmp_xpath (Add the tag name attribute since XPATH index != name/index)
-                cmp_xpath = data[ComparisonEngine.CLOSEST_OBJ].xpath_str
-                if data[ComparisonEngine.CLOSEST_OBJ].name != data[ComparisonEngine.CLOSEST_OBJ].VALUE_NOT_SET:
-                    cmp_xpath += f" (NAME: {data[ComparisonEngine.CLOSEST_OBJ].name})"
+            # obj_path split based on OBJ_PATH_DELIMITER: '|' --> traversal_path | attributes, and
+            # each attribute split by ENTRY_DELIMITER: ':' --> (leaf tag name, value)
+            in_src = attr_found in src_child_set
+            in_cmp = attr_found in cmp_child_set
+            attr_xpath, entries = (src_leaf_sets if in_src else cmp_leaf_sets).parsed_obj_paths[attr_found]
+            for leaf_tag_name, value in entries:
 
                 # Add cmp_xpath if not defined
                 if cmp_xpath not in diff_dict[src_xpath]:
                     diff_dict[src_xpath][cmp_xpath] = {}
 
-                # Split node attributes by ENTRY_DELIMITER: ':'
-                cmp_attr_data = entry.split(src.ENTRY_DELIMITER)
-
                 # If new leaf tag name, add to dict[src_xpath][cmp_xpath][new_attr] = {}
-                leaf_tag_name = cmp_attr_data[0]
                 if leaf_tag_name not in diff_dict[src_xpath][cmp_xpath]:
                     diff_dict[src_xpath][cmp_xpath][leaf_tag_name] = {
                         self.XPATH: attr_xpath,
@@ -256,13 +329,11 @@ class ComparisonReportEngine:
                         self.EXPECTED_VALUE: self.NO_ENTRY}
 
                 # If the current attribute difference is in the src set
-                if attr_found in src_child_set:
-                    diff_dict[src_xpath][cmp_xpath][leaf_tag_name][
-                        self.ACTUAL_VALUE] = src.ENTRY_DELIMITER.join(cmp_attr_data[1:])
+                if in_src:
+                    diff_dict[src_xpath][cmp_xpath][leaf_tag_name][self.ACTUAL_VALUE] = value
 
                 # If the current attribute difference is in the cmp set
-                if attr_found in cmp_child_set:
-                    diff_dict[src_xpath][cmp_xpath][leaf_tag_name][
-                        self.EXPECTED_VALUE] = src.ENTRY_DELIMITER.join(cmp_attr_data[1:])
+                if in_cmp:
+                    diff_dict[src_xpath][cmp_xpath][leaf_tag_name][self.EXPECTED_VALUE] = value
 
         return diff_dict
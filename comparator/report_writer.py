@@ -1,36 +1,77 @@
+import json
 import typing
 
 from models.urla_xml_model import UrlaXML
 from comparator.report_builder import ComparisonReportEngine
 from logger.logging import Logger
 from utils.file_utils import FileNameOps
+from utils.profiler import Profiler
+from utils.report_sink import ReportSink
+from utils.table_renderer import ColumnarTable
 
 
 log = Logger()
 
 
 class ComparisonReports:
-    def __init__(self, actual_xml_model: UrlaXML, expected_xml_model: UrlaXML, tag: str = None, html: bool = False) \
-            -> typing.NoReturn:
+
+    # Report formats:
+    #   TEXT: Result tables (.rpt)
+    #   JSONL: One compact JSON record per line (.jsonl): one record per actual node, then one record per
+    #          symmetrical difference (see ComparisonReportEngine.result_records)
+    TEXT = 'text'
+    JSONL = 'jsonl'
+    REPORT_FORMATS = (TEXT, JSONL)
+
+    def __init__(self, actual_xml_model: UrlaXML, expected_xml_model: UrlaXML, tag: str = None, html: bool = False,
+                 compress: bool = False, log_tables: bool = False, report_format: str = TEXT) -> typing.NoReturn:
         """
         The ComparisonReports Class defines and generates the various comparison reports, and also
         collects the necessary data sources for all reports, so the information only needs to be provided once
         and is available to all generated reports. (DRY Principle)
 
+        The report files stay open until close() is called (see utils.report_sink). Each table is written once
+        (to the report file); the log only records where the table was written, unless log_tables is set.
+
         :param actual_xml_model: Primary (Actual) UrlaXML model
         :param expected_xml_model: Expected (Source of truth) UrlaXML model
         :param tag: Tag name if specific comparison is done.
         :param html: (Bool) Generate HTML pages for each table?
+        :param compress: (Bool) Write gzip compressed report files (.rpt.gz, .html.gz)?
+        :param log_tables: (Bool) Also write the complete tables to the log?
+        :param report_format: Format of the report file (see REPORT_FORMATS)
 
         """
+        if report_format not in self.REPORT_FORMATS:
+            raise ValueError(f"Unknown report format: '{report_format}'. "
+                             f"Available: {', '.join(self.REPORT_FORMATS)}")
+
         self.actual = actual_xml_model
         self.expected = expected_xml_model
         self.html = html
         self.tag = tag
+        self.log_tables = log_tables
+        self.report_format = report_format
+        self.sink = ReportSink(compress=compress)
         self.report_engine = ComparisonReportEngine(actual_model=self.actual.model, expected_model=self.expected.model)
         self.report_file = FileNameOps.create_filename(
             actual_xml_filename=self.actual.data_file_name, expected_xml_filename=self.expected.data_file_name, tag=self.tag,
-            ext='rpt', unique=True)
+            ext='rpt' if report_format == self.TEXT else self.JSONL, unique=True)
+
+    def __enter__(self) -> "ComparisonReports":
+        return self
+
+    def __exit__(self, *exc_info) -> typing.NoReturn:
+        self.close()
+
+    def close(self) -> typing.NoReturn:
+        """
+        Flush and close the report files
+
+        :return: None
+        """
+        with Profiler.phase("report", label="close"):
+            self.sink.close()
 
     def generate_reports_per_tag(self, results_dict: typing.Dict[str, dict], tag_name: str) -> typing.NoReturn:
         """
@@ -38,6 +79,17 @@ class ComparisonReports:
         :param results_dict: Dictionary of results - generated and returned by the ComparisonEngine class
         :param tag_name: Name of XML tag that represents current comparison results
 
+        :return: None
+        """
+        with Profiler.phase("report", label=tag_name):
+            self._generate_reports_per_tag(results_dict=results_dict, tag_name=tag_name)
+
+    def _generate_reports_per_tag(self, results_dict: typing.Dict[str, dict], tag_name: str) -> typing.NoReturn:
+        """
+        Builds and writes the results tables/records of a tag (see generate_reports_per_tag)
+        :param results_dict: Dictionary of results - generated and returned by the ComparisonEngine class
+        :param tag_name: Name of XML tag that represents current comparison results
+
         :return: None
         """
         # Create the report filename and if it already exists, delete the file.
@@ -45,31 +97,40 @@ class ComparisonReports:
                                                 expected_xml_filename=self.expected.data_file_name,
                                                 ext=f'{tag_name}.html', unique=True)
 
+        # JSON Lines: the records are written as they are built, and flushed once per tag; tables are only built
+        # for HTML.
+        if self.report_format == self.JSONL:
+            self._write_records(records=self.report_engine.result_records(tag_name=tag_name, results=results_dict),
+                                description=f'Results for "{tag_name}"')
+            if not self.html:
+                return
+
         # Instantiate report generator and generate result tables
         result_tables = [self.report_engine.comparison_summary(results=results_dict),
                          self.report_engine.closest_match_info(results=results_dict)]
         result_table_str = ['Exact and Best Matches for "{tag_name}"\n{table}\n\n',
                             'Closest Element Match for "{tag_name}"\n{table}\n\n']
 
-        # Write results to the logfile
+        # Write results to the report file (the table is rendered once, in chunks)
         for index, (report, report_title) in enumerate(zip(result_tables, result_table_str)):
-            log.info(report_title.format(tag_name=tag_name, table=report.get_string()))
-
-            # Write the results to the report file
-            with open(self.report_file, "a") as REPORT:
-                REPORT.write(report_title.format(tag_name=tag_name, table=report.get_string()))
+            title, trailer = report_title.format(tag_name=tag_name, table='\0').split('\0')
+            if self.report_format == self.TEXT:
+                self._write_table(table=report, header=title, description=title.strip(), trailer=trailer)
 
             # Generate HTML file if requested:
             if self.html:
-                log.info(f"Generating HTML file ({html_file}) for '{tag_name}' comparison reports.\n")
-                html_table = report.get_html_string()
-                html_table = self._process_html_table(
-                    html_table=html_table, table_title=report_title.format(tag_name=tag_name, table=""),
+                log.info("Generating HTML file (%s) for '%s' comparison reports.\n",
+                         self.sink.file_spec(html_file), tag_name)
+                html_header = self._process_html_table(
+                    html_table="", table_title=report_title.format(tag_name=tag_name, table=""),
                     index=index, page_title="&lt{tag_name}&gt: Comparison Reports".format(tag_name=tag_name))
 
-                with open(html_file, "a") as HTML:
-                    HTML.write(html_table)
-                    HTML.write("</br></br>")
+                self.sink.write(html_file, html_header)
+                report.write_html(self.sink.stream(html_file))
+                self.sink.write(html_file, "</br></br>")
+
+        # The tag's HTML file is complete
+        self.sink.close(html_file)
 
     def build_sym_diff_reports(self, html: bool = False) -> typing.NoReturn:
         """
@@ -79,30 +140,98 @@ class ComparisonReports:
         :return: None
 
         """
-        sym_diff_table = self.report_engine.symmetrical_differences()
-        sym_diff_table_str = (f"\n\nSymmetrical Difference Table:\n"
-                              f"{sym_diff_table.get_string(title='Symmetrical Differences')}")
+        with Profiler.phase("report", label="Symmetrical Differences"):
+            self._build_sym_diff_reports(html=html)
 
-        # Write the symmetrical difference results to the logfile
-        log.info(sym_diff_table_str)
+    def _build_sym_diff_reports(self, html: bool = False) -> typing.NoReturn:
+        """
+        Builds and writes the symmetrical difference table/records (see build_sym_diff_reports)
+
+        :return: None
+
+        """
+        if self.report_format == self.JSONL:
+            self._write_records(records=self.report_engine.symmetrical_difference_records(),
+                                description="Symmetrical Differences")
+            if not html:
+                return
+
+        sym_diff_table = self.report_engine.symmetrical_differences()
 
         # Write the symmetrical difference results to the report file
-        with open(self.report_file, "a") as RPT:
-            RPT.write(sym_diff_table_str)
+        if self.report_format == self.TEXT:
+            self._write_table(table=sym_diff_table, header="\n\nSymmetrical Difference Table:\n",
+                              description="Symmetrical Differences", title='Symmetrical Differences')
 
         if html:
             html_file = FileNameOps.create_filename(
                 actual_xml_filename=self.actual.data_file_name, expected_xml_filename=self.expected.data_file_name,
                 ext=f'sym.html', unique=True)
 
-            html_table = sym_diff_table.get_html_string()
-            html_table = self._process_html_table(
-                html_table=html_table, page_title="Symmetric Differences",
+            html_header = self._process_html_table(
+                html_table="", page_title="Symmetric Differences",
                 table_title=f'Symmetrical Differences between "{self.actual.data_file_name}" and '
                             f'"{self.expected.data_file_name}"')
 
-            with open(html_file, "a") as HTML:
-                HTML.write(html_table)
+            self.sink.write(html_file, html_header)
+            sym_diff_table.write_html(self.sink.stream(html_file))
+            self.sink.close(html_file)
+
+    def _write_table(self, table: ColumnarTable, header: str, description: str, trailer: str = "",
+                     title: typing.Optional[str] = None) -> typing.NoReturn:
+        """
+        Write a text table to the report file, one chunk of rows at a time (the complete table is never rendered
+        as a single string). The log gets a reference to the report file (or the table, if log_tables is set).
+
+        :param table: Table to write
+        :param header: Text written before the table (ends with a line break)
+        :param description: Description of the table (logged)
+        :param trailer: Text written after the table
+        :param title: Table title (optional)
+
+        :return: None
+        """
+        if not self.log_tables:
+            log.info("%s: %s row(s) written to '%s'", description, table.rowcount,
+                     self.sink.file_spec(self.report_file))
+
+        stream = self.sink.stream(self.report_file)
+        stream.write(header)
+        if self.log_tables:
+            log.info(header[:-1])
+
+        for index, chunk in enumerate(table.iter_text(title=title)):
+            stream.write(f"\n{chunk}" if index else chunk)
+            if self.log_tables:
+                log.info(chunk)
+
+        if trailer:
+            stream.write(trailer)
+            if self.log_tables:
+                log.info(trailer[:-1])
+
+    def _write_records(self, records: typing.Iterable[typing.Dict[str, typing.Any]],
+                       description: str) -> typing.NoReturn:
+        """
+        Write records to the report file, one compact JSON record per line, then flush the file so a reader
+        following the file (e.g. tail -f) gets the complete records.
+
+        The node records are streamed per tag, not per node: a tag's matches are final only when all of its nodes
+        have been compared (the exact matches are claimed first, and the optimal strategy assigns all the nodes
+        at once). The records are built one at a time from the tag's results, which the text report also uses.
+
+        :param records: Iterable of records (JSON types)
+        :param description: Description of the records (logged)
+
+        :return: None
+        """
+        stream = self.sink.stream(self.report_file)
+        count = 0
+        for count, record in enumerate(records, start=1):
+            stream.write(json.dumps(record, separators=(',', ':')))
+            stream.write("\n")
+        self.sink.flush(self.report_file)
+        log.info("%s: %s record(s) written to '%s'", description, count, self.sink.file_spec(self.report_file))
 
     @staticmethod
     def _process_html_table(html_table: str, table_title: str, index: int = 0, font="Times New Roman",
@@ -0,0 +1,125 @@
+"""
+    All-pairs leaf entry intersection counts of a tag (actual nodes x expected nodes), vectorized with NumPy.
+
+    Each node's expanded leaf set (sorted array of entry IDs, see models.symbol_table) is a row of a sparse
+    incidence matrix over the tag's entry vocabulary; the intersection counts are the sparse product
+    (actual x vocabulary) . (vocabulary x expected), computed by expanding the shared entries into (actual row,
+    expected column) pairs and counting the pairs (numpy.bincount). The matrix is produced in blocks of actual
+    rows, so the memory used is bounded (MAX_BLOCK_CELLS, MAX_BLOCK_PAIRS) regardless of the number of nodes.
+
+    Requires NumPy (see numpy_available); the comparison engine falls back to the leaf entry index (LeafIndex)
+    without it.
+
+"""
+from array import array
+import typing
+
+try:
+    import numpy
+    numpy_available = True
+except ModuleNotFoundError:
+    numpy_available = False
+
+
+class SimilarityMatrix:
+    """
+    Expected (column) side of the intersection count matrix of a tag: the expected entry postings, sorted by
+    entry ID, the leaf set size and the shape ID (see TagIndex.shapes) of each column. Built once per tag (see
+    TagIndex.similarity_matrix); blocks() scores any list of actual nodes.
+    """
+
+    # Maximum number of cells (rows x columns) and of expanded (row, column) pairs per block of rows
+    MAX_BLOCK_CELLS = 1 << 22
+    MAX_BLOCK_PAIRS = 1 << 23
+
+    def __init__(self, expected_sets: typing.List[array], column_shapes: typing.List[int]) -> typing.NoReturn:
+        """
+        :param expected_sets: Expanded leaf entry IDs of each expected node (column = list index)
+        :param column_shapes: Shape ID of each expected node (same order)
+
+        """
+        self.num_columns = len(expected_sets)
+        self.column_sizes = numpy.fromiter((len(leaf_set) for leaf_set in expected_sets), dtype=numpy.int64,
+                                           count=self.num_columns)
+        self.column_shapes = numpy.array(column_shapes, dtype=numpy.int64)
+
+        # Postings: entry IDs (ascending) and the column of each entry
+        entry_ids, columns = self._flatten(expected_sets)
+        order = numpy.argsort(entry_ids, kind='stable')
+        self.entry_ids = entry_ids[order]
+        self.entry_columns = columns[order]
+
+    @staticmethod
+    def _flatten(leaf_sets: typing.List[array]) -> typing.Tuple["numpy.ndarray", "numpy.ndarray"]:
+        """
+        Concatenate the leaf sets into a single array of entry IDs, with the row (list index) of each entry
+
+        :param leaf_sets: Expanded leaf entry IDs of each node
+
+        :return: Tuple of (entry IDs, rows)
+        """
+        if not leaf_sets:
+            return numpy.zeros(0, dtype=numpy.uint32), numpy.zeros(0, dtype=numpy.int64)
+        sizes = numpy.fromiter((len(leaf_set) for leaf_set in leaf_sets), dtype=numpy.int64, count=len(leaf_sets))
+        entry_ids = numpy.concatenate([numpy.frombuffer(leaf_set, dtype=numpy.uint32) for leaf_set in leaf_sets])
+        return entry_ids, numpy.repeat(numpy.arange(len(leaf_sets), dtype=numpy.int64), sizes)
+
+    def blocks(self, actual_sets: typing.List[array]) -> typing.Iterator[typing.Tuple[int, "numpy.ndarray"]]:
+        """
+        Intersection counts of the actual nodes (rows) with every expected node (columns), one block of rows
+        at a time (rows in order).
+
+        :param actual_sets: Expanded leaf entry IDs of each actual node (row = list index)
+
+        :return: Iterator of (first row of the block, counts: int64 array of (block rows x expected columns))
+        """
+        num_rows = len(actual_sets)
+        if not num_rows:
+            return
+
+        # Matching postings of each actual entry: [start, end) in the sorted expected entries
+        entry_ids, rows = self._flatten(actual_sets)
+        starts = numpy.searchsorted(self.entry_ids, entry_ids, side='left')
+        ends = numpy.searchsorted(self.entry_ids, entry_ids, side='right')
+        pair_counts = ends - starts
+
+        # Blocks of rows within the cell and pair limits (at least one row per block)
+        row_pairs = numpy.bincount(rows, weights=pair_counts, minlength=num_rows).astype(numpy.int64)
+        row_entries = numpy.bincount(rows, minlength=num_rows)
+        entry_offsets = numpy.concatenate(([0], numpy.cumsum(row_entries)))
+        max_rows = max(1, self.MAX_BLOCK_CELLS // max(1, self.num_columns))
+
+        first = 0
+        while first < num_rows:
+            last = first + 1
+            pairs = row_pairs[first]
+            while last < num_rows and last - first < max_rows and pairs + row_pairs[last] <= self.MAX_BLOCK_PAIRS:
+                pairs += row_pairs[last]
+                last += 1
+
+            lo, hi = entry_offsets[first], entry_offsets[last]
+            yield first, self._count_pairs(rows=rows[lo:hi] - first, starts=starts[lo:hi],
+                                           pair_counts=pair_counts[lo:hi], num_rows=last - first)
+            first = last
+
+    def _count_pairs(self, rows: "numpy.ndarray", starts: "numpy.ndarray", pair_counts: "numpy.ndarray",
+                     num_rows: int) -> "numpy.ndarray":
+        """
+        Expand the shared entries of a block of rows into (row, column) pairs, and count the pairs per cell
+
+        :param rows: Row (within the block) of each actual entry
+        :param starts: First matching posting of each actual entry
+        :param pair_counts: Number of matching postings of each actual entry
+        :param num_rows: Number of rows of the block
+
+        :return: int64 array of (num_rows x expected columns) intersection counts
+        """
+        total = int(pair_counts.sum())
+        if not total:
+            return numpy.zeros((num_rows, self.num_columns), dtype=numpy.int64)
+
+        # Posting index of each pair: the range [start, start + count) of each entry, concatenated
+        offsets = numpy.cumsum(pair_counts) - pair_counts
+        postings = numpy.arange(total, dtype=numpy.int64) + numpy.repeat(starts - offsets, pair_counts)
+        cells = numpy.repeat(rows, pair_counts) * self.num_columns + self.entry_columns[postings]
+        return numpy.bincount(cells, minlength=num_rows * self.num_columns).reshape(num_rows, self.num_columns)
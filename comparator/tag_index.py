@@ -0,0 +1,157 @@
+from array import array
+import hashlib
+import typing
+
+from comparator.leaf_index import LeafIndex
+from comparator.minhash_index import MinHashIndex
+from comparator.similarity_matrix import SimilarityMatrix, numpy_available
+from models.element_base_model import BaseElement
+from models.symbol_table import SymbolTable
+
+
+class TagIndex:
+    """
+    Indexes of the expected (source of truth) nodes of a single tag:
+      * buckets: nodes grouped by exact match key (see exact_key and ComparisonEngine._match_exact_leaf_sets)
+      * shapes: node shape IDs (nodes grouped by shape hash, see BaseElement.shape_hash), built on first access
+      * leaf_sets: expanded leaf sets (entry ID arrays, see models.symbol_table)
+      * leaf_index: leaf entry index, bucketed by shape (closest matches), built on first access
+      * similarity_matrix: intersection count matrix (closest matches, vectorized; requires NumPy), built on
+        first access
+      * minhash_index: LSH index of the leaf sets (approximate closest matches), built on first access
+
+    The indexes are not modified by a comparison, so they are built once per tag and shared by all comparisons
+    against the same expected model (see ComparisonEngine expected_indexes).
+    """
+
+    def __init__(self, nodes: typing.List[BaseElement], symbols: SymbolTable) -> typing.NoReturn:
+        """
+        :param nodes: Expected nodes of the tag (document order: node position = list index)
+        :param symbols: Symbol table of the run (leaf entry IDs)
+
+        """
+        self.nodes = nodes
+        self.symbols = symbols
+
+        self._leaf_sets = None
+        self._leaf_index = None
+        self._shapes = None
+        self._shape_ids = None
+        self._similarity_matrix = None
+        self._minhash_index = None
+
+        # Key: Exact match key (see exact_key), Value: List of node positions (ascending)
+        self.buckets = {}
+        for position, (node, leaf_set) in enumerate(zip(nodes, self.leaf_sets)):
+            self.buckets.setdefault(self.exact_key(node=node, leaf_set=leaf_set), []).append(position)
+
+    @property
+    def leaf_sets(self) -> typing.List[array]:
+        """
+        Expanded leaf set of each node (same order as nodes)
+
+        :return: List of sorted arrays of leaf entry IDs
+        """
+        if self._leaf_sets is None:
+            self._leaf_sets = [node.leaf_sets.entry_ids(self.symbols) for node in self.nodes]
+        return self._leaf_sets
+
+    @property
+    def leaf_index(self) -> LeafIndex:
+        """
+        Inverted index of the nodes' expanded leaf entries
+
+        :return: LeafIndex
+        """
+        if self._leaf_index is None:
+            self._leaf_index = LeafIndex(nodes=self.nodes, leaf_sets=self.leaf_sets, shape_ids=self.shape_ids)
+        return self._leaf_index
+
+    @property
+    def shapes(self) -> typing.Dict[bytes, int]:
+        """
+        Shape IDs of the nodes: nodes with the same shape hash (see BaseElement.shape_hash) pass the attribute/child
+        type check of ComparisonEngine._compare_node. IDs are numbered in order of first occurrence.
+
+        :return: Dictionary of shape hash: shape ID
+        """
+        if self._shapes is None:
+            self._build_shapes()
+        return self._shapes
+
+    @property
+    def shape_ids(self) -> typing.List[int]:
+        """
+        Shape ID of each node (same order as nodes; see shapes)
+
+        :return: List of shape IDs
+        """
+        if self._shape_ids is None:
+            self._build_shapes()
+        return self._shape_ids
+
+    def _build_shapes(self) -> typing.NoReturn:
+        """
+        Number the node shapes (see shapes, shape_ids)
+
+        :return: None
+        """
+        shapes = {}
+        self._shape_ids = [shapes.setdefault(node.shape_hash, len(shapes)) for node in self.nodes]
+        self._shapes = shapes
+
+    @property
+    def similarity_matrix(self) -> SimilarityMatrix:
+        """
+        Expected side of the intersection count matrix (requires NumPy)
+
+        :return: SimilarityMatrix
+        """
+        if self._similarity_matrix is None:
+            self._similarity_matrix = SimilarityMatrix(expected_sets=self.leaf_sets, column_shapes=self.shape_ids)
+        return self._similarity_matrix
+
+    @property
+    def minhash_index(self) -> MinHashIndex:
+        """
+        LSH (MinHash) index of the nodes' expanded leaf sets
+
+        :return: MinHashIndex
+        """
+        if self._minhash_index is None:
+            self._minhash_index = MinHashIndex(nodes=self.nodes, leaf_sets=self.leaf_sets, shape_ids=self.shape_ids,
+                                               symbols=self.symbols)
+        return self._minhash_index
+
+    def prepare(self, approximate: bool = False) -> "TagIndex":
+        """
+        Build the indexes that are otherwise built on first access (e.g. before forking worker processes, so the
+        workers inherit the indexes rather than each building them).
+
+        :param approximate: Also build the LSH index (see ComparisonEngine approximate)
+
+        :return: self (to allow chaining)
+        """
+        if approximate:
+            self._minhash_index = self.minhash_index
+
+        # The comparison engine scores with the similarity matrix when NumPy is installed, else with the leaf index
+        if numpy_available:
+            self._similarity_matrix = self.similarity_matrix
+        else:
+            self._leaf_index = self.leaf_index
+        return self
+
+    @staticmethod
+    def exact_key(node: BaseElement, leaf_set: array) -> typing.Tuple[bytes, bytes]:
+        """
+        Hash table key of a node's exact matches: nodes with the same shape (attribute/child type check, see
+        ComparisonEngine._compare_node) and the same expanded leaf set are exact matches, whatever the structure
+        of their subtrees. The leaf set is hashed as its sorted entry ID array (IDs of the same symbol table).
+
+        :param node: BaseElement
+        :param leaf_set: Expanded leaf entry IDs of the node
+
+        :return: Tuple of (shape hash, leaf set digest)
+        """
+        return node.shape_hash, hashlib.blake2b(leaf_set.tobytes(), digest_size=BaseElement.HASH_SIZE).digest()
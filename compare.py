@@ -4,10 +4,14 @@ import pprint
 import typing
 
 from comparator.comparison_engine import ComparisonEngine
+from comparator.parallel_compare import ParallelComparison
 from comparator.report_writer import ComparisonReports
 from logger.logging import Logger
+from models.element_loader import ElementLoader
+from models.model_cache import ModelCache
 from models.urla_xml_model import UrlaXML
 from utils.file_utils import FileNameOps
+from utils.profiler import Profiler
 
 
 log = Logger()
@@ -41,9 +45,66 @@ class CLIArgs:
         self.parser.add_argument(
             "-d", "--debug", action="store_true",
             help="[OPTIONAL] Enable debug logging")
+        self.parser.add_argument(
+            "--debug-limit", type=int, default=None,
+            help="[OPTIONAL] Maximum number of log messages per logging call site (limits the size of debug logs "
+                 "of large files) (Default: unlimited)")
+        self.parser.add_argument(
+            "--async-log", action="store_true",
+            help="[OPTIONAL] Write the log in a background thread (the comparisons do not wait on log I/O)")
         self.parser.add_argument(
             "-w", "--html", action="store_true",
             help="[OPTIONAL] Generate HTML (web) versions of the reports, one set of reports per tag")
+        self.parser.add_argument(
+            "-p", "--parser", choices=UrlaXML.PARSERS, default=ElementLoader.EXPAT,
+            help="[OPTIONAL] XML parser used to build the models: 'lxml' requires lxml to be installed; "
+                 "'xmltodict' = legacy XML -> OrderedDict -> model conversion (Default: %(default)s)")
+        self.parser.add_argument(
+            "-m", "--match-strategy", choices=ComparisonEngine.MATCH_STRATEGIES, default=ComparisonEngine.GREEDY,
+            help="[OPTIONAL] 'greedy' = each actual node takes the first exact match and its own closest match; "
+                 "'optimal' = closest matches are assigned one-to-one, maximizing the total similarity per tag "
+                 "(Default: %(default)s)")
+        self.parser.add_argument(
+            "--approximate", action="store_true",
+            help="[OPTIONAL] For very large tags, find the closest match candidates through MinHash/LSH instead of "
+                 "scoring every node pair. Faster, but a best closest match can be missed: the estimated recall "
+                 "of each approximate tag is logged")
+        self.parser.add_argument(
+            "-j", "--jobs", type=int, default=1,
+            help="[OPTIONAL] Number of tags to compare concurrently (0 = number of CPUs). Large inputs are "
+                 "compared in worker processes, small inputs in threads (Default: %(default)s)")
+        self.parser.add_argument(
+            "-f", "--format", choices=ComparisonReports.REPORT_FORMATS, default=ComparisonReports.TEXT,
+            help="[OPTIONAL] Format of the report file: 'text' = result tables (.rpt); 'jsonl' = one JSON record per "
+                 "actual node and per symmetrical difference (.jsonl), written as each tag completes "
+                 "(Default: %(default)s)")
+        self.parser.add_argument(
+            "--compress-reports", action="store_true",
+            help="[OPTIONAL] Write gzip compressed reports (<report>.rpt.gz, <report>.html.gz)")
+        self.parser.add_argument(
+            "--log-tables", action="store_true",
+            help="[OPTIONAL] Also write the complete result tables to the log (by default, the log only records "
+                 "the number of rows and the report file of each table)")
+        self.parser.add_argument(
+            "--profile", action="store_true",
+            help="[OPTIONAL] Record the wall clock and CPU time of each phase (file read, parse, model build, compare "
+                 "per tag, report writes) and log a summary table at the end (use with --jobs 1: comparisons in "
+                 "worker processes are not recorded)")
+        self.parser.add_argument(
+            "--profile-stats", default=None, metavar="PSTATS_FILE",
+            help="[OPTIONAL] Also run cProfile (main thread) and write the statistics to PSTATS_FILE "
+                 "(implies --profile)")
+        self.parser.add_argument(
+            "--memory-profile", action="store_true",
+            help="[OPTIONAL] Record the memory retained by each phase and the peak memory during the phase "
+                 "(tracemalloc), the top allocation sites after loading, model build, each tag and the reports, "
+                 "and the number of bytes per model node (slows down the run)")
+        self.parser.add_argument(
+            "--no-cache", action="store_true",
+            help="[OPTIONAL] Always build the models from the XML files (do not use or update the model cache)")
+        self.parser.add_argument(
+            "--cache-dir", default=ModelCache.DEFAULT_DIR,
+            help="[OPTIONAL] Directory of the model cache (Default: %(default)s)")
 
 
 class DebugXML:
@@ -87,25 +148,48 @@ if __name__ == '__main__':
         actual_xml_filename=cli.args.actual, expected_xml_filename=cli.args.expected, ext='log')
     print(f"Logging to: {log_filename}.")
     log = Logger(default_level=Logger.DEBUG if cli.args.debug else Logger.INFO,
-                 set_root=True, project=project, filename=log_filename)
-
-    # Create URLA XML objects (read file, convert to nested OrderedDict structure)
-    actual = UrlaXML(data_file_name=cli.args.actual, is_primary_source=True)
-    expected = UrlaXML(data_file_name=cli.args.expected, is_primary_source=False)
+                 set_root=True, project=project, filename=log_filename, call_site_limit=cli.args.debug_limit,
+                 queue_handlers=cli.args.async_log)
+
+    # Start the phase profiler (and cProfile/tracemalloc) before reading the files
+    profile = cli.args.profile or cli.args.profile_stats is not None
+    if profile or cli.args.memory_profile:
+        Profiler.start(cprofile=cli.args.profile_stats is not None, memory=cli.args.memory_profile)
+
+    # Create URLA XML objects (read file, build the BaseElement models; or load them from the model cache).
+    # The memory profile measures the model build, so the cache is not used.
+    model_cache = None if cli.args.no_cache or cli.args.memory_profile else ModelCache(cache_dir=cli.args.cache_dir)
+    actual = UrlaXML(data_file_name=cli.args.actual, is_primary_source=True, parser=cli.args.parser,
+                     cache=model_cache)
+    expected = UrlaXML(data_file_name=cli.args.expected, is_primary_source=False, parser=cli.args.parser,
+                       cache=model_cache)
 
     # Write debug files if requested
     if cli.args.outfile:
         DebugXML.write_debug_files(actual_obj=actual, expected_obj=expected)
 
     # Instantiate comparison engine
-    comp_eng = ComparisonEngine(actual=actual, expected=expected)
-    reporter = ComparisonReports(actual_xml_model=actual, expected_xml_model=expected, html=cli.args.html)
+    comp_eng = ComparisonEngine(actual=actual, expected=expected, match_strategy=cli.args.match_strategy,
+                                approximate=cli.args.approximate)
 
     # Do a comparison on the following tags and generate the result reports
-    tag_list = (cli.args.tags if cli.args.tags is not None else
-                ["ASSET", "COLLATERAL", "EXPENSE", "LIABILITY", "LOAN", "PARTY"])
-
-    for tag in tag_list:
-        results = comp_eng.compare(tag_name=tag)
-        reporter.generate_reports_per_tag(results_dict=results, tag_name=tag)
-    reporter.build_sym_diff_reports(html=cli.args.html)
+    tag_list = cli.args.tags if cli.args.tags is not None else ComparisonEngine.DEFAULT_TAGS
+
+    # Reports are generated in tag order, as the comparisons complete (the report files are closed on exit)
+    comparisons = ParallelComparison(engine=comp_eng, jobs=cli.args.jobs)
+    with ComparisonReports(actual_xml_model=actual, expected_xml_model=expected, html=cli.args.html,
+                           compress=cli.args.compress_reports, log_tables=cli.args.log_tables,
+                           report_format=cli.args.format) as reporter:
+        for tag, results in comparisons.compare(tag_list=tag_list):
+            reporter.generate_reports_per_tag(results_dict=results, tag_name=tag)
+        reporter.build_sym_diff_reports(html=cli.args.html)
+
+    if profile or cli.args.memory_profile:
+        Profiler.stop(stats_file=cli.args.profile_stats)
+    if profile:
+        log.info(f"\n\nProfile Summary:\n{Profiler.summary_table()}\n")
+        if cli.args.profile_stats is not None:
+            log.info(f"cProfile statistics: {cli.args.profile_stats}")
+    if cli.args.memory_profile:
+        log.info(f"\n\nMemory Summary:\n{Profiler.memory_table()}\n")
+        log.info(f"\n\nTop Allocation Sites:\n{Profiler.allocation_sites_table()}\n")
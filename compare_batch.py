@@ -0,0 +1,376 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import multiprocessing
+import os
+import typing
+
+from comparator.comparison_engine import ComparisonEngine
+from comparator.report_builder import ComparisonReportEngine
+from comparator.report_writer import ComparisonReports
+from logger.logging import Logger
+from models.element_loader import ElementLoader
+from models.model_cache import ModelCache
+from models.symbol_table import SymbolTable
+from models.urla_xml_model import UrlaXML
+from utils.file_utils import FileNameOps
+from utils.table_renderer import ColumnarTable
+
+
+log = Logger()
+
+# Batch comparison of the worker process (inherited from the main process, or built by _initialize_worker)
+_worker_batch = None
+
+
+class CLIArgs:
+    """
+    CLI Arguments available for the batch application.
+    See _defined_args for list and description of the available arguments
+    """
+
+    def __init__(self) -> typing.NoReturn:
+        self.parser = argparse.ArgumentParser(
+            description="Compare many 'actual' XML files against a single 'expected' (source of truth) XML file.")
+        self._defined_args()
+        self.args = self.parser.parse_args()
+
+    def _defined_args(self) -> typing.NoReturn:
+        self.parser.add_argument(
+            "-a", "--actual", required=True, nargs="+",
+            help="The 'actual' XML files to be compared: directories (all *.xml files), glob patterns and/or files")
+        self.parser.add_argument(
+            "-e", "--expected", required=True,
+            help="MISMO formatted XML file used as the expected or 'source of truth' to verify against "
+                 "the 'actual' XML files")
+        self.parser.add_argument(
+            "-t", "--tags", nargs="+", default=None,
+            help="[OPTIONAL] Specific XML tags to analyze")
+        self.parser.add_argument(
+            "-d", "--debug", action="store_true",
+            help="[OPTIONAL] Enable debug logging")
+        self.parser.add_argument(
+            "--debug-limit", type=int, default=None,
+            help="[OPTIONAL] Maximum number of log messages per logging call site (limits the size of debug logs "
+                 "of large files) (Default: unlimited)")
+        self.parser.add_argument(
+            "--async-log", action="store_true",
+            help="[OPTIONAL] Write the log in a background thread (the comparisons do not wait on log I/O)")
+        self.parser.add_argument(
+            "-w", "--html", action="store_true",
+            help="[OPTIONAL] Generate HTML (web) versions of the reports, one set of reports per file and tag")
+        self.parser.add_argument(
+            "-p", "--parser", choices=UrlaXML.PARSERS, default=ElementLoader.EXPAT,
+            help="[OPTIONAL] XML parser used to build the models (Default: %(default)s)")
+        self.parser.add_argument(
+            "-m", "--match-strategy", choices=ComparisonEngine.MATCH_STRATEGIES, default=ComparisonEngine.GREEDY,
+            help="[OPTIONAL] How closest matches are assigned (see compare.py --help) (Default: %(default)s)")
+        self.parser.add_argument(
+            "--approximate", action="store_true",
+            help="[OPTIONAL] For very large tags, find the closest match candidates through MinHash/LSH "
+                 "(see compare.py --help)")
+        self.parser.add_argument(
+            "-j", "--jobs", type=int, default=1,
+            help="[OPTIONAL] Number of actual files compared concurrently, in worker processes "
+                 "(0 = number of CPUs) (Default: %(default)s)")
+        self.parser.add_argument(
+            "--format", choices=ComparisonReports.REPORT_FORMATS, default=ComparisonReports.TEXT,
+            help="[OPTIONAL] Format of the report file: 'text' = result tables (.rpt); 'jsonl' = one JSON record per "
+                 "actual node and per symmetrical difference (.jsonl), written as each tag completes "
+                 "(Default: %(default)s)")
+        self.parser.add_argument(
+            "--compress-reports", action="store_true",
+            help="[OPTIONAL] Write gzip compressed reports (<report>.rpt.gz, <report>.html.gz)")
+        self.parser.add_argument(
+            "--log-tables", action="store_true",
+            help="[OPTIONAL] Also write the complete result tables to the log (by default, the log only records "
+                 "the number of rows and the report file of each table)")
+        self.parser.add_argument(
+            "--no-cache", action="store_true",
+            help="[OPTIONAL] Always build the models from the XML files (do not use or update the model cache)")
+        self.parser.add_argument(
+            "--cache-dir", default=ModelCache.DEFAULT_DIR,
+            help="[OPTIONAL] Directory of the model cache (Default: %(default)s)")
+
+
+def _initialize_worker(expected_file: str, tag_list: typing.List[str], parser: str, match_strategy: str,
+                       approximate: bool, html: bool, cache_dir: typing.Optional[str], compress: bool, log_tables: bool,
+                       report_format: str) -> typing.NoReturn:
+    """
+    Process pool initializer: build the worker's batch comparison (expected model + indexes) once per worker,
+    unless it was inherited from the main process (fork).
+
+    :param expected_file: filespec of the expected XML file
+    :param tag_list: List of XML tags to compare
+    :param parser: XML parser used to build the models
+    :param match_strategy: ComparisonEngine match strategy
+    :param approximate: ComparisonEngine approximate mode
+    :param html: Generate HTML reports
+    :param cache_dir: Directory of the model cache (None = model cache disabled)
+    :param compress: Write gzip compressed reports
+    :param log_tables: Also write the complete result tables to the log
+    :param report_format: Format of the report files (see ComparisonReports.REPORT_FORMATS)
+
+    :return: None
+    """
+    global _worker_batch
+    if _worker_batch is None:
+        cache = ModelCache(cache_dir=cache_dir) if cache_dir is not None else None
+        expected = UrlaXML(data_file_name=expected_file, is_primary_source=False, parser=parser, cache=cache)
+        _worker_batch = BatchComparison(expected=expected, tag_list=tag_list, parser=parser,
+                                        match_strategy=match_strategy, approximate=approximate, html=html,
+                                        cache=cache,
+                                        compress=compress, log_tables=log_tables, report_format=report_format)
+
+
+def _compare_file(actual_file: str) -> typing.Union[typing.Dict[str, typing.Tuple[int, int, int]], str]:
+    """
+    Process pool task: compare a single actual file using the worker's batch comparison.
+
+    :param actual_file: filespec of the actual XML file
+
+    :return: File summary (see BatchComparison.compare_file)
+    """
+    return _worker_batch.compare_file(actual_file=actual_file)
+
+
+class BatchComparison:
+    """
+    Compares many actual files against the same expected file. The expected model and its per-tag indexes are
+    built once, and are shared by the comparisons of all actual files (see ComparisonEngine expected_indexes).
+    Each actual file gets its own set of reports; the per-file summaries are combined in a summary table.
+    """
+
+    XML_EXT = 'xml'
+    GLOB_CHARS = '*?['
+
+    # Maximum number of submitted (pending) files per worker: files are streamed through the pool, rather than
+    # submitting all files up front.
+    PENDING_PER_WORKER = 2
+
+    # Summary table columns
+    FILE = 'Actual File'
+    TAG = 'Tag'
+    NODES = 'Nodes'
+    EXACT = 'Exact'
+    CLOSEST = 'Closest'
+    UNMATCHED = 'Unmatched'
+    ERROR = 'ERROR'
+    TOTAL = 'TOTAL'
+
+    def __init__(self, expected: UrlaXML, tag_list: typing.List[str], parser: str = ElementLoader.EXPAT,
+                 match_strategy: str = ComparisonEngine.GREEDY, approximate: bool = False, html: bool = False,
+                 cache: typing.Optional[ModelCache] = None, compress: bool = False,
+                 log_tables: bool = False, report_format: str = ComparisonReports.TEXT) -> typing.NoReturn:
+        """
+        :param expected: Expected (source of truth) UrlaXML model
+        :param tag_list: List of XML tags to compare
+        :param parser: XML parser used to build the actual models
+        :param match_strategy: ComparisonEngine match strategy
+        :param approximate: ComparisonEngine approximate mode (the LSH indexes are built with the other indexes)
+        :param html: Generate HTML reports
+        :param cache: Model cache of the actual models (None = always build the models from the XML files)
+        :param compress: Write gzip compressed reports
+        :param log_tables: Also write the complete result tables to the log
+        :param report_format: Format of the report files (see ComparisonReports.REPORT_FORMATS)
+
+        """
+        self.expected = expected
+        self.tag_list = tag_list
+        self.parser = parser
+        self.match_strategy = match_strategy
+        self.approximate = approximate
+        self.html = html
+        self.cache = cache
+        self.compress = compress
+        self.log_tables = log_tables
+        self.report_format = report_format
+
+        # Build the expected indexes of all requested tags now, so forked workers inherit them.
+        # (The engine is only used to build the indexes: there is no actual model yet.)
+        # The symbol table of the expected model is not updated afterwards: each actual file is compared with an
+        # overlay of the table (see compare_file), dropped with the file's entries once the file is compared.
+        self.expected_indexes = {}
+        self.symbols = SymbolTable()
+        engine = ComparisonEngine(actual=None, expected=expected, expected_indexes=self.expected_indexes,
+                                  symbols=self.symbols)
+        engine.build_leaf_sets(tag_names=tag_list)
+        for tag in tag_list:
+            if tag in expected.model.path_dict:
+                engine.get_expected_index(tag_name=tag).prepare(approximate=approximate)
+
+    @classmethod
+    def find_actual_files(cls, file_specs: typing.List[str], expected_file: str = None) -> typing.List[str]:
+        """
+        Expand the list of directories, glob patterns and files to the list of actual files.
+
+        :param file_specs: List of directories (all *.xml files), glob patterns and/or files
+        :param expected_file: Expected file (excluded if found in the list)
+
+        :return: List of filespecs (sorted per directory/pattern; duplicates removed)
+        """
+        excluded = {os.path.abspath(expected_file)} if expected_file is not None else set()
+        files = []
+        for file_spec in file_specs:
+            if os.path.isdir(file_spec):
+                matches = sorted(glob.glob(os.path.join(file_spec, f"*.{cls.XML_EXT}")))
+            elif any(char in file_spec for char in cls.GLOB_CHARS):
+                matches = sorted(glob.glob(file_spec))
+            else:
+                matches = [file_spec]
+
+            for match in matches:
+                if os.path.abspath(match) not in excluded:
+                    excluded.add(os.path.abspath(match))
+                    files.append(match)
+        return files
+
+    def compare_file(self, actual_file: str) -> typing.Union[typing.Dict[str, typing.Tuple[int, int, int]], str]:
+        """
+        Compare a single actual file against the expected file, and write the file's reports.
+
+        :param actual_file: filespec of the actual XML file
+
+        :return: Dictionary of tag: (number of nodes, exact matches, closest matches), or the error message if
+                 the file could not be compared.
+        """
+        try:
+            actual = UrlaXML(data_file_name=actual_file, is_primary_source=True, parser=self.parser,
+                             cache=self.cache)
+            engine = ComparisonEngine(actual=actual, expected=self.expected, match_strategy=self.match_strategy,
+                                      expected_indexes=self.expected_indexes, symbols=self.symbols.overlay(),
+                                      approximate=self.approximate)
+            summary = {}
+            with ComparisonReports(actual_xml_model=actual, expected_xml_model=self.expected, html=self.html,
+                                   compress=self.compress, log_tables=self.log_tables,
+                                   report_format=self.report_format) as reporter:
+                for tag, results in engine.compare_tags(tag_names=self.tag_list):
+                    reporter.generate_reports_per_tag(results_dict=results, tag_name=tag)
+                    summary[tag] = (
+                        len(results),
+                        sum(1 for data in results.values() if data[ComparisonEngine.MATCH] is not None),
+                        sum(1 for data in results.values() if data[ComparisonEngine.CLOSEST_OBJ] is not None))
+                reporter.build_sym_diff_reports(html=self.html)
+
+        except Exception as exc:
+            log.error(f"Unable to compare '{actual_file}': {exc.__class__.__name__}: {exc}")
+            return f"{exc.__class__.__name__}: {exc}"
+
+        return summary
+
+    def compare_files(self, actual_files: typing.List[str], jobs: int = 1) \
+            -> typing.Iterator[typing.Tuple[str, typing.Union[typing.Dict[str, typing.Tuple[int, int, int]], str]]]:
+        """
+        Compare the actual files, yielding the summaries in file order.
+
+        :param actual_files: List of actual filespecs
+        :param jobs: Number of files compared concurrently (0 or less = number of CPUs)
+
+        :return: Iterator of (actual filespec, file summary (see compare_file))
+        """
+        workers = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(actual_files))
+        if workers <= 1:
+            for actual_file in actual_files:
+                yield actual_file, self.compare_file(actual_file=actual_file)
+            return
+
+        log.info(f"Comparing {len(actual_files)} files using {workers} worker processes.")
+        global _worker_batch
+        context = (multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else
+                   multiprocessing.get_context())
+        if context.get_start_method() == 'fork':
+            _worker_batch = self
+
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=context, initializer=_initialize_worker,
+                    initargs=(self.expected.data_file_name, self.tag_list, self.parser, self.match_strategy,
+                              self.approximate, self.html, self.cache.cache_dir if self.cache is not None else None,
+                              self.compress, self.log_tables, self.report_format)) as executor:
+                pending = deque()
+                for actual_file in actual_files:
+                    pending.append((actual_file, executor.submit(_compare_file, actual_file)))
+                    if len(pending) >= workers * self.PENDING_PER_WORKER:
+                        actual_file, future = pending.popleft()
+                        yield actual_file, future.result()
+
+                while pending:
+                    actual_file, future = pending.popleft()
+                    yield actual_file, future.result()
+        finally:
+            _worker_batch = None
+
+    def summary_table(self, summaries: typing.List[typing.Tuple[str, typing.Union[dict, str]]]) \
+            -> ColumnarTable:
+        """
+        Build the aggregate summary table: one row per file and tag, plus the totals per tag.
+
+        :param summaries: List of (actual filespec, file summary (see compare_file))
+
+        :return: ColumnarTable
+        """
+        column = ComparisonReportEngine.COLUMN_DEF
+        left, center = ComparisonReportEngine.LEFT, ComparisonReportEngine.CENTER
+        table = ColumnarTable(columns=[column(self.FILE, left), column(self.TAG, left), column(self.NODES, center),
+                                       column(self.EXACT, center), column(self.CLOSEST, center),
+                                       column(self.UNMATCHED, center)])
+
+        # Key: tag, Value: [nodes, exact, closest]
+        totals = {tag: [0, 0, 0] for tag in self.tag_list}
+        for actual_file, summary in summaries:
+            if isinstance(summary, str):
+                table.add_row([actual_file, self.ERROR, "", "", "", summary])
+                continue
+
+            for tag, (nodes, exact, closest) in summary.items():
+                table.add_row([actual_file, tag, nodes, exact, closest, nodes - exact - closest])
+                totals[tag] = [total + count for total, count in zip(totals[tag], (nodes, exact, closest))]
+
+        failed = sum(1 for _, summary in summaries if isinstance(summary, str))
+        for tag, (nodes, exact, closest) in totals.items():
+            table.add_row([f"{self.TOTAL} ({len(summaries) - failed} files, {failed} failed)", tag, nodes, exact,
+                           closest, nodes - exact - closest])
+        return table
+
+
+if __name__ == '__main__':
+    # Parse CLI args
+    cli = CLIArgs()
+
+    # Build logfile file spec and instantiate logger
+    project = "XMLComparison"
+    log_filename = FileNameOps.build_filename(target_dir='.', input_fname=cli.args.expected, ext='batch.log')
+    print(f"Logging to: {log_filename}.")
+    log = Logger(default_level=Logger.DEBUG if cli.args.debug else Logger.INFO,
+                 set_root=True, project=project, filename=log_filename, call_site_limit=cli.args.debug_limit,
+                 queue_handlers=cli.args.async_log)
+
+    actual_files = BatchComparison.find_actual_files(file_specs=cli.args.actual, expected_file=cli.args.expected)
+    tag_list = cli.args.tags if cli.args.tags is not None else ComparisonEngine.DEFAULT_TAGS
+
+    # Build the expected model and its per-tag indexes (once)
+    model_cache = None if cli.args.no_cache else ModelCache(cache_dir=cli.args.cache_dir)
+    expected = UrlaXML(data_file_name=cli.args.expected, is_primary_source=False, parser=cli.args.parser,
+                       cache=model_cache)
+    batch = BatchComparison(expected=expected, tag_list=tag_list, parser=cli.args.parser,
+                            match_strategy=cli.args.match_strategy, approximate=cli.args.approximate,
+                            html=cli.args.html, cache=model_cache,
+                            compress=cli.args.compress_reports, log_tables=cli.args.log_tables,
+                            report_format=cli.args.format)
+
+    summaries = []
+    for index, (actual_file, file_summary) in enumerate(
+            batch.compare_files(actual_files=actual_files, jobs=cli.args.jobs), start=1):
+        status = "FAILED" if isinstance(file_summary, str) else "done"
+        log.info(f"[{index}/{len(actual_files)}] {actual_file}: {status}")
+        summaries.append((actual_file, file_summary))
+
+    # Aggregate summary
+    summary_str = f"\n\nBatch Summary ('{cli.args.expected}'):\n{batch.summary_table(summaries=summaries)}\n"
+    log.info(summary_str)
+
+    summary_file = FileNameOps.build_filename(target_dir='.', input_fname=cli.args.expected, ext='batch.rpt')
+    with open(summary_file, "w") as SUMMARY:
+        SUMMARY.write(summary_str)
+    print(f"Batch summary: {summary_file}")
@@ -8,10 +8,30 @@
       * LOGLEVEL (explicitly listed)
       * FILENAME, ROUTINE, and LINE NUMBER of invoking code
 
+    The invoking code is resolved from the interpreter frames (sys._getframe), and only when the message is emitted
+    at the current logging level.
+
+    Messages can be deferred, so they are only built when emitted:
+      * %-style arguments:   log.debug("NODE: %s", node.xpath_str)
+      * callable (no args):  log.debug(lambda: f"SET:\n{pprint.pformat(leaf_set)}")
+
+    The number of messages emitted per call site (source file + line) can be limited, per call (limit=N, any
+    level) or for all DEBUG calls (Logger(..., call_site_limit=N) on the root logger), to bound the size of
+    DEBUG logs.
+
+    Optionally (Logger(..., queue_handlers=True) on the root logger), records are written by a background thread
+    (see BatchQueueListener), so the logging calls do not wait on file/console I/O.
+
 """
-import inspect
+import atexit
+import functools
 import logging
+import logging.handlers
 import os
+import queue
+import sys
+import threading
+import types
 import typing
 
 try:
@@ -21,6 +41,10 @@ except ModuleNotFoundError:
     pretty_table = False
 
 
+# Log message: str, or callable returning the message (only invoked if the message is emitted)
+MessageType = typing.Union[str, typing.Callable[[], typing.Any]]
+
+
 class ContextAdapter(logging.LoggerAdapter):
 
     PROJECT = 'site-packages'
@@ -37,7 +61,8 @@ class ContextAdapter(logging.LoggerAdapter):
         """
         depth = kwargs.pop('depth', self.extra['depth']) + 3
         project = kwargs.pop('project', self.extra['project'])
-        filename, line_num, routine, pid = self._method(depth, project)
+        frame = kwargs.pop('frame', None) or sys._getframe(depth - 1)
+        filename, line_num, routine, pid = self._method(frame, project)
         cntxt_msg = f'[{pid}][{filename}:{routine}|{line_num}] - {str(msg)}'
 
         return cntxt_msg, kwargs
@@ -55,7 +80,25 @@ class ContextAdapter(logging.LoggerAdapter):
         """
         return str(path.split('.')[0]).replace(os.path.sep, ".")
 
-    def _method(self, depth: int, project: str) -> typing.Tuple[str, int, str, int]:
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _dotted_filename(cls, code_filename: str, project: str) -> str:
+        """
+        Dotted module path of a source file, relative to the project (cached: the same few modules log repeatedly)
+
+        :param code_filename: filename of the code object
+        :param project: Name of project
+
+        :return: (str) dotted module path
+
+        """
+        filename = str(os.path.abspath(code_filename))
+        if project is None or project not in filename:
+            project = cls.PROJECT
+        filename = filename.split(f'{project}{os.path.sep}')[-1]
+        return cls._translate_to_dotted_lib_path(path=filename)
+
+    def _method(self, frame: types.FrameType, project: str) -> typing.Tuple[str, int, str, int]:
         """
         Get calling frame's basic info
         + File name relative to project name
@@ -63,20 +106,168 @@ class ContextAdapter(logging.LoggerAdapter):
         + Calling routine
         + Process pid
 
+        :param frame: Calling frame
+        :param project: Name of project
+
         :return: Tuple of values listed above.
 
         """
-        frame_info = inspect.stack()[depth]
+        filename = self._dotted_filename(frame.f_code.co_filename, project)
+        return filename, frame.f_lineno, frame.f_code.co_name, os.getpid()
 
-        filename = str(os.path.abspath(frame_info[1]))
-        if project is None or project not in filename:
-            project = self.PROJECT
-        filename = filename.split(f'{project}{os.path.sep}')[-1]
 
-        filename = self._translate_to_dotted_lib_path(path=filename)
-        line_num = frame_info[2]
-        routine = frame_info[3]
-        return filename, line_num, routine, os.getpid()
+class BatchQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener that writes the queued records to the stream handlers without flushing each record: the
+    streams are flushed when the queue is drained (or every FLUSH_BATCH_SIZE records), and when stopped.
+
+    Forked child processes do not inherit the listener thread: the handlers are flushed before the fork, and the
+    child's root logger writes directly to the handlers (see _after_fork_in_child).
+    """
+
+    FLUSH_BATCH_SIZE = 1000
+
+    # Handlers written without the flush (see _write). Subclasses (e.g. RotatingFileHandler) and FileHandlers with
+    # delay=True (stream opened on the first emit) are written through handler.handle().
+    FAST_PATH_HANDLERS = (logging.StreamHandler, logging.FileHandler)
+
+    def __init__(self, log_queue: queue.SimpleQueue, *handlers: logging.Handler) -> typing.NoReturn:
+        """
+        :param log_queue: Queue of records (filled by the QueueHandler)
+        :param handlers: Handlers that write the records
+
+        """
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.queue_handler = logging.handlers.QueueHandler(log_queue)
+        self._pending = 0
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        """
+        Get the next record; flush the handlers before waiting on an empty queue
+
+        :param block: Wait for a record
+
+        :return: LogRecord (or the stop sentinel)
+        """
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            self.flush()
+            return self.queue.get(block)
+
+    def handle(self, record: logging.LogRecord) -> typing.NoReturn:
+        """
+        Write the record to each handler (open stream/file handlers: without flushing)
+
+        :param record: LogRecord
+
+        :return: None
+        """
+        record = self.prepare(record)
+        for handler in self.handlers:
+            if record.levelno < handler.level:
+                continue
+            if type(handler) in self.FAST_PATH_HANDLERS and handler.stream is not None:
+                if handler.filter(record):
+                    self._write(handler=handler, record=record)
+            else:
+                handler.handle(record)
+
+        self._pending += 1
+        if self._pending >= self.FLUSH_BATCH_SIZE:
+            self.flush()
+
+    @staticmethod
+    def _write(handler: logging.StreamHandler, record: logging.LogRecord) -> typing.NoReturn:
+        """
+        StreamHandler.emit(), without the flush
+
+        :param handler: StreamHandler (or FileHandler) with an open stream
+        :param record: LogRecord
+
+        :return: None
+        """
+        try:
+            msg = handler.format(record)
+            with handler.lock:
+                handler.stream.write(msg + handler.terminator)
+        except Exception:
+            handler.handleError(record)
+
+    def flush(self) -> typing.NoReturn:
+        """
+        Flush the handlers
+
+        :return: None
+        """
+        self._pending = 0
+        for handler in self.handlers:
+            handler.flush()
+
+    def start(self) -> typing.NoReturn:
+        """
+        Route the root logger's records through the queue, and start the background writer.
+
+        :return: None
+        """
+        for handler in self.handlers:
+            logging.root.removeHandler(handler)
+        logging.root.addHandler(self.queue_handler)
+        super().start()
+
+        # Flush pending records at exit (registered after the logging module's atexit -> runs first)
+        atexit.register(self.stop)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(before=self._before_fork, after_in_parent=self._after_fork_in_parent,
+                                after_in_child=self._after_fork_in_child)
+
+    def stop(self) -> typing.NoReturn:
+        """
+        Write the queued records, stop the background writer, and restore the handlers on the root logger.
+        (Safe to call more than once.)
+
+        :return: None
+        """
+        if self._thread is None:
+            return
+        super().stop()
+        self.flush()
+        logging.root.removeHandler(self.queue_handler)
+        for handler in self.handlers:
+            logging.root.addHandler(handler)
+
+    def _before_fork(self) -> typing.NoReturn:
+        """
+        Hold the handler locks (no partial writes) and flush, so the child does not inherit buffered records.
+
+        :return: None
+        """
+        for handler in self.handlers:
+            handler.acquire()
+            handler.flush()
+
+    def _after_fork_in_parent(self) -> typing.NoReturn:
+        """
+        Release the handler locks held during the fork
+
+        :return: None
+        """
+        for handler in self.handlers:
+            handler.release()
+
+    def _after_fork_in_child(self) -> typing.NoReturn:
+        """
+        The child has no background writer: log directly to the handlers (the logging module reinitializes the
+        handler locks in the child).
+
+        :return: None
+        """
+        if self._thread is None:
+            return
+        self._thread = None
+        logging.root.removeHandler(self.queue_handler)
+        for handler in self.handlers:
+            logging.root.addHandler(handler)
 
 
 class Logger:
@@ -136,10 +327,20 @@ class Logger:
     DEFAULT_STACK_DEPTH = 3
     ROOT_LOGGER = 'root'
 
+    # Maximum number of messages emitted per call site (None = unlimited); set by the root logger, shared by all
+    # loggers. Key: (source file, line number), Value: number of messages logged at the call site.
+    call_site_limit = None
+    _call_site_counts = {}
+    _call_site_lock = threading.Lock()
+
+    # Background writer of the root logger's records (see queue_handlers)
+    queue_listener = None
+
     def __init__(
             self, filename: typing.Optional[str] = None, default_level: typing.Any = None,
             added_depth: int = 0, project: typing.Optional[str] = None, set_root: bool = False,
-            test_name: typing.Optional[str] = None) -> typing.NoReturn:
+            test_name: typing.Optional[str] = None, call_site_limit: typing.Optional[int] = None,
+            queue_handlers: bool = False) -> typing.NoReturn:
         """
         :param filename: Filename to write logs to...
         :param default_level: Default stack level (default = DEFAULT_STACK_DEPTH)
@@ -149,6 +350,10 @@ class Logger:
         :param set_root: Boolean (set root, see class description for information)
         :param test_name: Used for testing... allows setting of specific name
                     in log preamable for validation
+        :param call_site_limit: Maximum number of messages emitted per call site, for
+                    all loggers (root logger only; default = unlimited)
+        :param queue_handlers: Write the records in a background thread, for all loggers
+                    (root logger only; see BatchQueueListener)
 
         """
         self.filename = filename
@@ -163,6 +368,9 @@ class Logger:
         if filename is not None:
             self.root = True
 
+        if self.root and call_site_limit is not None:
+            Logger.call_site_limit = call_site_limit
+
         self.logger = None
 
         # Determine the project name if not provided. The project is used to truncate
@@ -192,6 +400,9 @@ class Logger:
             for handler in handlers:
                 logging.root.addHandler(handler)
 
+            if queue_handlers:
+                self.start_queue_listener()
+
         else:
             # Start the logger for the given module.
             self._start_logger()
@@ -241,6 +452,31 @@ class Logger:
         if self.DEBUG_MODULE:
             print(f"Configured Logger: {self.name}")
 
+    @classmethod
+    def start_queue_listener(cls) -> typing.NoReturn:
+        """
+        Move the root logger's handlers to a background writer thread: the root logger only queues the records.
+        The queued records are written at exit (or by stop_queue_listener()).
+
+        :return: None
+        """
+        if cls.queue_listener is not None:
+            return
+        cls.queue_listener = BatchQueueListener(queue.SimpleQueue(), *logging.root.handlers)
+        cls.queue_listener.start()
+
+    @classmethod
+    def stop_queue_listener(cls) -> typing.NoReturn:
+        """
+        Write all queued records and stop the background writer (the root logger writes directly to its
+        handlers again).
+
+        :return: None
+        """
+        if cls.queue_listener is not None:
+            cls.queue_listener.stop()
+            cls.queue_listener = None
+
     @staticmethod
     def determine_project() -> str:
         """
@@ -250,8 +486,10 @@ class Logger:
         Returns: Path of invoking file (without filename)
 
         """
-        frame_info = inspect.stack()[-1]
-        filename = str(os.path.abspath(frame_info.filename))
+        frame = sys._getframe()
+        while frame.f_back is not None:
+            frame = frame.f_back
+        filename = str(os.path.abspath(frame.f_code.co_filename))
         filename_parts = filename.split(os.path.sep)
         return os.path.sep.join(filename_parts[:-1])
 
@@ -274,27 +512,92 @@ class Logger:
 
         :return: string - dotted path lib
         """
-        frame_info = inspect.stack()[self.depth]
-        filename = str(os.path.abspath(frame_info.filename).split(
+        frame = sys._getframe(self.depth)
+        filename = str(os.path.abspath(frame.f_code.co_filename).split(
             f'{self.project}{os.path.sep}')[-1])
 
         return self._translate_to_dotted_lib_path(filename)
 
-    def _log_at_level(self, level: str, msg: str, prefix: str = '') -> typing.NoReturn:
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        Is a message at the given level emitted? (e.g. to skip building several debug messages at once)
+
+        :param level: logging.LEVEL (e.g. Logger.DEBUG)
+
+        :return: (bool) True if the message would be emitted
+
+        """
+        return self.logger.isEnabledFor(level)
+
+    def _log_at_level(self, level: str, msg: MessageType, prefix: str = '', args: tuple = (),
+                      limit: typing.Optional[int] = None) -> typing.NoReturn:
         """
         Determine and use the proper logging level (abstracted to expose logging
         routines at class level; also reduces the dotted path when invoking in
         code.
 
         :param level: logging.LEVEL
-        :param msg: message to log
+        :param msg: message to log (str or callable returning the message)
         :param prefix: If preamble needs an additional internal prefix.
+        :param args: %-style message arguments
+        :param limit: Maximum number of messages emitted by the call site (default = call_site_limit for
+                      DEBUG messages, unlimited for the other levels)
 
         :return: None
         """
+        # Nothing to resolve or format if the message is not emitted at the current level.
+        if not self.logger.isEnabledFor(self.ERROR if level == 'EXCEPTION' else self.STR_TO_VAL[level.lower()]):
+            return
+
+        # Resolve the calling frame once for all lines (frame: Logger._method -> _log_at_level -> shortcut -> caller)
+        frame = sys._getframe(self.depth - 1)
+
+        # The default limit only bounds DEBUG messages; an explicit limit applies at any level.
+        if limit is None and level == 'DEBUG':
+            limit = self.call_site_limit
+        if limit is not None:
+            count = self._count_call_site(frame=frame)
+            if count > limit + 1:
+                return
+            if count == limit + 1:
+                msg, args = ("Call site message limit (%s) reached: further messages from this call site "
+                             "are suppressed.", (limit, ))
+
+        msg = self._build_message(msg=msg, args=args)
+        extra = self._method(frame=frame)
         log_routine = getattr(self.logger, level.lower())
         for line in msg.split('\n'):
-            log_routine(str(prefix) + str(line), extra=self._method())
+            log_routine(str(prefix) + str(line), extra=extra, frame=frame)
+
+    @staticmethod
+    def _build_message(msg: MessageType, args: tuple) -> str:
+        """
+        Build a deferred message: invoke the callable and/or apply the %-style arguments
+
+        :param msg: message (str or callable returning the message)
+        :param args: %-style message arguments
+
+        :return: (str) message
+        """
+        if callable(msg):
+            msg = msg()
+        return str(msg) % args if args else str(msg)
+
+    @classmethod
+    def _count_call_site(cls, frame: types.FrameType) -> int:
+        """
+        Count a message emitted by the call site (source file + line)
+
+        :param frame: Calling frame
+
+        :return: (int) Number of messages emitted by the call site, including this message
+
+        """
+        call_site = (frame.f_code.co_filename, frame.f_lineno)
+        with cls._call_site_lock:
+            count = cls._call_site_counts.get(call_site, 0) + 1
+            cls._call_site_counts[call_site] = count
+        return count
 
     def _list_loggers(self) -> typing.List[typing.List[str]]:
         """
@@ -380,7 +683,7 @@ class Logger:
         """
         return str(path.split('.')[0]).replace(os.path.sep, ".")
 
-    def _method(self) -> typing.Dict[str, typing.Any]:
+    def _method(self, frame: types.FrameType) -> typing.Dict[str, typing.Any]:
         """
         Get calling frame's basic info
         + File name relative to project name
@@ -388,16 +691,16 @@ class Logger:
         + Calling routine
         + Process pid
 
+        :param frame: Calling frame
+
         :return: Dictionary of values listed above.
 
         """
-        frame_info = inspect.stack()[self.depth]
-
-        filename = str(os.path.abspath(frame_info[1]).split(f'{self.project}{os.path.sep}')[-1])
+        filename = str(os.path.abspath(frame.f_code.co_filename).split(f'{self.project}{os.path.sep}')[-1])
 
         return {'file_name': self._translate_to_dotted_lib_path(path=filename),
-                'linenum': frame_info[2],
-                'routine': frame_info[3],
+                'linenum': frame.f_lineno,
+                'routine': frame.f_code.co_name,
                 'pid': os.getpid()}
 
     # Quick class level references to logger methods.
@@ -405,74 +708,95 @@ class Logger:
     # ==> Simplification from obj.log.log_level() to obj.log_level()
     # ------------------------------------------------------------------
 
-    def critical(self, msg: str = '') -> typing.NoReturn:
+    def critical(self, msg: MessageType = '', *args: typing.Any, limit: typing.Optional[int] = None) \
+            -> typing.NoReturn:
         """
         Shortcut to logging.critical() logging call
-        :param msg: Message to log
+        :param msg: Message to log (str or callable returning the message)
+        :param args: %-style message arguments (message only formatted if emitted)
+        :param limit: Maximum number of messages emitted by the call site
 
         :return: None
 
         """
-        self._log_at_level(level='CRITICAL', msg=msg)
+        self._log_at_level(level='CRITICAL', msg=msg, args=args, limit=limit)
 
-    def error(self, msg: str = '') -> typing.NoReturn:
+    def error(self, msg: MessageType = '', *args: typing.Any, limit: typing.Optional[int] = None) \
+            -> typing.NoReturn:
         """
         Shortcut to logging.error() logging call
-        :param msg: Message to log
+        :param msg: Message to log (str or callable returning the message)
+        :param args: %-style message arguments (message only formatted if emitted)
+        :param limit: Maximum number of messages emitted by the call site
 
         :return: None
 
         """
-        self._log_at_level(level='ERROR', msg=msg)
+        self._log_at_level(level='ERROR', msg=msg, args=args, limit=limit)
 
-    def warn(self, msg: str = '') -> typing.NoReturn:
+    def warn(self, msg: MessageType = '', *args: typing.Any, limit: typing.Optional[int] = None) \
+            -> typing.NoReturn:
         """
         Shortcut to logging.warn() logging call
-        :param msg: Message to log
+        :param msg: Message to log (str or callable returning the message)
+        :param args: %-style message arguments (message only formatted if emitted)
+        :param limit: Maximum number of messages emitted by the call site
 
         :return: None
 
         """
-        self._log_at_level(level='WARN', msg=msg)
+        self._log_at_level(level='WARN', msg=msg, args=args, limit=limit)
 
-    def warning(self, msg: str = '') -> typing.NoReturn:
+    def warning(self, msg: MessageType = '', *args: typing.Any, limit: typing.Optional[int] = None) \
+            -> typing.NoReturn:
         """
         Shortcut to logging.warn() logging call
-        :param msg: Message to log
+        :param msg: Message to log (str or callable returning the message)
+        :param args: %-style message arguments (message only formatted if emitted)
+        :param limit: Maximum number of messages emitted by the call site
 
         :return: None
 
         """
-        self.warn(msg)
+        self._log_at_level(level='WARN', msg=msg, args=args, limit=limit)
 
-    def info(self, msg: str = '') -> typing.NoReturn:
+    def info(self, msg: MessageType = '', *args: typing.Any, limit: typing.Optional[int] = None) \
+            -> typing.NoReturn:
         """
         Shortcut to logging.info() logging call
-        :param msg: Message to log
+        :param msg: Message to log (str or callable returning the message)
+        :param args: %-style message arguments (message only formatted if emitted)
+        :param limit: Maximum number of messages emitted by the call site
 
         :return: None
 
         """
-        self._log_at_level(level='INFO', msg=msg)
+        self._log_at_level(level='INFO', msg=msg, args=args, limit=limit)
 
-    def debug(self, msg: str = '') -> typing.NoReturn:
+    def debug(self, msg: MessageType = '', *args: typing.Any, limit: typing.Optional[int] = None) \
+            -> typing.NoReturn:
         """
         Shortcut to logging.debug() logging call
-        :param msg: Message to log
+        :param msg: Message to log (str or callable returning the message)
+        :param args: %-style message arguments (message only formatted if emitted)
+        :param limit: Maximum number of messages emitted by the call site
 
         :return: None
 
         """
-        self._log_at_level(level='DEBUG', msg=msg)
+        self._log_at_level(level='DEBUG', msg=msg, args=args, limit=limit)
 
-    def exception(self, msg: str = '') -> typing.NoReturn:
+    def exception(self, msg: MessageType = '', *args: typing.Any, limit: typing.Optional[int] = None) \
+            -> typing.NoReturn:
         """
         Shortcut to logging.exception() logging call
-        :param msg: Message to log
+        :param msg: Message to log (str or callable returning the message)
+        :param args: %-style message arguments (message only formatted if emitted)
+        :param limit: Maximum number of messages emitted by the call site
         :return: None
 
         """
-        self._log_at_level(level='EXCEPTION', msg=msg)
+        self._log_at_level(level='EXCEPTION', msg=msg, args=args, limit=limit)
 
 
 # FOR VISUAL/MANUAL TESTING PURPOSES
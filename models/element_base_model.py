@@ -1,10 +1,23 @@
+from array import array
 from collections import OrderedDict
+import hashlib
+import sys
 import typing
 
+from models.symbol_table import SymbolTable
 from models.urla_xml_keys import UrlaXmlKeys
+from utils.profiler import Profiler
 
 
 class BaseElement:
+    """
+    Compact representation of an XML element. Paths are not stored per element: they are derived from the parent
+    chain, built once (on first access) and cached. Traversal paths are shared by all elements of the same path
+    (interned), and the source data (OrderedDict or parser content) is not retained once the element is built.
+
+    Each element carries a shape hash (see shape_hash), computed on first access: a digest of the sorted
+    attributes and the sorted child types, so the node check of the comparison is a single digest comparison.
+    """
 
     START = "MESSAGE"
     XPATH_DELIMITER = "/"
@@ -13,6 +26,11 @@ class BaseElement:
     OBJ_TYPE = VALUE_NOT_SET
     OBJ_PATH_DELIMITER = "|"
     ENTRY_DELIMITER = ":"
+    HASH_SIZE = 16
+    HASH_SEPARATOR = '\x00'
+
+    __slots__ = ('parent', 'name', 'type', 'index', 'path_dict', 'path_index', 'type_index', 'children', 'attributes',
+                 '_shape_hash', '_xpath_str', '_traversal_list_str', '_obj_path_str', '_leaf_sets')
 
     def __init__(self, data: OrderedDict, parent: typing.Optional["BaseElement"] = None,
                  element_type: str = None, index: int = None) -> typing.NoReturn:
@@ -20,94 +38,232 @@ class BaseElement:
         Instantiate and populate BaseElement. A BaseElement is the basic building block of translating the
         OrderedDict results generated from XMLtoDict to an object model.
 
-        :param data: OrderDict of XML (created from XmlToDict library)
+        :param data: OrderDict of XML (created from XmlToDict library); not retained by the element
         :param parent: This object's Parent BaseElement
         :param element_type: Provided type (key from child OrderedDict, value=data) or First Key in dict
                              (should be only key since it is the root)
         :param index: If element is in a list, index indicates this "data"'s position in the list
 
         """
-        self.data = data
         self.parent = parent
-        self.name = self.data.get(UrlaXmlKeys.XLINK_LABEL, self.VALUE_NOT_SET)
-        self.type = element_type or list(data.keys())[0]
+        self.name = data.get(UrlaXmlKeys.XLINK_LABEL, self.VALUE_NOT_SET)
+        self.type = sys.intern(element_type or list(data.keys())[0])
         self.index = index
         self.path_dict = None
+        self.path_index = None
+        self.type_index = None
         self.children = []
+        self._reset_paths()
 
         # Collect attributes for this element
-        # List of strings, each element = "<key>:<value>"
+        # Tuple of strings, each element = "<key>:<value>"
         self.attributes = self._get_element_data_attributes(data)
 
-        # XPATH: Build the xpath to this element (same as traversal path, but contains indices when in a list)
-        if parent is None:
-            self.xpath = [self.XPATH_DELIMITER]
-        else:
-            self.xpath = parent.xpath.copy()
-            elem_type = self.type if self.index is None else f"{self.type}[{self.index}]"
-            self.xpath.append(elem_type)
-
-        # TRAVERSAL_LIST: A traversal list is the XPATH **WITHOUT** the embedded element-index tracking
-        # Instantiate the traversal list or copy the list from the parent and then append current element type
-        if parent is None:
-            self.traversal_list = []
-        else:
-            self.traversal_list = parent.traversal_list.copy()
-            self.traversal_list.append(self.type)
+        # Marshall all child nodes into BaseElement objects
+        self._deserialize_children(data)
+        self._shape_hash = None
 
-        # OBJECT_PATH: Object_path is the same as the traversal path, but the object's attributes are included also.
-        # This path is used for raw comparison of leaf nodes to help find matches between documents (source/compare)
+        # Build the path dictionary and the node indexes (only done for root element)
         if parent is None:
-            self.obj_path = []
-        else:
-            self.obj_path = parent.obj_path.copy()
-            current_object = self.type
-            if self.attributes:
-                current_object += self.OBJ_PATH_DELIMITER + self.OBJ_PATH_DELIMITER.join(self.attributes)
-            self.obj_path.append(current_object)
+            self.build_indexes()
 
-        # Marshall all child nodes into BaseElement objects
-        self._deserialize_children()
+    @classmethod
+    def from_parsed(cls, element_type: str, attributes: typing.List[str], children: typing.List["BaseElement"],
+                    name: str = None) -> "BaseElement":
+        """
+        Instantiate a BaseElement from content that has already been collected by a parser (see
+        models.element_loader), rather than from an xmltodict OrderedDict. The parent and index are
+        assigned afterwards, once the parent element has been closed, by calling finalize() on the root.
 
-        # Build dictionary of possible keys and corresponding paths (only done for root element)
-        if parent is None:
-            self.path_dict = self.build_element_paths_dict()
+        :param element_type: Element tag
+        :param attributes: List of strings, each element = "<key>:<value>"
+        :param children: Child BaseElements (already instantiated)
+        :param name: Value of the element's xlink:label (if defined)
+
+        :return: BaseElement (without parent)
+        """
+        element = cls.__new__(cls)
+        element.parent = None
+        element.name = name or cls.VALUE_NOT_SET
+        element.type = sys.intern(element_type)
+        element.index = None
+        element.path_dict = None
+        element.path_index = None
+        element.type_index = None
+        element.children = children
+        element.attributes = tuple(attributes)
+        element._shape_hash = None
+        element._reset_paths()
+        return element
+
+    def finalize(self) -> "BaseElement":
+        """
+        Link the children to their parent (top-down). Used for trees instantiated via from_parsed(), where the
+        parent is not known until the parent element has been parsed. When invoked on the root element, the path
+        dictionary and the node indexes are also built. Any cached paths and leaf sets of the (sub)tree are invalidated.
+
+        :return: self (to allow chaining)
+        """
+        self._reset_paths()
+        for child in self.children:
+            child.parent = self
+            child.finalize()
+
+        if self.parent is None:
+            self.build_indexes()
+        return self
+
+    def _reset_paths(self) -> typing.NoReturn:
+        """
+        Clear the cached path strings and leaf sets (they are rebuilt on next access).
+
+        :return: None
+        """
+        self._xpath_str = None
+        self._traversal_list_str = None
+        self._obj_path_str = None
+        self._leaf_sets = None
+
+    @property
+    def shape_hash(self) -> bytes:
+        """
+        Digest of the element's sorted attributes and sorted child types (the child type multiset: repeated types
+        are counted), computed on first access and cached. Elements with the same shape hash pass the attribute
+        and child type check of the comparison (see ComparisonEngine._compare_node).
+
+        :return: Digest (bytes)
+        """
+        if self._shape_hash is None:
+            digest = hashlib.blake2b(self.HASH_SEPARATOR.join(sorted(self.attributes)).encode(),
+                                     digest_size=self.HASH_SIZE)
+            digest.update(self.HASH_SEPARATOR.encode())
+            digest.update(self.HASH_SEPARATOR.join(sorted(child.type for child in self.children)).encode())
+            self._shape_hash = digest.digest()
+        return self._shape_hash
+
+    @property
+    def leaf_sets(self) -> "LeafSets":
+        """
+        Leaf data of this element (leaf descendants, their obj_paths and the expanded entries), built on first
+        access and cached, so the comparison engine and the report builder share a single copy.
+
+        :return: LeafSets
+        """
+        if self._leaf_sets is None:
+            self._leaf_sets = LeafSets(element=self)
+        return self._leaf_sets
+
+    def _lineage(self) -> typing.List["BaseElement"]:
+        """
+        List of elements from the root down to (and including) this element.
+
+        :return: List of BaseElements
+        """
+        lineage = []
+        node = self
+        while node is not None:
+            lineage.append(node)
+            node = node.parent
+        lineage.reverse()
+        return lineage
+
+    @property
+    def obj_path_segment(self) -> str:
+        """
+        This element's entry in the object path: the element type, followed by the element's attributes.
+        Example: TAG|key_1:value_1|key_2:value_2
+
+        :return: str
+        """
+        if not self.attributes:
+            return self.type
+        return self.OBJ_PATH_DELIMITER.join((self.type, ) + self.attributes)
+
+    @property
+    def xpath(self) -> typing.List[str]:
+        """
+        XPATH: The path to this element (same as traversal path, but contains indices when in a list)
+
+        :return: List of path elements: [XPATH_DELIMITER, TAG_1, TAG_2[index], ...]
+        """
+        return [self.XPATH_DELIMITER] + [
+            node.type if node.index is None else f"{node.type}[{node.index}]" for node in self._lineage()[1:]]
+
+    @property
+    def traversal_list(self) -> typing.List[str]:
+        """
+        TRAVERSAL_LIST: A traversal list is the XPATH **WITHOUT** the embedded element-index tracking
+
+        :return: List of element types: [TAG_1, TAG_2, ...]
+        """
+        return [node.type for node in self._lineage()[1:]]
+
+    @property
+    def obj_path(self) -> typing.List[str]:
+        """
+        OBJECT_PATH: Object_path is the same as the traversal path, but the object's attributes are included also.
+        This path is used for raw comparison of leaf nodes to help find matches between documents (source/compare)
+
+        :return: List of object path segments: [TAG_1|key:value, TAG_2, ...]
+        """
+        return [node.obj_path_segment for node in self._lineage()[1:]]
 
     @property
     def obj_path_str(self) -> str:
         """
-        Build the obj_path list as a string (using the XPATH_DELIMITER)
+        Build the obj_path list as a string (using the XPATH_DELIMITER); built once from the parent's obj_path_str.
 
         Example: Given the obj_path: [TAG_1, TAG_2, TAG_3, ..., TAG_N)
         Result: TAG_1/TAG_2/TAG_3/.../TAG_N
 
         :return: str value of list.
         """
-        return self.XPATH_DELIMITER.join(self.obj_path)
+        if self._obj_path_str is None:
+            if self.parent is None:
+                self._obj_path_str = ''
+            else:
+                parent_path = self.parent.obj_path_str
+                segment = self.obj_path_segment
+                self._obj_path_str = f"{parent_path}{self.XPATH_DELIMITER}{segment}" if parent_path else segment
+        return self._obj_path_str
 
     @property
     def xpath_str(self) -> str:
         """
-        Build the xpath list as a string (using the XPATH_DELIMITER)
+        Build the xpath list as a string (using the XPATH_DELIMITER); built once from the parent's xpath_str.
 
         Example: Given the xpath: [TAG_1, TAG_2, TAG_3, ..., TAG_N)
         Result: TAG_1/TAG_2/TAG_3/.../TAG_N
 
         :return: str value of list.
         """
-        return self.XPATH_DELIMITER.join(self.xpath)
+        if self._xpath_str is None:
+            if self.parent is None:
+                self._xpath_str = self.XPATH_DELIMITER
+            else:
+                segment = self.type if self.index is None else f"{self.type}[{self.index}]"
+                self._xpath_str = f"{self.parent.xpath_str}{self.XPATH_DELIMITER}{segment}"
+        return self._xpath_str
 
     @property
     def traversal_list_str(self) -> str:
         """
-        Build the traversal_path list as a string (using the XPATH_DELIMITER)
+        Build the traversal_path list as a string (using the XPATH_DELIMITER); built once from the parent's
+        traversal_list_str. The string is interned, so it is shared by all elements with the same traversal path.
 
         Example: Given the traversal_path: [TAG_1, TAG_2, TAG_3, ..., TAG_N)
         Result: TAG_1/TAG_2/TAG_3/.../TAG_N
 
         :return: str value of list.
         """
-        return self.XPATH_DELIMITER.join(self.traversal_list)
+        if self._traversal_list_str is None:
+            if self.parent is None:
+                self._traversal_list_str = ''
+            else:
+                parent_path = self.parent.traversal_list_str
+                self._traversal_list_str = sys.intern(
+                    f"{parent_path}{self.XPATH_DELIMITER}{self.type}" if parent_path else self.type)
+        return self._traversal_list_str
 
     def get_children_by_type(self, child_type: str) -> typing.List["BaseElement"]:
         """
@@ -118,13 +274,28 @@ class BaseElement:
         """
         return [child for child in self.children if child.type == child_type]
 
-    def _deserialize_children(self) -> typing.NoReturn:
+    def node_count(self) -> int:
+        """
+        Number of BaseElements in the (sub)tree: self + descendants
+        :return: (int) Number of elements
+        """
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
+    def _deserialize_children(self, data: OrderedDict) -> typing.NoReturn:
         """
         Iterate through child elements, instantiating and storing child elements
 
+        :param data: OrderedDict of XML element
+
         :return: None
         """
-        for child_type, child_data in [(key, value) for key, value in self.data.items()]:
+        for child_type, child_data in [(key, value) for key, value in data.items()]:
 
             # If ordered dictionary...
             if isinstance(child_data, OrderedDict):
@@ -137,17 +308,17 @@ class BaseElement:
                         BaseElement(data=child_element, element_type=child_type, index=index, parent=self))
 
     @classmethod
-    def _get_element_data_attributes(cls, data: OrderedDict) -> typing.List[str]:
+    def _get_element_data_attributes(cls, data: OrderedDict) -> typing.Tuple[str, ...]:
         """
         Collect attributes (key prefixed with '@' character)
         :param data: OrderedDict of XML element
-        :return: List of lexicographically sorted strings --> attribute_name:attribute_value
+        :return: Tuple of lexicographically sorted strings --> attribute_name:attribute_value
 
         """
-        return sorted([f"{key}{cls.ENTRY_DELIMITER}{value}" for key, value in data.items() if
+        return tuple(sorted([f"{key}{cls.ENTRY_DELIMITER}{value}" for key, value in data.items() if
                        not key.startswith('@') and
                        not isinstance(value, OrderedDict) and
-                       not isinstance(value, list)])
+                       not isinstance(value, list)]))
 
     def __str__(self, index: int = 0) -> str:
         """
@@ -170,30 +341,319 @@ class BaseElement:
         output += ''.join([child.__str__(index + 1) for child in self.children])
         return output
 
-    def build_element_paths_dict(self, paths: typing.List[str] = None) -> typing.Dict[str, typing.List[str]]:
+    def build_indexes(self) -> typing.NoReturn:
         """
-        Traverse data tree, recording the path to each unique element type
+        Traverse the data tree once (pre-order, iterative), and build (root element only):
+          * path_dict: element type --> list of the unique traversal paths to the type (document order)
+          * path_index: traversal path --> list of the elements at that path (document order)
+          * type_index: element type --> list of the elements of the type (grouped by path, in path_dict order)
 
-        :param paths: Dictionary of elements, value equals list of elements required to reach key element.
-        :return: Dictionary of elements, value equals list of elements required to reach key element.
+        A traversal path determines the element type, so a path is new for its type exactly when it is not yet
+        a key of path_index (hash lookup, rather than a scan of the type's path list). The root element is only
+        recorded in path_dict (traversal path: '').
 
+        :return: None
+        """
+        with Profiler.phase("build indexes"):
+            path_dict = {self.type: [self.traversal_list_str]}
+            path_index = {}
+
+            stack = list(reversed(self.children))
+            while stack:
+                node = stack.pop()
+                path = node.traversal_list_str
+                nodes = path_index.get(path)
+                if nodes is None:
+                    nodes = path_index[path] = []
+                    path_dict.setdefault(node.type, []).append(path)
+                nodes.append(node)
+                stack.extend(reversed(node.children))
+
+            self.path_dict = path_dict
+            self.path_index = path_index
+            self.type_index = {element_type: [node for path in paths for node in path_index.get(path, [])]
+                               for element_type, paths in path_dict.items()}
+
+
+class LeafSets:
+    """
+    Memoized leaf data of a BaseElement (see BaseElement.leaf_sets):
+      * leaves: Leaf elements (elements without children) of the element (self + descendants) (built on first
+        access)
+      * obj_paths: Set of the leaves' obj_path strings (built on first access)
+      * entries: obj_paths expanded into individual traversal_path|key:value entries (built on first access)
+      * keys: entries without the data values: traversal_path|key (built on first access)
+      * parsed_obj_paths: obj_path --> (traversal_path, ((key, value), ...)) (built on first access)
+      * entry_ids/key_ids: entries and keys as sorted arrays of integer IDs (see models.symbol_table), built on
+        first use with a symbol table, or for a whole tree at once (see intern_tree)
+    """
+
+    __slots__ = ('_element', '_leaves', '_obj_paths', '_entries', '_keys', '_parsed_obj_paths', '_ids')
+
+    def __init__(self, element: BaseElement) -> typing.NoReturn:
         """
-        # If first value in the structure, initialize the path dictionary.
-        if paths is None:
-            paths = {self.type: [self.traversal_list_str]}
+        :param element: Element (relative root) to collect the leaf data
 
-        # New element type... don't include the current element, which will be the last element in the list
-        elif self.type not in paths:
-            paths[self.type] = [self.traversal_list_str]
+        """
+        self._element = element
+        self._leaves = None
+        self._obj_paths = None
+        self._entries = None
+        self._keys = None
+        self._parsed_obj_paths = None
 
-        elif self.type in paths:
-            # Element type exists in the list, check if the current type is in the traversal list.
-            # if not, append it to the list.
-            if self.traversal_list_str not in paths[self.type]:
-                paths[self.type].append(self.traversal_list_str)
+        # (symbol table, entry IDs, key IDs): the ID arrays are only valid with the table that assigned the IDs
+        self._ids = None
 
-        # Iterate through the children, gathering their paths
-        for child in self.children:
-            paths = child.build_element_paths_dict(paths=paths)
+    @property
+    def leaves(self) -> typing.Tuple[BaseElement, ...]:
+        """
+        Leaf elements of the element (see collect_leaves)
 
-        return paths
+        :return: Tuple of leaf elements (document order)
+        """
+        if self._leaves is None:
+            self._leaves = self.collect_leaves(self._element)
+        return self._leaves
+
+    @property
+    def obj_paths(self) -> typing.FrozenSet[str]:
+        """
+        Set of the leaves' obj_path strings
+
+        :return: frozenset of obj_paths
+        """
+        if self._obj_paths is None:
+            self._obj_paths = frozenset(leaf.obj_path_str for leaf in self.leaves)
+        return self._obj_paths
+
+    @property
+    def entries(self) -> typing.FrozenSet[str]:
+        """
+        Set of unique traversal_path + single leaf data:value entries (see expand_obj_paths)
+
+        :return: frozenset of entries
+        """
+        if self._entries is None:
+            self._entries = self.expand_obj_paths(self.obj_paths)
+        return self._entries
+
+    @property
+    def keys(self) -> typing.FrozenSet[str]:
+        """
+        Set of unique traversal_path + leaf data keys (entries without the data values)
+
+        :return: frozenset of keys
+        """
+        if self._keys is None:
+            self._keys = frozenset(self.entry_key(entry) for entry in self.entries)
+        return self._keys
+
+    @property
+    def parsed_obj_paths(self) -> typing.Dict[str, typing.Tuple[str, typing.Tuple[typing.Tuple[str, str], ...]]]:
+        """
+        Each leaf obj_path split into the traversal path and the (key, value) tuples of the leaf data.
+
+        :return: Dictionary of obj_path: (traversal_path, ((key, value), ...))
+        """
+        if self._parsed_obj_paths is None:
+            self._parsed_obj_paths = {}
+            for obj_path in self.obj_paths:
+                path, *entries = obj_path.split(BaseElement.OBJ_PATH_DELIMITER)
+                self._parsed_obj_paths[obj_path] = (path, tuple(
+                    (key, value) for key, _, value in
+                    [entry.partition(BaseElement.ENTRY_DELIMITER) for entry in entries]))
+        return self._parsed_obj_paths
+
+    def entry_ids(self, symbols: SymbolTable) -> array:
+        """
+        Entries (see entries) as a sorted array of IDs
+
+        :param symbols: Symbol table of the run
+
+        :return: array('I') of entry IDs (ascending)
+        """
+        return self._intern(symbols)[1]
+
+    def key_ids(self, symbols: SymbolTable) -> array:
+        """
+        Keys (see keys) as a sorted array of IDs
+
+        :param symbols: Symbol table of the run
+
+        :return: array('I') of key IDs (ascending)
+        """
+        return self._intern(symbols)[2]
+
+    def _intern(self, symbols: SymbolTable) -> typing.Tuple[SymbolTable, array, array]:
+        """
+        Intern the entries and keys (built from the obj_paths; the entry strings are not retained). IDs already
+        assigned by the table, or by one of its bases (overlay table, see SymbolTable base), are reused.
+
+        :param symbols: Symbol table of the run
+
+        :return: Tuple of (symbol table, entry IDs, key IDs)
+        """
+        ids = self._ids
+        if ids is None or not symbols.shares_ids(ids[0]):
+            entry_ids = set()
+            key_ids = set()
+            for entry in self.iter_entries(self.obj_paths):
+                entry_id = symbols.intern(entry)
+                if entry_id not in entry_ids:
+                    entry_ids.add(entry_id)
+                    key_ids.add(symbols.key_id(entry_id, entry=entry, key=self.entry_key))
+            ids = self._ids = (symbols, SymbolTable.id_array(entry_ids), SymbolTable.id_array(key_ids))
+        return ids
+
+    @classmethod
+    def intern_tree(cls, root: BaseElement, symbols: SymbolTable, element_types: typing.Collection[str]) -> int:
+        """
+        Intern the entries and keys of all the elements of the requested types of a model at once. Elements whose
+        subtree contains other requested elements (nested requested types, e.g. PARTY and INDIVIDUAL) are interned
+        in a single pass over the subtree (see _intern_nested), so the leaves they share are expanded and interned
+        once; the other elements are interned individually (see entry_ids).
+
+        :param root: Root element of a model (path_dict/path_index built, see BaseElement.build_indexes)
+        :param symbols: Symbol table of the run
+        :param element_types: Element types (tags) to intern
+
+        :return: Number of requested elements
+        """
+        delimiter = BaseElement.XPATH_DELIMITER
+        paths = [path for element_type in element_types for path in root.path_dict.get(element_type, ())]
+        num_elements = 0
+        for path in paths:
+
+            # Elements below another requested path are interned with the topmost requested element
+            if any(path.startswith(other + delimiter) for other in paths):
+                num_elements += len(root.path_index.get(path, ()))
+                continue
+
+            nested = any(other.startswith(path + delimiter) for other in paths)
+            for element in root.path_index.get(path, ()):
+                if nested:
+                    cls._intern_nested(element=element, symbols=symbols, element_types=element_types)
+                else:
+                    element.leaf_sets.entry_ids(symbols)
+                num_elements += 1
+        return num_elements
+
+    @classmethod
+    def _intern_nested(cls, element: BaseElement, symbols: SymbolTable,
+                       element_types: typing.Collection[str]) -> typing.NoReturn:
+        """
+        Intern the entries and keys of an element and of the requested elements below it in a single depth-first
+        pass. obj_paths are absolute, so the entries (keys) of an element are the union of its leaves' entries
+        (keys): each leaf is expanded and interned once, and its IDs are added to the ID sets of all its requested
+        ancestors. Subtrees already interned with the symbol table (or its bases) are not visited again.
+
+        :param element: Topmost requested element
+        :param symbols: Symbol table of the run
+        :param element_types: Element types (tags) whose entry and key IDs are stored (see entry_ids, key_ids)
+
+        :return: None
+        """
+        # Requested elements and their ID sets: (element, entry IDs, key IDs)
+        targets = []
+
+        # Each stacked element carries the ID sets of its requested ancestors
+        stack = [(element, ())]
+        while stack:
+            node, ancestor_sets = stack.pop()
+            ids = node._leaf_sets._ids if node._leaf_sets is not None else None
+            if ids is not None and symbols.shares_ids(ids[0]):
+                for entry_ids, key_ids in ancestor_sets:
+                    entry_ids.update(ids[1])
+                    key_ids.update(ids[2])
+                continue
+
+            if node is element or node.type in element_types:
+                target = (node, set(), set())
+                targets.append(target)
+                ancestor_sets += (target[1:], )
+
+            if node.children:
+                stack.extend((child, ancestor_sets) for child in node.children)
+                continue
+
+            leaf_entry_ids = []
+            leaf_key_ids = []
+            for entry in cls.iter_entries((node.obj_path_str, )):
+                entry_id = symbols.intern(entry)
+                leaf_entry_ids.append(entry_id)
+                leaf_key_ids.append(symbols.key_id(entry_id, entry=entry, key=cls.entry_key))
+            for entry_ids, key_ids in ancestor_sets:
+                entry_ids.update(leaf_entry_ids)
+                key_ids.update(leaf_key_ids)
+
+        for node, entry_ids, key_ids in targets:
+            node.leaf_sets._ids = (symbols, SymbolTable.id_array(entry_ids), SymbolTable.id_array(key_ids))
+
+    @staticmethod
+    def collect_leaves(element: BaseElement) -> typing.Tuple[BaseElement, ...]:
+        """
+        Gets all leaf nodes below the provided element (depth first, in document order).
+        (Leaf = node without children)
+
+        :param element: Specific node to use to start checking for leaf nodes (self + descendants)
+
+        :return: Tuple of leaf nodes
+        """
+        leaves = []
+        stack = [element]
+        while stack:
+            node = stack.pop()
+            if node.children:
+                stack.extend(reversed(node.children))
+            else:
+                leaves.append(node)
+        return tuple(leaves)
+
+    @staticmethod
+    def expand_obj_paths(obj_paths: typing.Iterable[str]) -> typing.FrozenSet[str]:
+        """
+        BaseElement obj_paths contain the traversal_path and all leaf data:value nodes.
+        For a better comparison, break the obj_path into individual traversal_path + single leaf
+        data:value node entities.
+
+        :param obj_paths: Leaf obj_path strings
+
+        :return: Set of unique traversal_path + single leaf data:value node entities.
+        """
+        return frozenset(LeafSets.iter_entries(obj_paths))
+
+    @staticmethod
+    def iter_entries(obj_paths: typing.Iterable[str]) -> typing.Iterator[str]:
+        """
+        Expanded entries of the obj_paths (see expand_obj_paths), as they are built (duplicates are not removed)
+
+        :param obj_paths: Leaf obj_path strings
+
+        :return: Iterator of traversal_path + single leaf data:value node entities.
+        """
+        # Break each traversal_path|[entity_key:value] into individual path|entity:value strings
+        for path in obj_paths:
+
+            # If the traversal_path has attribute
+            if BaseElement.OBJ_PATH_DELIMITER in path:
+                current_path, *parts = path.split(BaseElement.OBJ_PATH_DELIMITER)
+                for entity in parts:
+                    yield BaseElement.OBJ_PATH_DELIMITER.join([current_path, entity])
+            else:
+                yield path
+
+    @staticmethod
+    def entry_key(entry: str) -> str:
+        """
+        Remove the data value from an expanded entry: traversal_path|key:value --> traversal_path|key
+        (Entries without leaf data are returned unchanged)
+
+        :param entry: Expanded entry
+
+        :return: String of traversal_path|entity_key
+        """
+        path_segment, delimiter, entity = entry.partition(BaseElement.OBJ_PATH_DELIMITER)
+        if not delimiter:
+            return entry
+        return BaseElement.OBJ_PATH_DELIMITER.join([path_segment, entity.split(BaseElement.ENTRY_DELIMITER)[0]])
@@ -0,0 +1,356 @@
+"""
+    Builds the BaseElement model directly from XML parser events (expat or lxml), without materializing the
+    intermediate xmltodict OrderedDict structure.
+
+    The resulting model is identical to BaseElement(data=xmltodict.parse(xml, dict_constructor=OrderedDict)):
+      * Elements without XML attributes or child elements are leaf values, and are stored as "<tag>:<value>"
+        attributes of the parent element.
+      * All other elements are BaseElements. Repeated sibling tags are indexed (ELEMENT[0], ELEMENT[1], ...) and
+        are ordered by the first appearance of the tag within the parent.
+      * The root element is wrapped in a container element of the same type (mirrors xmltodict's
+        {root_tag: root_data} structure), so all xpaths start with '//<root_tag>'.
+
+"""
+import gc
+import sys
+import os
+import typing
+from xml.parsers import expat
+
+from models.element_base_model import BaseElement
+from models.urla_xml_keys import UrlaXmlKeys
+from utils.profiler import Profiler
+
+try:
+    from lxml import etree
+    lxml_available = True
+except ModuleNotFoundError:
+    lxml_available = False
+
+
+class _ElementFrame:
+    """
+    Accumulates the content of an open XML element until the corresponding closing tag is parsed.
+    """
+    __slots__ = ('tag', 'name', 'has_xml_attributes', 'text', 'entries')
+
+    def __init__(self, tag: typing.Optional[str], attributes: typing.Dict[str, str]) -> typing.NoReturn:
+        """
+        :param tag: Element tag (None for the document container)
+        :param attributes: XML attributes of the element (tag: value)
+
+        """
+        self.tag = tag
+        self.name = attributes.get(ElementEventHandler.NAME_ATTRIBUTE)
+        self.has_xml_attributes = bool(attributes)
+        self.text = []
+
+        # Key: child tag, Value: list of child entries (BaseElements or leaf values) in document order.
+        # Dictionary insertion order = order of first appearance of each tag (same as xmltodict).
+        self.entries = {}
+
+    def add_entry(self, tag: str, entry: typing.Union[BaseElement, str, None]) -> typing.NoReturn:
+        """
+        Record a closed child element (BaseElement) or leaf value (str or None)
+
+        :param tag: Child tag
+        :param entry: BaseElement or leaf value
+
+        :return: None
+        """
+        if tag in self.entries:
+            self.entries[tag].append(entry)
+        else:
+            self.entries[tag] = [entry]
+
+    def build_element(self, text: typing.Optional[str]) -> BaseElement:
+        """
+        Build the BaseElement for the (now closed) element.
+
+        :param text: Stripped text of the element (None if no text)
+
+        :return: BaseElement (without parent; see BaseElement.finalize)
+        """
+        attributes = []
+        children = []
+        for tag, entries in self.entries.items():
+            indexed = len(entries) > 1
+            for index, entry in enumerate(entries):
+                if isinstance(entry, BaseElement):
+                    entry.index = index if indexed else None
+                    children.append(entry)
+                else:
+                    attributes.append(f"{tag}{BaseElement.ENTRY_DELIMITER}{entry}")
+
+        if text is not None:
+            attributes.append(f"{UrlaXmlKeys.TEXT_KEY}{BaseElement.ENTRY_DELIMITER}{text}")
+
+        # Attribute entries repeat across elements (e.g. 'StateCode:DC'), so a single copy of each is shared.
+        return BaseElement.from_parsed(element_type=self.tag, attributes=sorted(map(sys.intern, attributes)),
+                                       children=children, name=self.name)
+
+
+class ElementEventHandler:
+    """
+    Parser event target: start(tag, attributes), data(text), end(tag), close().
+    Elements are converted to BaseElements as soon as they are closed, so only the open elements (the current
+    branch of the document) are held as intermediate data.
+    """
+
+    # xlink:label (without the xmltodict attribute prefix)
+    NAME_ATTRIBUTE = UrlaXmlKeys.XLINK_LABEL[len(UrlaXmlKeys.ATTR_PREFIX):]
+
+    def __init__(self) -> typing.NoReturn:
+        self._stack = [_ElementFrame(tag=None, attributes={})]
+
+    def start(self, tag: str, attributes: typing.Dict[str, str]) -> typing.NoReturn:
+        """
+        Open a new element
+
+        :param tag: Element tag
+        :param attributes: Dictionary of XML attributes
+
+        :return: None
+        """
+        self._stack.append(_ElementFrame(tag=tag, attributes=attributes))
+
+    def data(self, text: str) -> typing.NoReturn:
+        """
+        Record character data for the current element
+
+        :param text: Character data
+
+        :return: None
+        """
+        self._stack[-1].text.append(text)
+
+    def end(self, tag: str = None) -> typing.NoReturn:
+        """
+        Close the current element: build a BaseElement (element has XML attributes and/or child elements) or
+        a leaf value, and record it in the parent element.
+
+        :param tag: Element tag (not used, the tag is tracked by the frame)
+
+        :return: None
+        """
+        frame = self._stack.pop()
+        text = ''.join(frame.text).strip() or None
+
+        if frame.entries or frame.has_xml_attributes:
+            entry = frame.build_element(text=text)
+        else:
+            entry = text
+        self._stack[-1].add_entry(frame.tag, entry)
+
+    def close(self) -> BaseElement:
+        """
+        Finish the document and return the root of the model
+
+        :return: Root BaseElement (with the path dictionary built)
+        """
+        if len(self._stack) != 1 or not self._stack[0].entries:
+            raise ValueError("XML document is incomplete: the root element was not closed.")
+
+        document = self._stack.pop()
+        document.tag = next(iter(document.entries))
+        with Profiler.phase("model build"):
+            return document.build_element(text=None).finalize()
+
+
+class ElementLoader:
+    """
+    Reads an XML file and builds the BaseElement model from the parser events.
+
+    Backends:
+      * expat: Python standard library (default, always available)
+      * lxml: Optional, only available if lxml is installed.
+    """
+
+    EXPAT = 'expat'
+    LXML = 'lxml'
+    BACKENDS = (EXPAT, LXML)
+
+    NAMESPACE_SEPARATOR = ':'
+    XMLNS = 'xmlns'
+    READ_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, backend: str = EXPAT) -> typing.NoReturn:
+        """
+        :param backend: Parser backend to use (see BACKENDS)
+
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown XML parser backend: '{backend}'. Available: {', '.join(self.BACKENDS)}")
+
+        if backend == self.LXML and not lxml_available:
+            raise ModuleNotFoundError("The 'lxml' parser backend was requested, but lxml is not installed.")
+
+        self.backend = backend
+
+    def load(self, file_spec: str) -> BaseElement:
+        """
+        Parse the XML file and build the BaseElement model
+
+        :param file_spec: filespec of the input XML file.
+
+        :return: Root BaseElement of the model
+        """
+        if not os.path.exists(file_spec):
+            raise FileNotFoundError(f"XML Source file ('{file_spec}') was not found.")
+
+        # The model is a large graph of long-lived objects: suspend the cyclic garbage collector while it is
+        # built, otherwise each generational collection re-scans the growing tree.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            handler = ElementEventHandler()
+            if self.backend == self.LXML:
+                self._parse_with_lxml(file_spec=file_spec, handler=handler)
+            else:
+                self._parse_with_expat(file_spec=file_spec, handler=handler)
+            return handler.close()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _parse_with_expat(self, file_spec: str, handler: ElementEventHandler) -> typing.NoReturn:
+        """
+        Stream the file through the expat parser (no namespace processing; tags keep their prefixes, same
+        as xmltodict).
+
+        :param file_spec: filespec of the input XML file.
+        :param handler: Event handler that builds the model
+
+        :return: None
+        """
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.buffer_size = self.READ_BUFFER_SIZE
+        parser.StartElementHandler = handler.start
+        parser.EndElementHandler = handler.end
+        parser.CharacterDataHandler = handler.data
+
+        # (The elements are built by the handler as they are parsed: the parse phase includes building the
+        # elements, the model build phase links them and builds the path dictionary.)
+        with open(file_spec, "rb") as XML:
+            while True:
+                with Profiler.phase("read", accumulate=True):
+                    chunk = XML.read(self.READ_BUFFER_SIZE)
+                if not chunk:
+                    break
+                with Profiler.phase("parse", accumulate=True):
+                    parser.Parse(chunk, False)
+        with Profiler.phase("parse", accumulate=True):
+            parser.Parse(b'', True)
+
+    def _parse_with_lxml(self, file_spec: str, handler: ElementEventHandler) -> typing.NoReturn:
+        """
+        Stream the file through an lxml parser target (no lxml tree is built).
+
+        :param file_spec: filespec of the input XML file.
+        :param handler: Event handler that builds the model
+
+        :return: None
+        """
+        parser = etree.XMLParser(target=_LxmlTarget(handler=handler), remove_comments=True, remove_pis=True,
+                                 resolve_entities=False, huge_tree=True)
+        with open(file_spec, "rb") as XML:
+            while True:
+                with Profiler.phase("read", accumulate=True):
+                    chunk = XML.read(self.READ_BUFFER_SIZE)
+                if not chunk:
+                    break
+                with Profiler.phase("parse", accumulate=True):
+                    parser.feed(chunk)
+        with Profiler.phase("parse", accumulate=True):
+            parser.close()
+
+
+class _LxmlTarget:
+    """
+    lxml parser target that forwards the events to the ElementEventHandler. lxml resolves namespaces
+    ('{uri}local'), so tags and attribute names are translated back to the prefixed names used in the document
+    (same names as reported by expat/xmltodict).
+    """
+
+    def __init__(self, handler: ElementEventHandler) -> typing.NoReturn:
+        """
+        :param handler: Event handler that builds the model
+
+        """
+        self.handler = handler
+        self.data = handler.data
+        self._prefixes = {}
+        self._names = {}
+        self._declarations = {}
+
+    def start_ns(self, prefix: str, uri: str) -> typing.NoReturn:
+        """
+        Record a namespace declaration (applies to the next element)
+
+        :param prefix: Namespace prefix ('' = default namespace)
+        :param uri: Namespace URI
+
+        :return: None
+        """
+        self._prefixes[uri] = prefix
+        self._names.clear()
+        xmlns = (ElementLoader.NAMESPACE_SEPARATOR.join([ElementLoader.XMLNS, prefix]) if prefix else
+                 ElementLoader.XMLNS)
+        self._declarations[xmlns] = uri
+
+    def start(self, tag: str, attrib: typing.Dict[str, str]) -> typing.NoReturn:
+        """
+        Open a new element
+
+        :param tag: lxml element tag
+        :param attrib: lxml attributes
+
+        :return: None
+        """
+        # Namespace declarations are reported as XML attributes by expat/xmltodict, but not by lxml.
+        attributes = self._declarations
+        if attributes:
+            self._declarations = {}
+        else:
+            attributes = {}
+
+        for key, value in attrib.items():
+            attributes[self._prefixed_name(key)] = value
+        self.handler.start(self._prefixed_name(tag), attributes)
+
+    def end(self, tag: str) -> typing.NoReturn:
+        """
+        Close the current element
+
+        :param tag: lxml element tag
+
+        :return: None
+        """
+        self.handler.end()
+
+    def close(self) -> typing.NoReturn:
+        """
+        End of document (model is retrieved from the handler)
+
+        :return: None
+        """
+        return None
+
+    def _prefixed_name(self, name: str) -> str:
+        """
+        Translate an lxml qualified name ('{uri}local') to the prefixed name used in the document
+
+        :param name: lxml name
+
+        :return: prefix:local (or local if default/no namespace)
+        """
+        prefixed = self._names.get(name)
+        if prefixed is None:
+            prefixed = name
+            if name.startswith('{'):
+                uri, local = name[1:].split('}', 1)
+                prefix = self._prefixes.get(uri)
+                prefixed = f"{prefix}{ElementLoader.NAMESPACE_SEPARATOR}{local}" if prefix else local
+            self._names[name] = prefixed
+        return prefixed
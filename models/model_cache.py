@@ -0,0 +1,226 @@
+"""
+    Persistent on-disk cache of BaseElement models.
+
+    Entries are keyed by the SHA-256 of the XML file bytes plus the model format version, so a modified file (or a
+    change to the model layout) never returns a stale model. Each entry is a compact, flat serialization of the tree
+    (one tuple per element, post-order), which rebuilds the model without parsing the XML. The cache size is
+    bounded: the least recently used entries are evicted.
+
+    The entries are written with marshal (plain data: strings, integers, tuples), never with pickle, so loading
+    an entry from the cache directory cannot execute code. Unreadable or malformed entries are discarded.
+
+"""
+import gc
+import hashlib
+import marshal
+import os
+import tempfile
+import typing
+
+from logger.logging import Logger
+from models.element_base_model import BaseElement
+
+
+log = Logger()
+
+
+class ModelCache:
+    """
+    Directory of cached models (one file per model). Cache failures (unreadable, corrupt or unwritable entries)
+    are not fatal: the model is built from the XML file instead.
+    """
+
+    # Increment when the BaseElement model or the serialized layout changes (invalidates all existing entries).
+    MODEL_FORMAT_VERSION = 3
+
+    DEFAULT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'XMLComparison')
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+    CACHE_EXT = 'model'
+    READ_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, cache_dir: str = DEFAULT_DIR, max_size: int = DEFAULT_MAX_SIZE) -> typing.NoReturn:
+        """
+        :param cache_dir: Directory of the cached models (created if needed)
+        :param max_size: Maximum total size (bytes) of the cached models
+
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def key(self, file_spec: str) -> str:
+        """
+        Build the cache key of an XML file: SHA-256 of the file bytes + model format version
+
+        :param file_spec: filespec of the XML file
+
+        :return: Cache key (str)
+        """
+        digest = hashlib.sha256()
+        with open(file_spec, "rb") as XML:
+            for chunk in iter(lambda: XML.read(self.READ_BUFFER_SIZE), b''):
+                digest.update(chunk)
+        return f"{digest.hexdigest()}-v{self.MODEL_FORMAT_VERSION}"
+
+    def _entry_path(self, key: str) -> str:
+        """
+        Filespec of the cache entry for the key
+
+        :param key: Cache key
+
+        :return: filespec
+        """
+        return os.path.join(self.cache_dir, f"{key}.{self.CACHE_EXT}")
+
+    def load(self, key: str) -> typing.Optional[BaseElement]:
+        """
+        Load a cached model. A hit refreshes the entry's LRU timestamp.
+
+        :param key: Cache key (see key())
+
+        :return: Root BaseElement of the model, or None if the model is not cached (or the entry is unusable)
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as ENTRY:
+                records = marshal.load(ENTRY)
+            model = self.deserialize(records)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as exc:
+            log.info("Discarding model cache entry '%s': %s: %s", entry_path, exc.__class__.__name__, exc)
+            self._remove(entry_path)
+            return None
+
+        self._touch(entry_path)
+        return model
+
+    def store(self, key: str, model: BaseElement) -> typing.NoReturn:
+        """
+        Add a model to the cache (written atomically), then evict the least recently used entries if the cache
+        exceeds the maximum size.
+
+        :param key: Cache key (see key())
+        :param model: Root BaseElement of the model
+
+        :return: None
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(handle, "wb") as ENTRY:
+                marshal.dump(self.serialize(model), ENTRY)
+            os.replace(temp_path, self._entry_path(key))
+        except OSError:
+            self._remove(temp_path)
+            return
+
+        self.evict()
+
+    def evict(self) -> typing.NoReturn:
+        """
+        Remove the least recently used entries until the total size of the cache is within the maximum size.
+
+        :return: None
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(f".{self.CACHE_EXT}"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(entry_path)
+            total_size -= size
+
+    @staticmethod
+    def serialize(model: BaseElement) -> typing.List[tuple]:
+        """
+        Flatten the model: one (type, name, index, attributes, number of children) tuple per element, in post-order
+        (children before their parent).
+
+        :param model: Root BaseElement of the model
+
+        :return: List of tuples
+        """
+        records = []
+        stack = [(model, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                records.append((node.type, node.name, node.index, node.attributes, len(node.children)))
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+        return records
+
+    @staticmethod
+    def deserialize(records: typing.List[tuple]) -> BaseElement:
+        """
+        Rebuild the model from the flattened tuples (see serialize).
+
+        :param records: List of tuples
+
+        :return: Root BaseElement of the model (with the path dictionary built)
+
+        :raises ValueError, TypeError: The records are not a serialized model
+        """
+        # Same as parsing: suspend the cyclic garbage collector while the (long-lived) tree is built.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            built = []
+            for element_type, name, index, attributes, num_children in records:
+                if num_children > len(built):
+                    raise ValueError(f"'{element_type}' has {num_children} children, {len(built)} elements built")
+                children = built[len(built) - num_children:] if num_children else []
+                if num_children:
+                    del built[len(built) - num_children:]
+
+                element = BaseElement.from_parsed(element_type=element_type, attributes=attributes,
+                                                  children=children, name=name)
+                element.index = index
+                built.append(element)
+
+            root, = built
+            return root.finalize()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    @staticmethod
+    def _touch(entry_path: str) -> typing.NoReturn:
+        """
+        Mark an entry as used (LRU order = modification time)
+
+        :param entry_path: filespec of the entry
+
+        :return: None
+        """
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(entry_path: str) -> typing.NoReturn:
+        """
+        Remove an entry (ignore entries that were already removed, e.g. by another process)
+
+        :param entry_path: filespec of the entry
+
+        :return: None
+        """
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
@@ -0,0 +1,227 @@
+"""
+    Integer interning of the expanded leaf entries (traversal_path|key:value) and their keys (traversal_path|key).
+
+    A symbol table is shared by the models compared in a run (see ComparisonEngine symbols): each distinct entry
+    or key gets an integer ID, so a node's leaf data is stored as a sorted array of IDs (see LeafSets.entry_ids)
+    and the set operations of the comparison (equality, intersection size, union size) work on integers rather
+    than on the (long) entry strings.
+
+    An overlay table (see SymbolTable base) resolves the symbols of its base table to the base IDs, and interns
+    the other symbols itself: e.g. in batch mode, the expected model's table is shared by all the files, and each
+    actual file gets an overlay that is dropped (with the file's distinct entries) once the file is compared.
+
+    Uses NumPy for the intersection of large ID arrays when it is installed.
+
+"""
+from array import array
+import itertools
+import typing
+import zlib
+
+try:
+    import numpy
+    numpy_available = True
+except ModuleNotFoundError:
+    numpy_available = False
+
+
+class SymbolTable:
+    """
+    Symbol (str) <--> integer ID table. IDs are assigned in order of first use; they are only meaningful within
+    the table (and the process) that assigned them, and within the overlays of the table.
+    """
+
+    # Array type code of the ID arrays (unsigned int)
+    ID_TYPE = 'I'
+
+    # Smallest array size for which the intersection is computed with NumPy (set intersection below)
+    NUMPY_MIN_SIZE = 256
+
+    def __init__(self, base: typing.Optional["SymbolTable"] = None) -> typing.NoReturn:
+        """
+        :param base: Table whose symbols (and IDs) are used first: this table only interns the symbols missing from
+                     the base (overlay). The base is only read: it must not intern new symbols while it has overlays.
+
+        """
+        self.base = base
+
+        # Key: Symbol, Value: ID. IDs come from a counter, so concurrent threads never assign the same ID twice.
+        # The IDs of an overlay follow the IDs of its base.
+        self._ids = {}
+        self._counter = itertools.count(base.id_limit() if base is not None else 0)
+
+        # Key: Entry ID, Value: ID of the entry's key (see key_id)
+        self._key_ids = {}
+
+        # Key: ID, Value: CRC-32 of the symbol (see content_hashes)
+        self._hashes = {}
+
+    def __len__(self) -> int:
+        return len(self._ids) + (len(self.base) if self.base is not None else 0)
+
+    def overlay(self) -> "SymbolTable":
+        """
+        Create an overlay of this table (see base)
+
+        :return: SymbolTable
+        """
+        return SymbolTable(base=self)
+
+    def shares_ids(self, table: "SymbolTable") -> bool:
+        """
+        Are the IDs assigned by a table valid in this table (the same table, or one of the bases of this table)?
+
+        :param table: Symbol table
+
+        :return: bool
+        """
+        return table is self or (self.base is not None and self.base.shares_ids(table))
+
+    def id_limit(self) -> int:
+        """
+        Smallest ID above all the IDs assigned by this table (and its bases)
+
+        :return: (int) ID
+        """
+        limit = self.base.id_limit() if self.base is not None else 0
+        return max(limit, max(self._ids.values(), default=-1) + 1)
+
+    def lookup(self, symbol: str) -> typing.Optional[int]:
+        """
+        Get the ID of a symbol, without interning it
+
+        :param symbol: Symbol (entry or key)
+
+        :return: (int) ID, or None if the symbol is not interned (in this table or its bases)
+        """
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is None and self.base is not None:
+            symbol_id = self.base.lookup(symbol)
+        return symbol_id
+
+    def intern(self, symbol: str) -> int:
+        """
+        Get the ID of a symbol (assigned on first use)
+
+        :param symbol: Symbol (entry or key)
+
+        :return: (int) ID
+        """
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is None:
+            if self.base is not None:
+                symbol_id = self.base.lookup(symbol)
+                if symbol_id is not None:
+                    return symbol_id
+            symbol_id = self._ids.setdefault(symbol, next(self._counter))
+            self._hashes.setdefault(symbol_id, zlib.crc32(symbol.encode()))
+        return symbol_id
+
+    def key_id(self, entry_id: int, entry: str, key: typing.Callable[[str], str]) -> int:
+        """
+        Get the ID of an entry's key (entry without the data value); the key is derived once per entry.
+
+        :param entry_id: Entry ID
+        :param entry: Entry
+        :param key: Function deriving the key from the entry (e.g. LeafSets.entry_key)
+
+        :return: (int) ID of the key
+        """
+        key_id = self._key_ids.get(entry_id)
+        if key_id is None and self.base is not None:
+            key_id = self.base._known_key_id(entry_id)
+        if key_id is None:
+            key_id = self._key_ids.setdefault(entry_id, self.intern(key(entry)))
+        return key_id
+
+    def _known_key_id(self, entry_id: int) -> typing.Optional[int]:
+        """
+        Get the key ID of an entry ID, without deriving it (see key_id)
+
+        :param entry_id: Entry ID
+
+        :return: (int) ID of the key, or None if it was not derived (by this table or its bases)
+        """
+        key_id = self._key_ids.get(entry_id)
+        if key_id is None and self.base is not None:
+            key_id = self.base._known_key_id(entry_id)
+        return key_id
+
+    def content_hashes(self, symbol_ids: typing.Iterable[int]) -> array:
+        """
+        Get the CRC-32 of the symbols of a list of IDs: unlike the IDs, which depend on the order the symbols were
+        interned in, the hashes are the same in every run (e.g. reproducible MinHash signatures).
+
+        :param symbol_ids: IDs
+
+        :return: array('I') of hashes (same order as the IDs)
+        """
+        if self.base is None:
+            return array(self.ID_TYPE, map(self._hashes.__getitem__, symbol_ids))
+        return array(self.ID_TYPE, map(self._content_hash, symbol_ids))
+
+    def _content_hash(self, symbol_id: int) -> int:
+        """
+        Get the CRC-32 of a symbol (see content_hashes) interned by this table or by its bases
+
+        :param symbol_id: ID
+
+        :return: (int) CRC-32
+        """
+        symbol_hash = self._hashes.get(symbol_id)
+        if symbol_hash is None:
+            return self.base._content_hash(symbol_id)
+        return symbol_hash
+
+    def symbols(self, symbol_ids: typing.Iterable[int]) -> typing.List[str]:
+        """
+        Get the symbols of a list of IDs (debug output)
+
+        :param symbol_ids: IDs
+
+        :return: Sorted list of symbols
+        """
+        wanted = set(symbol_ids)
+        found = self.base.symbols(wanted) if self.base is not None else []
+        return sorted(found + [symbol for symbol, symbol_id in self._ids.items() if symbol_id in wanted])
+
+    @classmethod
+    def id_array(cls, symbol_ids: typing.Iterable[int]) -> array:
+        """
+        Build the compact, sorted array of unique IDs
+
+        :param symbol_ids: IDs (duplicates allowed)
+
+        :return: array('I') of IDs (ascending)
+        """
+        return array(cls.ID_TYPE, sorted(set(symbol_ids)))
+
+    @classmethod
+    def intersection_size(cls, ids_1: array, ids_2: array) -> int:
+        """
+        Number of IDs found in both arrays
+
+        :param ids_1: Sorted array of unique IDs
+        :param ids_2: Sorted array of unique IDs
+
+        :return: (int) Size of the intersection
+        """
+        if numpy_available and min(len(ids_1), len(ids_2)) >= cls.NUMPY_MIN_SIZE:
+            return int(numpy.intersect1d(numpy.frombuffer(ids_1, dtype=numpy.uint32),
+                                         numpy.frombuffer(ids_2, dtype=numpy.uint32),
+                                         assume_unique=True).size)
+        if len(ids_1) > len(ids_2):
+            ids_1, ids_2 = ids_2, ids_1
+        return len(set(ids_1).intersection(ids_2))
+
+    @classmethod
+    def union_size(cls, ids_1: array, ids_2: array) -> int:
+        """
+        Number of unique IDs of both arrays
+
+        :param ids_1: Sorted array of unique IDs
+        :param ids_2: Sorted array of unique IDs
+
+        :return: (int) Size of the union
+        """
+        return len(ids_1) + len(ids_2) - cls.intersection_size(ids_1, ids_2)
@@ -10,3 +10,5 @@ class UrlaXmlKeys:
     SEQ_NUM: str = '@SequenceNumber'
     XLINK_LABEL: str = '@xlink:label'
     LOAN_ROLE_TYPE: str = '@LoanRoleType'
+    ATTR_PREFIX: str = '@'
+    TEXT_KEY: str = '#text'
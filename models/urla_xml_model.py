@@ -4,6 +4,9 @@ import typing
 
 import xmltodict
 from models.element_base_model import BaseElement
+from models.element_loader import ElementLoader
+from models.model_cache import ModelCache
+from utils.profiler import Profiler
 
 
 class UrlaXML:
@@ -12,12 +15,99 @@ class UrlaXML:
     This class reads and converts the MISMO v3.4 XML into a complex, nested python data structure. It removes the need
     to process the XML, and allows the user to quickly access the various data elements within the XML.
 
+    The BaseElement model is built directly from the XML parser events (see models.element_loader). The xmltodict
+    OrderedDict representation (data) is only built if requested, or if the legacy 'xmltodict' parser is selected.
+
+    If a model cache is provided, the model is loaded from the cache when the file content was already parsed
+    (see models.model_cache), and added to the cache otherwise. The cache is not used with the 'xmltodict' parser:
+    the legacy conversion is always run (the cache key does not depend on the parser).
+
     """
-    def __init__(self, data_file_name: str, is_primary_source: bool = False) -> typing.NoReturn:
+    XMLTODICT = 'xmltodict'
+    PARSERS = ElementLoader.BACKENDS + (XMLTODICT, )
+
+    def __init__(self, data_file_name: str, is_primary_source: bool = False,
+                 parser: str = ElementLoader.EXPAT, cache: typing.Optional[ModelCache] = None) -> typing.NoReturn:
+        """
+        :param data_file_name: filespec of the input XML file.
+        :param is_primary_source: (bool) Primary (actual) file? Otherwise comparison (expected) file.
+        :param parser: XML parser used to build the model (see PARSERS)
+        :param cache: Model cache (None = always build the model from the XML file)
+
+        """
+        if parser not in self.PARSERS:
+            raise ValueError(f"Unknown XML parser: '{parser}'. Available: {', '.join(self.PARSERS)}")
+
         self.data_file_name = data_file_name
         self.is_primary_source = is_primary_source
-        self.data = self.convert_xml_to_dict(data_file_name)
-        self.model = BaseElement(data=self.data)
+        self.parser = parser
+        self.cache = cache
+        self._data = None
+        self.model = self.build_model(data_file_name)
+
+    @property
+    def data(self) -> OrderedDict:
+        """
+        xmltodict (OrderedDict) representation of the XML. Built on first access, since it is not required
+        to build the model.
+
+        :return: OrderedDict representation of the XML.
+        """
+        if self._data is None:
+            self._data = self.convert_xml_to_dict(self.data_file_name)
+        return self._data
+
+    def build_model(self, file_spec: str) -> BaseElement:
+        """
+        Read the XML and build the BaseElement model.
+        :param file_spec: filespec of the input XML file.
+        :return: Root BaseElement of the model
+        """
+        with Profiler.phase("load model", label=os.path.basename(file_spec)):
+            model = self._load_model(file_spec)
+            if Profiler.memory:
+                Profiler.count(**{Profiler.NODES: model.node_count()})
+            return model
+
+    def _load_model(self, file_spec: str) -> BaseElement:
+        """
+        Load the model from the cache, or build the model from the XML file (see build_model).
+        :param file_spec: filespec of the input XML file.
+        :return: Root BaseElement of the model
+        """
+        if self.cache is None or self.parser == self.XMLTODICT:
+            return self._build_model_from_file(file_spec)
+
+        if not os.path.exists(file_spec):
+            raise FileNotFoundError(f"XML Source file ('{file_spec}') was not found.")
+
+        with Profiler.phase("cache lookup"):
+            key = self.cache.key(file_spec)
+            model = self.cache.load(key)
+        if model is not None:
+            file_type = "primary" if self.is_primary_source else "comparison"
+            print(f"Loaded cached model for {file_type} file: '{os.path.abspath(file_spec)}'")
+            return model
+
+        model = self._build_model_from_file(file_spec)
+        with Profiler.phase("cache store"):
+            self.cache.store(key, model)
+        return model
+
+    def _build_model_from_file(self, file_spec: str) -> BaseElement:
+        """
+        Read the XML (using the selected parser) and build the BaseElement model.
+        :param file_spec: filespec of the input XML file.
+        :return: Root BaseElement of the model
+        """
+        if self.parser == self.XMLTODICT:
+            data = self.data
+            with Profiler.phase("model build"):
+                return BaseElement(data=data)
+
+        file_type = "primary" if self.is_primary_source else "comparison"
+        print(f"Reading {file_type} file: '{os.path.abspath(file_spec)}'")
+        return ElementLoader(backend=self.parser).load(file_spec)
 
     def read_file(self, filename: str) -> typing.List[str]:
         """
@@ -39,8 +129,10 @@ class UrlaXML:
         if not os.path.exists(file_spec):
             raise FileNotFoundError(f"XML Source file ('{file_spec}') was not found.")
 
-        file_contents = self.read_file(file_spec)
-        return xmltodict.parse("\n".join(file_contents))
+        with Profiler.phase("read"):
+            file_contents = self.read_file(file_spec)
+        with Profiler.phase("parse"):
+            return xmltodict.parse("\n".join(file_contents), dict_constructor=OrderedDict)
 
     @staticmethod
     def dump_data_to_file(outfile: str, data_dict: OrderedDict) -> typing.NoReturn:
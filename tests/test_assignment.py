@@ -0,0 +1,75 @@
+import itertools
+import random
+import unittest
+from unittest import mock
+
+from comparator import assignment
+from comparator.assignment import AssignmentSolver
+
+
+class AssignmentSolverTest(unittest.TestCase):
+    """
+    The solver finds a maximum-weight assignment: compared with brute force on small random matrices (integer
+    weights with many ties, as leaf entry counts, and float weights), with NumPy (Jonker-Volgenant) and without
+    (Hungarian).
+    """
+
+    SEED = 1
+    MATRICES = 150
+    MAX_SIZE = 6
+
+    @staticmethod
+    def _brute_force(weights: list) -> float:
+        num_rows, num_cols = len(weights), len(weights[0])
+        if num_rows <= num_cols:
+            return max(sum(weights[row][col] for row, col in enumerate(cols))
+                       for cols in itertools.permutations(range(num_cols), num_rows))
+        return max(sum(weights[row][col] for col, row in enumerate(rows))
+                   for rows in itertools.permutations(range(num_rows), num_cols))
+
+    def _random_matrices(self) -> list:
+        rnd = random.Random(self.SEED)
+        matrices = []
+        for index in range(self.MATRICES):
+            num_rows, num_cols = rnd.randint(1, self.MAX_SIZE), rnd.randint(1, self.MAX_SIZE)
+            if index % 2:
+                value = lambda: rnd.randint(0, 3)
+            else:
+                value = lambda: round(rnd.uniform(0, 10), 3)
+            matrices.append([[value() for _ in range(num_cols)] for _ in range(num_rows)])
+        return matrices
+
+    def _check_solver(self) -> None:
+        for index, weights in enumerate(self._random_matrices()):
+            with self.subTest(matrix=index, rows=len(weights), cols=len(weights[0])):
+                pairs = AssignmentSolver.solve(weights)
+
+                # One pair per row (or column, if there are fewer columns), each row/column used once
+                self.assertEqual(len(pairs), min(len(weights), len(weights[0])))
+                self.assertEqual(pairs, sorted(pairs))
+                self.assertEqual(len({row for row, _ in pairs}), len(pairs))
+                self.assertEqual(len({col for _, col in pairs}), len(pairs))
+
+                self.assertAlmostEqual(sum(weights[row][col] for row, col in pairs), self._brute_force(weights))
+
+    @unittest.skipUnless(assignment.numpy_available, "NumPy is not installed")
+    def test_numpy(self) -> None:
+        self._check_solver()
+
+    def test_python(self) -> None:
+        with mock.patch.object(assignment, "numpy_available", False):
+            self._check_solver()
+
+    def test_empty(self) -> None:
+        self.assertEqual(AssignmentSolver.solve([]), [])
+        with mock.patch.object(assignment, "numpy_available", False):
+            self.assertEqual(AssignmentSolver.solve([]), [])
+
+    def test_build_matrix(self) -> None:
+        matrix = AssignmentSolver.build_matrix(num_rows=2, num_cols=3, weights=[(0, 2, 5), (1, 0, 1.5)])
+        self.assertEqual([list(row) for row in matrix], [[0, 0, 5], [1.5, 0, 0]])
+        self.assertEqual(AssignmentSolver.solve(matrix), [(0, 2), (1, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+from comparator.comparison_engine import ComparisonEngine
+from comparator.similarity_matrix import numpy_available
+from models.urla_xml_model import UrlaXML
+
+
+class ExactMatchOrderTest(unittest.TestCase):
+    """
+    An actual node with the same leaf set as an expected node, but a different subtree structure, is an exact match.
+    It claims the expected node before a later actual node with an identical subtree.
+    """
+
+    # ASSET[0]: same leaf set as the expected ASSET (p:1, q:2), different structure. ASSET[1]: identical subtree.
+    EXPECTED = "<MESSAGE><ASSETS><ASSET><X><p>1</p></X><X><q>2</q></X></ASSET></ASSETS></MESSAGE>"
+    ACTUAL = ("<MESSAGE><ASSETS>"
+              "<ASSET><X><p>1</p><q>2</q></X><X><p>1</p></X></ASSET>"
+              "<ASSET><X><p>1</p></X><X><q>2</q></X></ASSET>"
+              "</ASSETS></MESSAGE>")
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.actual = UrlaXML(data_file_name=self._write("actual.xml", self.ACTUAL), is_primary_source=True)
+        self.expected = UrlaXML(data_file_name=self._write("expected.xml", self.EXPECTED), is_primary_source=False)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, file_name: str, xml: str) -> str:
+        file_spec = os.path.join(self.temp_dir.name, file_name)
+        with open(file_spec, "w") as XML:
+            XML.write(xml)
+        return file_spec
+
+    def _check_results(self, engine: ComparisonEngine) -> None:
+        results = engine.compare(tag_name="ASSET")
+        first, second = results["//MESSAGE/ASSETS/ASSET[0]"], results["//MESSAGE/ASSETS/ASSET[1]"]
+
+        self.assertIsNotNone(first[ComparisonEngine.MATCH])
+        self.assertEqual(first[ComparisonEngine.MATCH].xpath_str, "//MESSAGE/ASSETS/ASSET")
+        self.assertIsNone(first[ComparisonEngine.CLOSEST_OBJ])
+
+        # The only expected node is claimed by ASSET[0]: no exact or closest match is left for ASSET[1]
+        self.assertIsNone(second[ComparisonEngine.MATCH])
+        self.assertIsNone(second[ComparisonEngine.CLOSEST_OBJ])
+
+    def test_leaf_index(self) -> None:
+        for strategy in ComparisonEngine.MATCH_STRATEGIES:
+            with self.subTest(strategy=strategy):
+                self._check_results(ComparisonEngine(actual=self.actual, expected=self.expected,
+                                                     match_strategy=strategy))
+
+    @unittest.skipUnless(numpy_available, "NumPy is not installed")
+    def test_similarity_matrix(self) -> None:
+        for strategy in ComparisonEngine.MATCH_STRATEGIES:
+            with self.subTest(strategy=strategy):
+                engine = ComparisonEngine(actual=self.actual, expected=self.expected, match_strategy=strategy)
+                engine.MATRIX_MIN_PAIRS = 0
+                self._check_results(engine)
+
+
+class OptimalStrategyTest(unittest.TestCase):
+    """
+    The greedy strategy gives each node its most similar comparison node; the optimal strategy pairs the nodes one to
+    one, maximizing the total number of shared entries.
+    """
+
+    # ASSET[0] shares 3 entries with the expected ASSET[0] and 1 with ASSET[1]; ASSET[1] shares 4 and 1.
+    EXPECTED = ("<MESSAGE><ASSETS>"
+                "<ASSET><X><p>1</p><q>1</q><r>1</r><s>1</s><t>1</t></X></ASSET>"
+                "<ASSET><X><p>1</p><q>2</q><r>2</r><s>2</s><t>2</t></X></ASSET>"
+                "</ASSETS></MESSAGE>")
+    ACTUAL = ("<MESSAGE><ASSETS>"
+              "<ASSET><X><p>1</p><q>1</q><r>1</r><s>9</s><t>9</t></X></ASSET>"
+              "<ASSET><X><p>1</p><q>1</q><r>1</r><s>1</s><t>9</t></X></ASSET>"
+              "</ASSETS></MESSAGE>")
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.actual = UrlaXML(data_file_name=self._write("actual.xml", self.ACTUAL), is_primary_source=True)
+        self.expected = UrlaXML(data_file_name=self._write("expected.xml", self.EXPECTED), is_primary_source=False)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, file_name: str, xml: str) -> str:
+        file_spec = os.path.join(self.temp_dir.name, file_name)
+        with open(file_spec, "w") as XML:
+            XML.write(xml)
+        return file_spec
+
+    def _closest_matches(self, engine: ComparisonEngine) -> list:
+        results = engine.compare(tag_name="ASSET")
+        return [(data[ComparisonEngine.CLOSEST_OBJ].xpath_str, data[ComparisonEngine.CLOSEST_MATCH_COUNT])
+                for _, data in sorted(results.items())]
+
+    def _check_strategies(self, matrix_min_pairs: int) -> None:
+        engines = {strategy: ComparisonEngine(actual=self.actual, expected=self.expected, match_strategy=strategy)
+                   for strategy in ComparisonEngine.MATCH_STRATEGIES}
+        for engine in engines.values():
+            engine.MATRIX_MIN_PAIRS = matrix_min_pairs
+
+        self.assertEqual(self._closest_matches(engines[ComparisonEngine.GREEDY]),
+                         [("//MESSAGE/ASSETS/ASSET[0]", 3), ("//MESSAGE/ASSETS/ASSET[0]", 4)])
+        self.assertEqual(self._closest_matches(engines[ComparisonEngine.OPTIMAL]),
+                         [("//MESSAGE/ASSETS/ASSET[1]", 1), ("//MESSAGE/ASSETS/ASSET[0]", 4)])
+
+    def test_leaf_index(self) -> None:
+        self._check_strategies(matrix_min_pairs=ComparisonEngine.MATRIX_MIN_PAIRS)
+
+    @unittest.skipUnless(numpy_available, "NumPy is not installed")
+    def test_similarity_matrix(self) -> None:
+        self._check_strategies(matrix_min_pairs=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
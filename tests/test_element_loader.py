@@ -0,0 +1,95 @@
+import glob
+import os
+import tempfile
+import unittest
+
+from models.element_base_model import BaseElement
+from models.element_loader import ElementLoader, lxml_available
+from models.urla_xml_model import UrlaXML
+
+
+class ParserModelTest(unittest.TestCase):
+    """
+    The models built from the parser events (expat, lxml) are identical to the legacy xmltodict models.
+    """
+
+    XML_FILES = sorted(glob.glob(os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "xml_files", "*.xml")))
+
+    @staticmethod
+    def _flatten(model: BaseElement) -> list:
+        nodes = []
+        stack = [model]
+        while stack:
+            node = stack.pop()
+            nodes.append((node.xpath_str, node.name, node.index, node.attributes, len(node.children)))
+            stack.extend(reversed(node.children))
+        return nodes
+
+    def _check_backend(self, backend: str) -> None:
+        self.assertTrue(self.XML_FILES)
+        for file_spec in self.XML_FILES:
+            with self.subTest(file=os.path.basename(file_spec)):
+                legacy = UrlaXML(data_file_name=file_spec, parser=UrlaXML.XMLTODICT).model
+                model = ElementLoader(backend=backend).load(file_spec)
+
+                # The xmltodict model is not empty (the tags are found)
+                self.assertGreater(legacy.node_count(), 1)
+                self.assertIn("DEAL", legacy.path_dict)
+
+                self.assertEqual(self._flatten(model), self._flatten(legacy))
+                self.assertEqual(model.path_dict, legacy.path_dict)
+
+    def test_expat(self) -> None:
+        self._check_backend(backend=ElementLoader.EXPAT)
+
+    @unittest.skipUnless(lxml_available, "lxml is not installed")
+    def test_lxml(self) -> None:
+        self._check_backend(backend=ElementLoader.LXML)
+
+
+class ElementLoaderTest(unittest.TestCase):
+    """
+    Model layout: leaf values are attributes of their parent, repeated siblings are indexed (grouped by tag, in order
+    of the tag's first appearance), and the root is wrapped in a container element.
+    """
+
+    XML = ('<MESSAGE xmlns:xlink="http://www.w3.org/1999/xlink"><ASSETS>'
+           '<ASSET xlink:label="A1"><Type>Cash</Type><Amount>10</Amount></ASSET>'
+           '<LOAN><Id>1</Id></LOAN>'
+           '<ASSET><Type>Stock</Type></ASSET>'
+           '</ASSETS></MESSAGE>')
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_spec = os.path.join(self.temp_dir.name, "message.xml")
+        with open(self.file_spec, "w") as XML:
+            XML.write(self.XML)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_model(self) -> None:
+        model = ElementLoader().load(self.file_spec)
+
+        container, = model.children
+        self.assertEqual((model.type, container.type, container.xpath_str), ("MESSAGE", "MESSAGE", "//MESSAGE"))
+
+        assets, = container.children
+        self.assertEqual([(node.xpath_str, node.name, node.attributes) for node in assets.children],
+                         [("//MESSAGE/ASSETS/ASSET[0]", "A1", ("Amount:10", "Type:Cash")),
+                          ("//MESSAGE/ASSETS/ASSET[1]", BaseElement.VALUE_NOT_SET, ("Type:Stock", )),
+                          ("//MESSAGE/ASSETS/LOAN", BaseElement.VALUE_NOT_SET, ("Id:1", ))])
+        self.assertTrue(all(node.parent is assets for node in assets.children))
+
+        self.assertEqual(model.path_dict["ASSET"], ["MESSAGE/ASSETS/ASSET"])
+        self.assertEqual([node.xpath_str for node in model.type_index["ASSET"]],
+                         ["//MESSAGE/ASSETS/ASSET[0]", "//MESSAGE/ASSETS/ASSET[1]"])
+
+    def test_unknown_backend(self) -> None:
+        with self.assertRaises(ValueError):
+            ElementLoader(backend="sax")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import logging
+import os
+import queue
+import tempfile
+import unittest
+
+from logger.logging import BatchQueueListener, Logger
+
+
+class CallSiteLimitTest(unittest.TestCase):
+    """
+    The default call site limit (--debug-limit) only bounds DEBUG messages; an explicit limit applies at any level.
+    """
+
+    LIMIT = 2
+    MESSAGES = 5
+
+    def setUp(self) -> None:
+        self.root_handlers = logging.root.handlers[:]
+        self.log = Logger(test_name="test_call_site_limit")
+        Logger.call_site_limit = self.LIMIT
+        Logger._call_site_counts.clear()
+
+    def tearDown(self) -> None:
+        Logger.call_site_limit = None
+        Logger._call_site_counts.clear()
+        logging.root.handlers[:] = self.root_handlers
+
+    def _emit(self, level: str, **kwargs) -> list:
+        with self.assertLogs(logger="test_call_site_limit", level=logging.DEBUG) as captured:
+            for index in range(self.MESSAGES):
+                getattr(self.log, level)("MESSAGE %s", index, **kwargs)
+        return captured.records
+
+    def test_debug_is_limited(self) -> None:
+        records = self._emit("debug")
+
+        # LIMIT messages, then the notice that the call site is suppressed
+        self.assertEqual(len(records), self.LIMIT + 1)
+        self.assertIn("limit (2) reached", records[-1].getMessage())
+
+    def test_error_is_never_suppressed(self) -> None:
+        for level in ("error", "info"):
+            with self.subTest(level=level):
+                records = self._emit(level)
+                self.assertEqual([record.getMessage().split(" - ")[-1] for record in records],
+                                 [f"MESSAGE {index}" for index in range(self.MESSAGES)])
+
+    def test_explicit_limit(self) -> None:
+        records = self._emit("error", limit=1)
+        self.assertEqual(len(records), 2)
+        self.assertIn("limit (1) reached", records[-1].getMessage())
+
+
+class BatchQueueListenerTest(unittest.TestCase):
+    """
+    The listener writes the records to open stream/file handlers without flushing; other handlers (subclasses,
+    delayed file handlers) handle the records themselves.
+    """
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.temp_dir.name, "test.log")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write_records(self, handler: logging.Handler, count: int = 3) -> None:
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        listener = BatchQueueListener(queue.SimpleQueue(), handler)
+        for index in range(count):
+            listener.handle(logging.makeLogRecord(
+                {"levelno": logging.INFO, "levelname": "INFO", "msg": "MESSAGE %s", "args": (index, )}))
+        listener.flush()
+        handler.close()
+
+    def _read_log(self) -> list:
+        with open(self.log_file) as LOG:
+            return LOG.read().splitlines()
+
+    def test_file_handler(self) -> None:
+        self._write_records(logging.FileHandler(self.log_file))
+        self.assertEqual(self._read_log(), ["MESSAGE 0", "MESSAGE 1", "MESSAGE 2"])
+
+    def test_delayed_file_handler(self) -> None:
+        # The file (stream) is only opened when the first record is emitted
+        handler = logging.FileHandler(self.log_file, delay=True)
+        self.assertIsNone(handler.stream)
+
+        self._write_records(handler)
+        self.assertEqual(self._read_log(), ["MESSAGE 0", "MESSAGE 1", "MESSAGE 2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+from array import array
+import os
+import tempfile
+import unittest
+
+from comparator.comparison_engine import ComparisonEngine
+from comparator.minhash_index import MinHashIndex
+from models.symbol_table import SymbolTable
+from models.urla_xml_model import UrlaXML
+
+
+class MinHashIndexTest(unittest.TestCase):
+    """
+    LSH candidate search: similar leaf sets share a bucket, dissimilar ones do not; the candidates are scored
+    exactly, and the signatures do not depend on the symbol IDs.
+    """
+
+    ENTRIES = 20
+
+    def setUp(self) -> None:
+        self.symbols = SymbolTable()
+        self.leaf_sets = [self._leaf_set(self.symbols, prefix) for prefix in ("a", "b", "c")]
+        self.index = MinHashIndex(nodes=["A", "B", "C"], leaf_sets=self.leaf_sets, shape_ids=[0, 0, 1],
+                                  symbols=self.symbols)
+
+    @classmethod
+    def _leaf_set(cls, symbols: SymbolTable, prefix: str, replaced: int = 0) -> array:
+        entries = [f"ASSET|{prefix}{index}:{index}" for index in range(cls.ENTRIES)]
+        entries[:replaced] = [f"ASSET|other{index}:{index}" for index in range(replaced)]
+        return SymbolTable.id_array(symbols.intern(entry) for entry in entries)
+
+    def test_candidates(self) -> None:
+        # Identical and near-identical (Jaccard 0.9) leaf sets are found, and scored exactly
+        self.assertEqual(self.index.overlap_counts(self.leaf_sets[0], shape=0), {0: self.ENTRIES})
+        near = self._leaf_set(self.symbols, "b", replaced=1)
+        self.assertEqual(self.index.overlap_counts(near, shape=0), {1: self.ENTRIES - 1})
+
+        # Other shapes are not candidates
+        self.assertEqual(self.index.overlap_counts(self.leaf_sets[2], shape=0), {})
+        self.assertEqual(self.index.overlap_counts(self.leaf_sets[2], shape=1), {2: self.ENTRIES})
+
+        # Disjoint and empty leaf sets have no candidates
+        self.assertEqual(self.index.bucket_candidates(self._leaf_set(self.symbols, "d")), [])
+        self.assertEqual(self.index.bucket_candidates(SymbolTable.id_array([])), [])
+
+    def test_signature(self) -> None:
+        # Same entries interned in another order (other IDs): same signature
+        symbols = SymbolTable()
+        self._leaf_set(symbols, "z")
+        leaf_set = self._leaf_set(symbols, "a")
+        self.assertNotEqual(list(leaf_set), list(self.leaf_sets[0]))
+
+        other = MinHashIndex(nodes=["A"], leaf_sets=[leaf_set], shape_ids=[0], symbols=symbols)
+        self.assertEqual(other.signature(leaf_set), self.index.signature(self.leaf_sets[0]))
+        self.assertEqual(len(self.index.signature(self.leaf_sets[0])), MinHashIndex.NUM_HASHES)
+        self.assertEqual(other.band_hashes(leaf_set), self.index.band_hashes(self.leaf_sets[0]))
+
+    def test_with_symbols(self) -> None:
+        # Leaf sets interned in an overlay (with entries missing from the index's table) query the same buckets
+        overlay = self.symbols.overlay()
+        near = self._leaf_set(overlay, "a", replaced=1)
+        view = self.index.with_symbols(overlay)
+        self.assertIs(self.index.with_symbols(self.symbols), self.index)
+        self.assertIs(view.symbols, overlay)
+        self.assertIs(self.index.symbols, self.symbols)
+        self.assertEqual(view.overlap_counts(near, shape=0), {0: self.ENTRIES - 1})
+
+
+class RecallEstimateTest(unittest.TestCase):
+    """
+    Approximate mode: the recall of the LSH candidate search (share of the sampled nodes whose best closest match is
+    a candidate) is estimated for each tag.
+    """
+
+    ENTRIES = 10
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.expected_values = [[f"{node}_{index}" for index in range(self.ENTRIES)] for node in range(4)]
+        self.expected = UrlaXML(data_file_name=self._write("expected.xml", self.expected_values),
+                                is_primary_source=False)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, file_name: str, nodes: list) -> str:
+        assets = "".join("<ASSET><X>" + "".join(f"<k{index}>{value}</k{index}>" for index, value in enumerate(values)) +
+                         "</X></ASSET>" for values in nodes)
+        file_spec = os.path.join(self.temp_dir.name, file_name)
+        with open(file_spec, "w") as XML:
+            XML.write(f"<MESSAGE><ASSETS>{assets}</ASSETS></MESSAGE>")
+        return file_spec
+
+    def _recall(self, nodes: list) -> dict:
+        actual = UrlaXML(data_file_name=self._write("actual.xml", nodes), is_primary_source=True)
+        engine = ComparisonEngine(actual=actual, expected=self.expected, approximate=True)
+        engine.APPROXIMATE_MIN_PAIRS = 0
+        engine.compare(tag_name="ASSET")
+        return engine.recall_estimates
+
+    def test_recall(self) -> None:
+        # Near duplicates (9 of 10 entries shared) are always found; 1 shared entry of 10 is (almost) never found
+        near = [values[:-1] + ["z"] for values in self.expected_values[:2]]
+        far = [values[:1] + [f"y{index}" for index in range(1, self.ENTRIES)] for values in self.expected_values[2:]]
+        self.assertEqual(self._recall(near), {"ASSET": 1.0})
+        self.assertEqual(self._recall(near + far), {"ASSET": 0.5})
+
+    def test_no_shared_entries(self) -> None:
+        self.assertEqual(self._recall([[f"w{index}" for index in range(self.ENTRIES)]]), {"ASSET": None})
+
+    def test_exact_tags(self) -> None:
+        # Tags below APPROXIMATE_MIN_PAIRS are compared exactly: no estimate
+        actual = UrlaXML(data_file_name=self._write("actual.xml", self.expected_values[:1]), is_primary_source=True)
+        engine = ComparisonEngine(actual=actual, expected=self.expected, approximate=True)
+        engine.compare(tag_name="ASSET")
+        self.assertEqual(engine.recall_estimates, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
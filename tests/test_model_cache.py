@@ -0,0 +1,74 @@
+import marshal
+import os
+import pickle
+import tempfile
+import unittest
+
+from models.element_loader import ElementLoader
+from models.model_cache import ModelCache
+
+
+class ModelCacheTest(unittest.TestCase):
+    """
+    Cached models are rebuilt identically; stale, corrupt and non-marshal entries are never returned.
+    """
+
+    XML_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "xml_files", "D1_CO2.xml")
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ModelCache(cache_dir=self.temp_dir.name)
+        self.key = self.cache.key(self.XML_FILE)
+        self.model = ElementLoader().load(self.XML_FILE)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _entry_path(self) -> str:
+        return os.path.join(self.temp_dir.name, f"{self.key}.{ModelCache.CACHE_EXT}")
+
+    def test_key(self) -> None:
+        self.assertTrue(self.key.endswith(f"-v{ModelCache.MODEL_FORMAT_VERSION}"))
+        self.assertEqual(self.key, self.cache.key(self.XML_FILE))
+
+        # A new model format version invalidates the existing entries
+        self.cache.store(self.key, self.model)
+        cache = ModelCache(cache_dir=self.temp_dir.name)
+        cache.MODEL_FORMAT_VERSION = ModelCache.MODEL_FORMAT_VERSION + 1
+        new_key = cache.key(self.XML_FILE)
+        self.assertNotEqual(new_key, self.key)
+        self.assertIsNone(cache.load(new_key))
+
+    def test_round_trip(self) -> None:
+        self.assertIsNone(self.cache.load(self.key))
+        self.cache.store(self.key, self.model)
+
+        cached = self.cache.load(self.key)
+        self.assertEqual(ModelCache.serialize(cached), ModelCache.serialize(self.model))
+        self.assertEqual(cached.path_dict, self.model.path_dict)
+        self.assertEqual([node.xpath_str for node in cached.type_index["ASSET"]],
+                         [node.xpath_str for node in self.model.type_index["ASSET"]])
+
+    def test_discard_unusable_entries(self) -> None:
+        corrupt = {
+            "truncated": None,
+            "not marshal": b"not a marshal stream",
+            "pickle": pickle.dumps(ModelCache.serialize(self.model)),
+            "bad records": marshal.dumps([("ASSET", None, None, (), 2)]),
+        }
+        for description, contents in corrupt.items():
+            with self.subTest(entry=description):
+                self.cache.store(self.key, self.model)
+                if contents is None:
+                    with open(self._entry_path(), "rb") as ENTRY:
+                        contents = ENTRY.read()[:100]
+                with open(self._entry_path(), "wb") as ENTRY:
+                    ENTRY.write(contents)
+
+                with self.assertLogs(level="INFO"):
+                    self.assertIsNone(self.cache.load(self.key))
+                self.assertFalse(os.path.exists(self._entry_path()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import glob
+import json
+import os
+import tempfile
+import unittest
+
+from comparator.comparison_engine import ComparisonEngine
+from comparator.report_builder import ComparisonReportEngine
+from comparator.report_writer import ComparisonReports
+from models.urla_xml_model import UrlaXML
+
+
+class ResultRecordTest(unittest.TestCase):
+    """
+    Schema of the JSON Lines records: one record per actual node (exact, closest or no match), then one record
+    per symmetrical difference.
+    """
+
+    # ASSET[0]: exact match of ASSET[1]. ASSET[1]: closest match of ASSET[0] (q differs). ASSET[2]: no match.
+    EXPECTED = ("<MESSAGE><ASSETS>"
+                "<ASSET><X><p>5</p><q>6</q><r>7</r></X></ASSET>"
+                "<ASSET><X><p>1</p><q>2</q></X></ASSET>"
+                "</ASSETS></MESSAGE>")
+    ACTUAL = ("<MESSAGE><ASSETS>"
+              "<ASSET><X><p>1</p><q>2</q></X></ASSET>"
+              "<ASSET><X><p>5</p><q>9</q><r>7</r></X></ASSET>"
+              "<ASSET><X><z>0</z></X></ASSET>"
+              "</ASSETS><EXTRA><x>1</x><y>2</y></EXTRA></MESSAGE>")
+
+    NODE_KEYS = ["record", "tag", "xpath", "match_type", "match_xpath", "match_count", "total", "differences"]
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.actual = UrlaXML(data_file_name=self._write("actual.xml", self.ACTUAL), is_primary_source=True)
+        self.expected = UrlaXML(data_file_name=self._write("expected.xml", self.EXPECTED), is_primary_source=False)
+        self.results = ComparisonEngine(actual=self.actual, expected=self.expected).compare(tag_name="ASSET")
+        self.report_engine = ComparisonReportEngine(actual_model=self.actual.model,
+                                                    expected_model=self.expected.model)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, file_name: str, xml: str) -> str:
+        file_spec = os.path.join(self.temp_dir.name, file_name)
+        with open(file_spec, "w") as XML:
+            XML.write(xml)
+        return file_spec
+
+    def _check_node_records(self, records: list) -> None:
+        self.assertEqual([list(record) for record in records], [self.NODE_KEYS] * 3)
+        exact, closest, no_match = records
+
+        # The engine records -1 as the match count of an exact match; the record reports all entries matched
+        self.assertEqual(self.results[exact["xpath"]][ComparisonEngine.CLOSEST_MATCH_COUNT], -1)
+        self.assertEqual(exact, {"record": "node", "tag": "ASSET", "xpath": "//MESSAGE/ASSETS/ASSET[0]",
+                                 "match_type": "exact", "match_xpath": "//MESSAGE/ASSETS/ASSET[1]",
+                                 "match_count": 2, "total": 2, "differences": []})
+        self.assertEqual(closest, {"record": "node", "tag": "ASSET", "xpath": "//MESSAGE/ASSETS/ASSET[1]",
+                                   "match_type": "closest", "match_xpath": "//MESSAGE/ASSETS/ASSET[0]",
+                                   "match_count": 2, "total": 3,
+                                   "differences": [{"attribute": "q", "xpath": "MESSAGE/ASSETS/ASSET/X",
+                                                    "actual": "9", "expected": "6"}]})
+        self.assertEqual(no_match, {"record": "node", "tag": "ASSET", "xpath": "//MESSAGE/ASSETS/ASSET[2]",
+                                    "match_type": "none", "match_xpath": None,
+                                    "match_count": 0, "total": 0, "differences": []})
+
+    def test_result_records(self) -> None:
+        self._check_node_records(list(self.report_engine.result_records(tag_name="ASSET", results=self.results)))
+
+    def test_symmetrical_difference_records(self) -> None:
+        self.assertEqual(list(self.report_engine.symmetrical_difference_records()),
+                         [{"record": "symmetrical_difference", "source": "primary", "tag": "EXTRA",
+                           "xpath": "//MESSAGE/EXTRA"}])
+
+    def test_jsonl_report(self) -> None:
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        try:
+            with ComparisonReports(actual_xml_model=self.actual, expected_xml_model=self.expected,
+                                   report_format=ComparisonReports.JSONL) as reporter:
+                reporter.generate_reports_per_tag(results_dict=self.results, tag_name="ASSET")
+                reporter.build_sym_diff_reports()
+            report_file, = glob.glob("*.jsonl")
+            with open(report_file) as REPORT:
+                lines = REPORT.read().splitlines()
+        finally:
+            os.chdir(cwd)
+
+        # One compact JSON record per line
+        self.assertTrue(all(": " not in line and ", " not in line for line in lines))
+        records = [json.loads(line) for line in lines]
+        self._check_node_records(records[:3])
+        self.assertEqual([record["record"] for record in records[3:]], ["symmetrical_difference"])
+
+
+if __name__ == '__main__':
+    unittest.main()
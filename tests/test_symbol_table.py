@@ -0,0 +1,112 @@
+import unittest
+import zlib
+
+from models.symbol_table import SymbolTable, numpy_available
+
+
+class SymbolTableTest(unittest.TestCase):
+    """
+    Symbols get stable IDs in order of first use; the ID arrays support the set operations of the comparison.
+    """
+
+    def test_intern(self) -> None:
+        symbols = SymbolTable()
+        self.assertEqual([symbols.intern(symbol) for symbol in ("b", "a", "b", "c")], [0, 1, 0, 2])
+        self.assertEqual(len(symbols), 3)
+
+        self.assertEqual(symbols.lookup("a"), 1)
+        self.assertIsNone(symbols.lookup("d"))
+        self.assertEqual(len(symbols), 3)
+
+        self.assertEqual(symbols.symbols([2, 0]), ["b", "c"])
+        self.assertEqual(symbols.id_limit(), 3)
+
+    def test_content_hashes(self) -> None:
+        # The hashes depend on the symbols only, not on the order they were interned in
+        first, second = SymbolTable(), SymbolTable()
+        first_ids = [first.intern(symbol) for symbol in ("x", "y")]
+        second_ids = [second.intern(symbol) for symbol in ("y", "x")]
+        self.assertNotEqual(first.lookup("x"), second.lookup("x"))
+        self.assertEqual(list(first.content_hashes(first_ids)), [zlib.crc32(b"x"), zlib.crc32(b"y")])
+        self.assertEqual(list(second.content_hashes(second_ids)), [zlib.crc32(b"y"), zlib.crc32(b"x")])
+
+    def test_key_id(self) -> None:
+        symbols = SymbolTable()
+        entry_id = symbols.intern("ASSET|Type:Cash")
+        key_id = symbols.key_id(entry_id, "ASSET|Type:Cash", key=lambda entry: entry.split(":")[0])
+        self.assertEqual(symbols.lookup("ASSET|Type"), key_id)
+
+        # The key is derived once per entry
+        self.assertEqual(symbols.key_id(entry_id, "ASSET|Type:Cash", key=self.fail), key_id)
+
+    def test_set_operations(self) -> None:
+        ids_1 = SymbolTable.id_array([5, 1, 3, 3, 9])
+        ids_2 = SymbolTable.id_array([3, 4, 5])
+        self.assertEqual(list(ids_1), [1, 3, 5, 9])
+        self.assertEqual(SymbolTable.intersection_size(ids_1, ids_2), 2)
+        self.assertEqual(SymbolTable.union_size(ids_1, ids_2), 5)
+        self.assertEqual(SymbolTable.intersection_size(ids_1, SymbolTable.id_array([])), 0)
+
+    @unittest.skipUnless(numpy_available, "NumPy is not installed")
+    def test_set_operations_numpy(self) -> None:
+        size = SymbolTable.NUMPY_MIN_SIZE
+        ids_1 = SymbolTable.id_array(range(0, 2 * size, 2))
+        ids_2 = SymbolTable.id_array(range(0, 3 * size, 3))
+        expected = len(set(ids_1) & set(ids_2))
+        self.assertEqual(SymbolTable.intersection_size(ids_1, ids_2), expected)
+        self.assertEqual(SymbolTable.union_size(ids_1, ids_2), 2 * size - expected)
+
+
+class SymbolTableOverlayTest(unittest.TestCase):
+    """
+    An overlay resolves the base table's symbols to the base IDs, and interns the other symbols itself, without
+    modifying the base.
+    """
+
+    def setUp(self) -> None:
+        self.base = SymbolTable()
+        self.base_ids = [self.base.intern(symbol) for symbol in ("a", "b")]
+        self.overlay = self.base.overlay()
+
+    def test_intern(self) -> None:
+        self.assertEqual([self.overlay.intern(symbol) for symbol in ("b", "c", "a", "c")], [1, 2, 0, 2])
+        self.assertEqual(self.overlay.lookup("a"), 0)
+        self.assertEqual(len(self.overlay), 3)
+
+        # The base is not modified
+        self.assertEqual(len(self.base), 2)
+        self.assertIsNone(self.base.lookup("c"))
+
+        # Two overlays of the same base assign their own IDs (after the base IDs)
+        other = self.base.overlay()
+        self.assertEqual(other.intern("d"), 2)
+        self.assertIsNone(other.lookup("c"))
+
+    def test_shares_ids(self) -> None:
+        self.assertTrue(self.overlay.shares_ids(self.base))
+        self.assertTrue(self.overlay.shares_ids(self.overlay))
+        self.assertFalse(self.base.shares_ids(self.overlay))
+        self.assertFalse(self.overlay.shares_ids(self.base.overlay()))
+        self.assertFalse(self.overlay.shares_ids(SymbolTable()))
+
+    def test_resolve(self) -> None:
+        overlay_id = self.overlay.intern("c")
+        self.assertEqual(self.overlay.symbols(self.base_ids + [overlay_id]), ["a", "b", "c"])
+        self.assertEqual(list(self.overlay.content_hashes([overlay_id] + self.base_ids)),
+                         [zlib.crc32(b"c"), zlib.crc32(b"a"), zlib.crc32(b"b")])
+        self.assertEqual(self.overlay.id_limit(), 3)
+
+    def test_key_id(self) -> None:
+        # A key derived by the base is reused by the overlay
+        entry_id = self.base_ids[0]
+        key_id = self.base.key_id(entry_id, "a", key=str.upper)
+        self.assertEqual(self.overlay.key_id(entry_id, "a", key=self.fail), key_id)
+
+        # A key derived by the overlay is interned in the overlay
+        overlay_key_id = self.overlay.key_id(self.base_ids[1], "b", key=str.upper)
+        self.assertEqual(self.overlay.lookup("B"), overlay_key_id)
+        self.assertIsNone(self.base.lookup("B"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import unittest
+
+from utils.table_renderer import ColumnarTable
+
+
+class ColumnarTableTest(unittest.TestCase):
+    """
+    Golden output: the text and HTML tables keep the PrettyTable layout of the reports (framed table, one space of
+    padding, column alignment, centered title, HTML escaping).
+    """
+
+    COLUMNS = [("Name", ColumnarTable.LEFT), ("Count", ColumnarTable.RIGHT), ("Status", ColumnarTable.CENTER)]
+    ROWS = [("alpha", 1, "ok"), ("b", 12345, "fail")]
+
+    TEXT = ("+-------+-------+--------+\n"
+            "| Name  | Count | Status |\n"
+            "+-------+-------+--------+\n"
+            "| alpha |     1 |   ok   |\n"
+            "| b     | 12345 |  fail  |\n"
+            "+-------+-------+--------+")
+
+    TITLED_TEXT = ("+------------------------+\n"
+                   "|        Results         |\n"
+                   "+-------+-------+--------+\n"
+                   "| Name  | Count | Status |\n"
+                   "+-------+-------+--------+\n"
+                   "| alpha |     1 |   ok   |\n"
+                   "| b     | 12345 |  fail  |\n"
+                   "+-------+-------+--------+")
+
+    # The columns are widened (proportionally, remainder to the last column) to fit a long title
+    WIDE_TITLE_TEXT = ("+------------------------------------+\n"
+                       "| A much longer title than the table |\n"
+                       "+-----------------+------------------+\n"
+                       "| A               |                B |\n"
+                       "+-----------------+------------------+\n"
+                       "| 1               |                2 |\n"
+                       "+-----------------+------------------+")
+
+    # Multi-line cells: one text line per cell line, top aligned
+    MULTI_LINE_TEXT = ("+-------+-----+\n"
+                       "| Path  | Tag |\n"
+                       "+-------+-----+\n"
+                       "| a/b   |  x  |\n"
+                       "| c/d/e |     |\n"
+                       "+-------+-----+")
+
+    HTML = ("<table>\n"
+            "    <thead>\n"
+            "        <tr>\n"
+            "            <th>Path</th>\n"
+            "            <th>Tag</th>\n"
+            "        </tr>\n"
+            "    </thead>\n"
+            "    <tbody>\n"
+            "        <tr>\n"
+            "            <td>&lt;ASSET&gt; &amp; &quot;x&quot;</td>\n"
+            "            <td>a<br>b</td>\n"
+            "        </tr>\n"
+            "    </tbody>\n"
+            "</table>")
+
+    def _table(self, columns: list, rows: list) -> ColumnarTable:
+        table = ColumnarTable(columns)
+        for row in rows:
+            table.add_row(row)
+        return table
+
+    def test_text(self) -> None:
+        table = self._table(self.COLUMNS, self.ROWS)
+        self.assertEqual(table.get_string(), self.TEXT)
+        self.assertEqual(table.get_string(title="Results"), self.TITLED_TEXT)
+        self.assertEqual(table.rowcount, 2)
+
+    def test_wide_title(self) -> None:
+        table = self._table([("A", ColumnarTable.LEFT), ("B", ColumnarTable.RIGHT)], [(1, 2)])
+        self.assertEqual(table.get_string(title="A much longer title than the table"), self.WIDE_TITLE_TEXT)
+
+    def test_multi_line_cells(self) -> None:
+        table = self._table([("Path", ColumnarTable.LEFT), ("Tag", ColumnarTable.CENTER)], [("a/b\nc/d/e", "x")])
+        self.assertEqual(table.get_string(), self.MULTI_LINE_TEXT)
+
+    def test_chunks(self) -> None:
+        # The chunked output (written to the report files) is the same as the complete table
+        table = self._table(self.COLUMNS, self.ROWS * 5)
+        table.CHUNK_ROWS = 3
+        self.assertEqual(len(list(table.iter_text())), 1 + 4 + 1)
+
+        stream = io.StringIO()
+        table.write_text(stream, title="Results")
+        self.assertEqual(stream.getvalue(), table.get_string(title="Results"))
+
+    def test_html(self) -> None:
+        table = self._table([("Path", ColumnarTable.LEFT), ("Tag", ColumnarTable.CENTER)],
+                            [('<ASSET> & "x"', "a\nb")])
+        self.assertEqual(table.get_html_string(), self.HTML)
+
+        stream = io.StringIO()
+        table.write_html(stream)
+        self.assertEqual(stream.getvalue(), self.HTML)
+
+    def test_row_length(self) -> None:
+        with self.assertRaises(ValueError):
+            ColumnarTable(self.COLUMNS).add_row(("alpha", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,346 @@
+"""
+    Deterministic generator of synthetic MISMO-like documents (for scaling benchmarks; see benchmark.py).
+
+    A generated pair of documents shares the MISMO layout of the sample files (MESSAGE/DEAL_SETS/.../DEAL/<container>/
+    <tag>): the 'expected' document is generated from the seed, and the 'actual' document is derived from it by
+    mutating a fraction of the entities (changed, removed and added leaf values) and by removing/adding entities.
+    The same settings (seed, scale, ...) always generate the same documents.
+
+"""
+import os
+import random
+import typing
+from xml.sax.saxutils import escape, quoteattr
+
+
+class _Node:
+    """
+    Generated XML element: tag, XML attributes, and either child nodes or a (leaf) text value
+    """
+    __slots__ = ('tag', 'attributes', 'children', 'text')
+
+    def __init__(self, tag: str, attributes: typing.Optional[typing.Dict[str, str]] = None,
+                 children: typing.Optional[typing.List["_Node"]] = None, text: typing.Optional[str] = None) \
+            -> typing.NoReturn:
+        self.tag = tag
+        self.attributes = attributes or {}
+        self.children = children if children is not None else []
+        self.text = text
+
+    def copy(self) -> "_Node":
+        """
+        Deep copy of the node (and its descendants)
+
+        :return: _Node
+        """
+        return _Node(tag=self.tag, attributes=dict(self.attributes), children=[child.copy() for child in self.children],
+                     text=self.text)
+
+
+class MismoGenerator:
+    """
+    Generates pairs (actual, expected) of MISMO-like documents. Each entity (ASSET, PARTY, ...) has 'sections'
+    sections (<TAG>_DETAIL, <TAG>_HOLDER, ...), nested 'depth' levels deep; the innermost level of each section has
+    'attributes' leaf values.
+    """
+
+    ROOT = "MESSAGE"
+    NAMESPACES = {"xmlns": "http://www.mismo.org/residential/2009/schemas",
+                  "xmlns:xlink": "http://www.w3.org/1999/xlink",
+                  "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance"}
+    DEAL_PATH = ("DEAL_SETS", "DEAL_SET", "DEALS", "DEAL")
+
+    # Key: Entity tag, Value: (container tag, number of entities at scale 1); approximately the sample files.
+    ENTITIES = {"ASSET": ("ASSETS", 9),
+                "COLLATERAL": ("COLLATERALS", 1),
+                "EXPENSE": ("EXPENSES", 2),
+                "LIABILITY": ("LIABILITIES", 10),
+                "LOAN": ("LOANS", 1),
+                "PARTY": ("PARTIES", 6)}
+
+    SECTION_NAMES = ("DETAIL", "HOLDER", "SUMMARY", "IDENTIFIER", "PAYMENT", "STATUS")
+    NESTED_NAMES = ("NAME", "ADDRESS", "CONTACT_POINT", "EXTENSION", "OTHER")
+    FIELD_TYPES = ("Amount", "Type", "Identifier", "Date", "Indicator", "Description", "Count")
+    ENUM_VALUES = ("CheckingAccount", "SavingsAccount", "Bond", "Stock", "Revolving", "Installment", "Mortgage",
+                   "Borrower", "Other")
+    WORDS = ("Mega", "Bank", "Cactus", "Friendly", "Broker", "Treasury", "Credit", "Union", "Home", "Auto")
+
+    # Mutations of the leaf values of a mutated entity
+    CHANGE = "change"
+    REMOVE = "remove"
+    ADD = "add"
+    MUTATIONS = (CHANGE, CHANGE, CHANGE, REMOVE, ADD)
+    MAX_MUTATIONS_PER_ENTITY = 3
+
+    INDENT = "\t"
+
+    def __init__(self, seed: int = 0, depth: int = 2, sections: int = 2, attributes: int = 4,
+                 mutation_rate: float = 0.2, missing_rate: float = 0.05) -> typing.NoReturn:
+        """
+        :param seed: Random seed (same settings + seed = same documents)
+        :param depth: Nesting depth of the entity sections (1 = leaf values directly under the section)
+        :param sections: Number of sections per entity
+        :param attributes: Number of leaf values per section
+        :param mutation_rate: Fraction of the actual entities with mutated leaf values
+        :param missing_rate: Fraction of the expected entities missing from the actual document (the same number
+                             of new entities is added to the actual document)
+
+        """
+        if depth < 1 or sections < 1 or attributes < 1:
+            raise ValueError("depth, sections and attributes must be at least 1.")
+        if not (0 <= mutation_rate <= 1 and 0 <= missing_rate <= 1):
+            raise ValueError("mutation_rate and missing_rate must be between 0 and 1.")
+
+        self.seed = seed
+        self.depth = depth
+        self.sections = sections
+        self.attributes = attributes
+        self.mutation_rate = mutation_rate
+        self.missing_rate = missing_rate
+
+    def entity_counts(self, scale: int = 1, counts: typing.Optional[typing.Dict[str, int]] = None) \
+            -> typing.Dict[str, int]:
+        """
+        Number of entities per tag
+
+        :param scale: Multiplier of the default number of entities
+        :param counts: Number of entities of specific tags (overrides the scaled default)
+
+        :return: Dictionary of tag: number of entities
+        """
+        entity_counts = {tag: count * scale for tag, (_, count) in self.ENTITIES.items()}
+        entity_counts.update(counts or {})
+        return entity_counts
+
+    def build_documents(self, scale: int = 1, counts: typing.Optional[typing.Dict[str, int]] = None) \
+            -> typing.Tuple[_Node, _Node]:
+        """
+        Build the expected document, then derive the actual document from it.
+
+        :param scale: Multiplier of the default number of entities
+        :param counts: Number of entities of specific tags (overrides the scaled default)
+
+        :return: (actual root node, expected root node)
+        """
+        rnd = random.Random(f"{self.seed}:{scale}:expected")
+        entity_counts = self.entity_counts(scale=scale, counts=counts)
+        expected = {tag: [self._entity(rnd, tag, number) for number in range(1, count + 1)]
+                    for tag, count in entity_counts.items()}
+
+        rnd = random.Random(f"{self.seed}:{scale}:actual")
+        actual = {}
+        for tag, entities in expected.items():
+            actual[tag] = []
+            for entity in entities:
+                if rnd.random() < self.missing_rate:
+                    continue
+                entity = entity.copy()
+                if rnd.random() < self.mutation_rate:
+                    self._mutate(rnd, entity)
+                actual[tag].append(entity)
+
+            # Replace the missing entities with new ones
+            for number in range(len(entities) + 1, len(entities) + 1 + len(entities) - len(actual[tag])):
+                actual[tag].append(self._entity(rnd, tag, number))
+
+        return self._document(actual), self._document(expected)
+
+    def write_documents(self, target_dir: str, scale: int = 1, counts: typing.Optional[typing.Dict[str, int]] = None) \
+            -> typing.Tuple[str, str]:
+        """
+        Generate and write a pair of documents: <target_dir>/synthetic_<scale>x_{actual|expected}.xml
+
+        :param target_dir: Directory of the generated files (created if needed)
+        :param scale: Multiplier of the default number of entities
+        :param counts: Number of entities of specific tags (overrides the scaled default)
+
+        :return: (actual filespec, expected filespec)
+        """
+        os.makedirs(target_dir, exist_ok=True)
+        actual, expected = self.build_documents(scale=scale, counts=counts)
+        file_specs = []
+        for document, document_type in ((actual, "actual"), (expected, "expected")):
+            file_spec = os.path.abspath(os.path.join(target_dir, f"synthetic_{scale}x_{document_type}.xml"))
+            self.write(document, file_spec)
+            file_specs.append(file_spec)
+        return file_specs[0], file_specs[1]
+
+    @classmethod
+    def write(cls, document: _Node, file_spec: str) -> typing.NoReturn:
+        """
+        Write a document as (tab indented) XML
+
+        :param document: Root node
+        :param file_spec: filespec of the XML file
+
+        :return: None
+        """
+        with open(file_spec, "w", encoding="utf-8") as XML:
+            XML.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            cls._write_node(XML, document, level=0)
+
+    @classmethod
+    def _write_node(cls, stream: typing.TextIO, node: _Node, level: int) -> typing.NoReturn:
+        """
+        Write a node and its descendants (depth first)
+
+        :param stream: Open XML file
+        :param node: Node to write
+        :param level: Indentation level
+
+        :return: None
+        """
+        indent = cls.INDENT * level
+        attributes = "".join(f" {name}={quoteattr(value)}" for name, value in node.attributes.items())
+        if node.text is not None:
+            stream.write(f"{indent}<{node.tag}{attributes}>{escape(node.text)}</{node.tag}>\n")
+            return
+
+        stream.write(f"{indent}<{node.tag}{attributes}>\n")
+        for child in node.children:
+            cls._write_node(stream, child, level=level + 1)
+        stream.write(f"{indent}</{node.tag}>\n")
+
+    def _document(self, entities: typing.Dict[str, typing.List[_Node]]) -> _Node:
+        """
+        Build the MISMO document structure around the entities
+
+        :param entities: Dictionary of tag: list of entity nodes
+
+        :return: Root node
+        """
+        deal = _Node(tag=self.DEAL_PATH[-1])
+        for tag, nodes in entities.items():
+            if nodes:
+                deal.children.append(_Node(tag=self.ENTITIES[tag][0] if tag in self.ENTITIES else f"{tag}S",
+                                           children=nodes))
+
+        node = deal
+        for tag in reversed(self.DEAL_PATH[:-1]):
+            node = _Node(tag=tag, children=[node])
+
+        about = _Node(tag="ABOUT_VERSIONS", children=[
+            _Node(tag="ABOUT_VERSION", children=[_Node(tag="CreatedDatetime", text="2020-01-01T00:00:00Z")])])
+        return _Node(tag=self.ROOT, attributes=dict(self.NAMESPACES), children=[about, node])
+
+    def _entity(self, rnd: random.Random, tag: str, number: int) -> _Node:
+        """
+        Build an entity: sections nested 'depth' levels deep, with the leaf values at the innermost level
+
+        :param rnd: Random number generator
+        :param tag: Entity tag
+        :param number: Sequence number of the entity
+
+        :return: Entity node
+        """
+        entity = _Node(tag=tag, attributes={"SequenceNumber": str(number), "xlink:label": f"{tag}_{number}"})
+        for section in range(self.sections):
+            node = _Node(tag=f"{tag}_{self._name(self.SECTION_NAMES, section)}")
+            entity.children.append(node)
+            for level in range(1, self.depth):
+                child = _Node(tag=self._name(self.NESTED_NAMES, (section + level) % len(self.NESTED_NAMES)))
+                node.children.append(child)
+                node = child
+
+            prefix = tag.title().replace("_", "")
+            node.children.extend(self._leaf(rnd, prefix, field) for field in range(self.attributes))
+        return entity
+
+    def _leaf(self, rnd: random.Random, prefix: str, field: int) -> _Node:
+        """
+        Build a leaf value (the value depends on the field type)
+
+        :param rnd: Random number generator
+        :param prefix: Field name prefix (entity tag)
+        :param field: Field number
+
+        :return: Leaf node
+        """
+        field_type = self.FIELD_TYPES[field % len(self.FIELD_TYPES)]
+        suffix = field // len(self.FIELD_TYPES)
+        return _Node(tag=f"{prefix}{field_type}{suffix or ''}", text=self._value(rnd, field_type))
+
+    def _value(self, rnd: random.Random, field_type: str) -> str:
+        """
+        Random value of a field type
+
+        :param rnd: Random number generator
+        :param field_type: One of FIELD_TYPES
+
+        :return: Value (str)
+        """
+        if field_type == "Amount":
+            return f"{rnd.randrange(0, 500000)}.{rnd.randrange(0, 100):02d}"
+        if field_type == "Type":
+            return rnd.choice(self.ENUM_VALUES)
+        if field_type == "Identifier":
+            return str(rnd.randrange(100000, 1000000))
+        if field_type == "Date":
+            return f"{rnd.randrange(1990, 2021)}-{rnd.randrange(1, 13):02d}-{rnd.randrange(1, 29):02d}"
+        if field_type == "Indicator":
+            return rnd.choice(("true", "false"))
+        if field_type == "Count":
+            return str(rnd.randrange(0, 40))
+        return " ".join(rnd.choice(self.WORDS) for _ in range(2))
+
+    def _mutate(self, rnd: random.Random, entity: _Node) -> typing.NoReturn:
+        """
+        Mutate the leaf values of an entity: change, remove or add 1 to MAX_MUTATIONS_PER_ENTITY leaf values
+
+        :param rnd: Random number generator
+        :param entity: Entity node (updated in place)
+
+        :return: None
+        """
+        for _ in range(rnd.randint(1, self.MAX_MUTATIONS_PER_ENTITY)):
+            parents = self._leaf_parents(entity)
+            parent = rnd.choice(parents)
+            leaves = [child for child in parent.children if child.text is not None]
+            mutation = rnd.choice(self.MUTATIONS) if len(leaves) > 1 else rnd.choice((self.CHANGE, self.ADD))
+
+            if mutation == self.CHANGE:
+                leaf = rnd.choice(leaves)
+                base_tag = leaf.tag.rstrip("0123456789")
+                leaf.text = self._value(rnd, next((field_type for field_type in self.FIELD_TYPES
+                                                   if base_tag.endswith(field_type)), "Description"))
+            elif mutation == self.REMOVE:
+                parent.children.remove(rnd.choice(leaves))
+            else:
+                # New field (repeated leaf tags are not supported by the legacy xmltodict model build)
+                prefix = entity.tag.title().replace("_", "")
+                tags = {leaf.tag for leaf in leaves}
+                field = self.attributes + rnd.randrange(len(self.FIELD_TYPES))
+                while self._leaf(rnd, prefix, field).tag in tags:
+                    field += 1
+                parent.children.append(self._leaf(rnd, prefix, field))
+
+    @staticmethod
+    def _leaf_parents(node: _Node) -> typing.List[_Node]:
+        """
+        Nodes with leaf values (innermost section nodes) of an entity
+
+        :param node: Entity node
+
+        :return: List of nodes
+        """
+        parents = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if any(child.text is not None for child in current.children):
+                parents.append(current)
+            stack.extend(child for child in current.children if child.text is None)
+        return parents
+
+    @staticmethod
+    def _name(names: typing.Sequence[str], index: int) -> str:
+        """
+        Name number 'index' of a list of names (numbered once the list is exhausted)
+
+        :param names: List of names
+        :param index: Name number
+
+        :return: Name
+        """
+        suffix = index // len(names)
+        return f"{names[index % len(names)]}{f'_{suffix}' if suffix else ''}"
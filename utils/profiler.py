@@ -0,0 +1,282 @@
+"""
+    Per-phase timing (wall clock and CPU time) of a comparison run, plus optional cProfile statistics and memory
+    accounting (tracemalloc).
+
+    Phases are recorded by the instrumented code (file read, XML parse, model build, compare per tag, report writes)
+    via Profiler.phase(); when the profiler is not started, phase() and count() return immediately. Phases nest:
+    a phase started while another phase is open (in the same thread) is recorded as its child.
+
+    Memory accounting records, per phase, the memory retained by the phase (allocated and not released when the
+    phase ends) and the peak traced memory during the phase. After the main phases (SNAPSHOT_PHASES), a tracemalloc
+    snapshot is compared to the previous snapshot to list the top allocation sites.
+
+"""
+import contextlib
+import cProfile
+import threading
+import time
+import tracemalloc
+import typing
+
+from utils.table_renderer import ColumnarTable
+
+
+class PhaseRecord:
+    """
+    Timing of a phase: name, label (file, tag, ...), nesting depth, wall/CPU time (sec) and counters
+    """
+    __slots__ = ('name', 'label', 'depth', 'wall', 'cpu', 'counts', 'calls', 'retained', 'peak', 'sites')
+
+    def __init__(self, name: str, label: str, depth: int) -> typing.NoReturn:
+        self.name = name
+        self.label = label
+        self.depth = depth
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.counts = {}
+        self.calls = 0
+
+        # Memory accounting (bytes): retained = traced memory at the end - at the start of the phase;
+        # sites = top allocation sites since the previous snapshot: (site, size difference, count difference)
+        self.retained = 0
+        self.peak = 0
+        self.sites = []
+
+
+class Profiler:
+    """
+    Process-wide phase profiler (class level state, like the Logger settings): start() once, at the beginning
+    of the run, then summary_table() and stop() at the end.
+    """
+
+    enabled = False
+    memory = False
+    records = []
+
+    # Memory accounting: phases followed by a snapshot, number of allocation sites listed per snapshot
+    SNAPSHOT_PHASES = ("parse", "model build", "load model", "compare", "report")
+    TOP_SITES = 10
+    NODES = 'nodes'
+    _snapshot = None
+
+    # Phases merged into a single record (Key: (parent record id, name, label), Value: PhaseRecord)
+    _accumulated = {}
+    _local = threading.local()
+    _lock = threading.Lock()
+    _cprofile = None
+
+    # Summary table columns
+    PHASE = 'Phase'
+    LABEL = 'File/Tag'
+    CALLS = 'Calls'
+    WALL = 'Wall (s)'
+    CPU = 'CPU (s)'
+    COUNTS = 'Counts'
+    RETAINED = 'Retained (KB)'
+    PEAK = 'Peak (KB)'
+    BYTES_PER_NODE = 'Bytes/node'
+    SITE = 'Allocation site'
+    SIZE_DIFF = 'Size diff (KB)'
+    COUNT_DIFF = 'Count diff'
+    INDENT = '  '
+
+    @classmethod
+    def start(cls, cprofile: bool = False, memory: bool = False) -> typing.NoReturn:
+        """
+        Start recording phases (and the cProfile statistics of the calling thread, if requested)
+
+        :param cprofile: Also run cProfile
+        :param memory: Also record the memory of each phase (tracemalloc; slows down the run)
+
+        :return: None
+        """
+        cls.records = []
+        cls._accumulated = {}
+        cls.enabled = True
+        cls.memory = memory
+        if memory:
+            tracemalloc.start()
+            cls._snapshot = cls._take_snapshot()
+        if cprofile:
+            cls._cprofile = cProfile.Profile()
+            cls._cprofile.enable()
+
+    @classmethod
+    def stop(cls, stats_file: typing.Optional[str] = None) -> typing.NoReturn:
+        """
+        Stop recording, and write the cProfile statistics (pstats format) if cProfile was running.
+
+        :param stats_file: filespec of the statistics file (e.g. <name>.pstats); None = do not write the statistics
+
+        :return: None
+        """
+        cls.enabled = False
+        if cls.memory:
+            cls.memory = False
+            cls._snapshot = None
+            tracemalloc.stop()
+        if cls._cprofile is not None:
+            cls._cprofile.disable()
+            if stats_file is not None:
+                cls._cprofile.dump_stats(stats_file)
+            cls._cprofile = None
+
+    @classmethod
+    def _open_phases(cls) -> typing.List[PhaseRecord]:
+        """
+        Stack of the phases open in the current thread
+
+        :return: List of PhaseRecords (innermost last)
+        """
+        stack = getattr(cls._local, 'stack', None)
+        if stack is None:
+            stack = cls._local.stack = []
+        return stack
+
+    @classmethod
+    @contextlib.contextmanager
+    def phase(cls, name: str, label: str = "", accumulate: bool = False) \
+            -> typing.Iterator[typing.Optional[PhaseRecord]]:
+        """
+        Time a phase (context manager). Yields the PhaseRecord (None if the profiler is not started).
+
+        :param name: Phase name
+        :param label: File, tag, ... the phase applies to (Default: label of the enclosing phase)
+        :param accumulate: Add the time to the record of the previous phases of the same name, label and parent
+                           (e.g. one record for all the chunk reads of a file)
+
+        :return: Iterator (context manager)
+        """
+        if not cls.enabled:
+            yield None
+            return
+
+        # Nested phases apply to the same file/tag as the enclosing phase (unless labelled)
+        stack = cls._open_phases()
+        label = label or (stack[-1].label if stack else "")
+        with cls._lock:
+            record = None
+            if accumulate:
+                key = (id(stack[-1]) if stack else None, name, label)
+                record = cls._accumulated.get(key)
+            if record is None:
+                record = PhaseRecord(name=name, label=label, depth=len(stack))
+                cls.records.append(record)
+                if accumulate:
+                    cls._accumulated[key] = record
+
+        # Memory: the traced peak is reset for each phase, so the peak so far is kept by the enclosing phase
+        memory = cls.memory
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            memory_start = current
+
+        stack.append(record)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            record.wall += time.perf_counter() - wall_start
+            record.cpu += time.thread_time() - cpu_start
+            record.calls += 1
+            stack.pop()
+            if memory and cls.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record.retained += current - memory_start
+                record.peak = max(record.peak, peak)
+                if name in cls.SNAPSHOT_PHASES and not accumulate:
+                    record.sites = cls._allocation_sites()
+
+    @classmethod
+    def _take_snapshot(cls) -> tracemalloc.Snapshot:
+        """
+        Take a tracemalloc snapshot (allocations of the tracemalloc module and the profiler are excluded)
+
+        :return: Snapshot
+        """
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                                          tracemalloc.Filter(False, __file__)])
+
+    @classmethod
+    def _allocation_sites(cls) -> typing.List[typing.Tuple[str, int, int]]:
+        """
+        Take a snapshot, and list the allocation sites with the largest change since the previous snapshot
+
+        :return: List of (site (file:line), size difference (bytes), count difference)
+        """
+        with cls._lock:
+            snapshot = cls._take_snapshot()
+            differences = snapshot.compare_to(cls._snapshot, 'lineno')
+            cls._snapshot = snapshot
+        return [(f"{difference.traceback[0].filename}:{difference.traceback[0].lineno}", difference.size_diff,
+                 difference.count_diff) for difference in differences[:cls.TOP_SITES]]
+
+    @classmethod
+    def count(cls, **counts: int) -> typing.NoReturn:
+        """
+        Add to the counters of the innermost open phase (of the current thread)
+
+        :param counts: Counter name: increment
+
+        :return: None
+        """
+        if not cls.enabled:
+            return
+        stack = cls._open_phases()
+        if stack:
+            record_counts = stack[-1].counts
+            for counter, increment in counts.items():
+                record_counts[counter] = record_counts.get(counter, 0) + increment
+
+    @classmethod
+    def summary_table(cls) -> ColumnarTable:
+        """
+        Build the summary table: one row per recorded phase (nested phases are indented under their parent)
+
+        :return: ColumnarTable
+        """
+        table = ColumnarTable(columns=[(cls.PHASE, ColumnarTable.LEFT), (cls.LABEL, ColumnarTable.LEFT),
+                                       (cls.CALLS, ColumnarTable.RIGHT), (cls.WALL, ColumnarTable.RIGHT),
+                                       (cls.CPU, ColumnarTable.RIGHT), (cls.COUNTS, ColumnarTable.LEFT)])
+        for record in cls.records:
+            table.add_row([f"{cls.INDENT * record.depth}{record.name}", record.label, record.calls,
+                           f"{record.wall:.4f}", f"{record.cpu:.4f}",
+                           ", ".join(f"{counter}={value}" for counter, value in record.counts.items())])
+        return table
+
+    @classmethod
+    def memory_table(cls) -> ColumnarTable:
+        """
+        Build the memory summary table: retained and peak memory of each recorded phase, plus the number of bytes
+        per node of phases that built a model (phases with a 'nodes' counter)
+
+        :return: ColumnarTable
+        """
+        table = ColumnarTable(columns=[(cls.PHASE, ColumnarTable.LEFT), (cls.LABEL, ColumnarTable.LEFT),
+                                       (cls.RETAINED, ColumnarTable.RIGHT), (cls.PEAK, ColumnarTable.RIGHT),
+                                       (cls.BYTES_PER_NODE, ColumnarTable.RIGHT)])
+        for record in cls.records:
+            nodes = record.counts.get(cls.NODES)
+            table.add_row([f"{cls.INDENT * record.depth}{record.name}", record.label,
+                           f"{record.retained / 1024:.1f}", f"{record.peak / 1024:.1f}",
+                           f"{record.retained / nodes:.1f}" if nodes else ""])
+        return table
+
+    @classmethod
+    def allocation_sites_table(cls) -> ColumnarTable:
+        """
+        Build the allocation sites table: top allocation sites (change since the previous snapshot) after each
+        main phase (see SNAPSHOT_PHASES)
+
+        :return: ColumnarTable
+        """
+        table = ColumnarTable(columns=[(cls.PHASE, ColumnarTable.LEFT), (cls.LABEL, ColumnarTable.LEFT),
+                                       (cls.SITE, ColumnarTable.LEFT), (cls.SIZE_DIFF, ColumnarTable.RIGHT),
+                                       (cls.COUNT_DIFF, ColumnarTable.RIGHT)])
+        for record in cls.records:
+            for site, size_diff, count_diff in record.sites:
+                table.add_row([record.name, record.label, site, f"{size_diff / 1024:+.1f}", f"{count_diff:+d}"])
+        return table
@@ -0,0 +1,109 @@
+import gzip
+import io
+import typing
+
+
+class ReportSink:
+    """
+    Output files of the reports. Each file is opened once (buffered, optionally gzip compressed), and stays open
+    until it is closed (close()), rather than re-opening the file in append mode for every table.
+
+    Usage:
+        with ReportSink(compress=True) as sink:
+            sink.write(file_spec, text)
+    """
+
+    GZIP_EXT = 'gz'
+    BUFFER_SIZE = 1024 * 1024
+    COMPRESS_LEVEL = 6
+
+    def __init__(self, compress: bool = False) -> typing.NoReturn:
+        """
+        :param compress: Write gzip compressed files (<file_spec>.gz)
+
+        """
+        self.compress = compress
+
+        # Key: file spec (as requested), Value: open text handle
+        self._handles = {}
+
+    def __enter__(self) -> "ReportSink":
+        return self
+
+    def __exit__(self, *exc_info) -> typing.NoReturn:
+        self.close()
+
+    def file_spec(self, file_spec: str) -> str:
+        """
+        File spec of the file actually written (compressed files get the gzip extension)
+
+        :param file_spec: Requested file spec
+
+        :return: (str) file spec
+        """
+        return f"{file_spec}.{self.GZIP_EXT}" if self.compress else file_spec
+
+    def _open(self, file_spec: str) -> typing.TextIO:
+        """
+        Get the handle of the file, opening (and truncating) the file on first use
+
+        :param file_spec: Requested file spec
+
+        :return: Open text handle
+        """
+        handle = self._handles.get(file_spec)
+        if handle is None:
+            if self.compress:
+                raw = gzip.GzipFile(self.file_spec(file_spec), mode="wb", compresslevel=self.COMPRESS_LEVEL)
+                handle = io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=self.BUFFER_SIZE))
+            else:
+                handle = open(file_spec, "w", buffering=self.BUFFER_SIZE)
+            self._handles[file_spec] = handle
+        return handle
+
+    def write(self, file_spec: str, text: str) -> typing.NoReturn:
+        """
+        Write text to the file
+
+        :param file_spec: Requested file spec
+        :param text: Text to write
+
+        :return: None
+        """
+        self._open(file_spec).write(text)
+
+    def stream(self, file_spec: str) -> typing.TextIO:
+        """
+        Open text handle of the file (e.g. to write a table one chunk at a time)
+
+        :param file_spec: Requested file spec
+
+        :return: Open text handle (closed by the sink)
+        """
+        return self._open(file_spec)
+
+    def flush(self, file_spec: str) -> typing.NoReturn:
+        """
+        Flush the buffered text of a file (e.g. so a reader following the file sees complete records)
+
+        :param file_spec: Requested file spec
+
+        :return: None
+        """
+        handle = self._handles.get(file_spec)
+        if handle is not None:
+            handle.flush()
+
+    def close(self, file_spec: typing.Optional[str] = None) -> typing.NoReturn:
+        """
+        Flush and close a file, or all files
+
+        :param file_spec: Requested file spec (None = all files)
+
+        :return: None
+        """
+        file_specs = [file_spec] if file_spec is not None else list(self._handles)
+        for spec in file_specs:
+            handle = self._handles.pop(spec, None)
+            if handle is not None:
+                handle.close()
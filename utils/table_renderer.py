@@ -0,0 +1,296 @@
+"""
+    Columnar text/HTML table renderer for large result tables.
+
+    The text and HTML output matches the PrettyTable defaults used by the reports (framed table, one space of
+    padding, header row, optional centered title), so existing .rpt files keep the same layout. Unlike
+    PrettyTable, the column widths are maintained as rows are added (no rescan of every cell per rendering), and
+    the output is generated in chunks of rows, so the complete rendered table never has to be held in memory.
+
+"""
+from html import escape
+import typing
+
+try:
+    import wcwidth
+    wcwidth_available = True
+except ModuleNotFoundError:
+    wcwidth_available = False
+
+
+class ColumnarTable:
+    """
+    Table of text cells, stored per column. Columns are defined by (name, alignment) tuples
+    (e.g. ComparisonReportEngine.COLUMN_DEF); alignment is 'l', 'c' or 'r'.
+    """
+
+    LEFT = 'l'
+    CENTER = 'c'
+    RIGHT = 'r'
+
+    HORIZONTAL_CHAR = '-'
+    VERTICAL_CHAR = '|'
+    JUNCTION_CHAR = '+'
+    PADDING_WIDTH = 1
+    LINE_BREAK = '\n'
+    HTML_LINE_BREAK = '<br>'
+
+    # Number of table rows per rendered chunk
+    CHUNK_ROWS = 1000
+
+    # Padding of single-line, printable ASCII text (display width = len)
+    ASCII_JUSTIFY = {LEFT: str.ljust, CENTER: str.center, RIGHT: str.rjust}
+
+    def __init__(self, columns: typing.Iterable[typing.Tuple[str, str]]) -> typing.NoReturn:
+        """
+        :param columns: Column definitions: (name, alignment) tuples, in column order
+
+        """
+        columns = list(columns)
+        self.field_names = [name for name, _ in columns]
+        self.alignments = [alignment for _, alignment in columns]
+
+        # Cell text per column, and the width of each column (header included)
+        self._cells = [[] for _ in columns]
+        self._widths = [self._text_width(name) for name in self.field_names]
+        self.rowcount = 0
+
+        # All cells (and names) are single-line printable ASCII: rows are padded with the str methods
+        self._plain = all(name.isascii() and name.isprintable() for name in self.field_names)
+
+    def __str__(self) -> str:
+        return self.get_string()
+
+    @staticmethod
+    def display_width(text: str) -> int:
+        """
+        Number of terminal cells used to display a single line of text (wide characters use two cells)
+
+        :param text: Line of text
+
+        :return: (int) Display width
+        """
+        if text.isascii() and text.isprintable():
+            return len(text)
+        if wcwidth_available:
+            return max(wcwidth.width(text), 0)
+        return len(text)
+
+    def _text_width(self, text: str) -> int:
+        """
+        Display width of a (possibly multi-line) cell
+
+        :param text: Cell text
+
+        :return: (int) Width of the widest line
+        """
+        if self.LINE_BREAK in text:
+            return max(self.display_width(line) for line in text.split(self.LINE_BREAK))
+        return self.display_width(text)
+
+    def add_row(self, row: typing.Sequence[typing.Any]) -> typing.NoReturn:
+        """
+        Add a row (one value per column; values are converted to str), and update the column widths.
+
+        :param row: Sequence of values
+
+        :return: None
+        """
+        if len(row) != len(self._cells):
+            raise ValueError(f"Row has incorrect number of values, (actual) {len(row)}!={len(self._cells)} "
+                             f"(expected)")
+
+        widths = self._widths
+        for index, value in enumerate(row):
+            text = str(value).expandtabs()
+            self._cells[index].append(text)
+            if text.isascii() and text.isprintable():
+                width = len(text)
+            else:
+                width = self._text_width(text)
+                self._plain = False
+            if width > widths[index]:
+                widths[index] = width
+        self.rowcount += 1
+
+    def _column_widths(self, title: typing.Optional[str]) -> typing.List[int]:
+        """
+        Column widths of the rendered table: columns are widened (proportionally) to fit the title.
+
+        :param title: Table title (or None)
+
+        :return: List of column widths
+        """
+        widths = list(self._widths)
+        if not title:
+            return widths
+
+        padding = 2 * self.PADDING_WIDTH
+        title_width = max(self.display_width(line) for line in title.split(self.LINE_BREAK)) + padding + 2
+        min_width = title_width - padding * len(widths) - (len(widths) + 1)
+        content_width = sum(widths) or 1
+        if content_width < min_width:
+            widths = [int(width * min_width / content_width) for width in widths]
+            if sum(widths) < min_width:
+                widths[-1] += min_width - sum(widths)
+        return widths
+
+    def _justify(self, text: str, width: int, alignment: str) -> str:
+        """
+        Pad the text to the width, per the alignment (center: same rounding as str.center)
+
+        :param text: Single line of text
+        :param width: Column width
+        :param alignment: LEFT, CENTER or RIGHT
+
+        :return: Padded text
+        """
+        excess = width - self.display_width(text)
+        if excess <= 0:
+            return text
+        if alignment == self.LEFT:
+            return text + ' ' * excess
+        if alignment == self.RIGHT:
+            return ' ' * excess + text
+        left = excess // 2 + (excess & width & 1)
+        return ' ' * left + text + ' ' * (excess - left)
+
+    def _hrule(self, widths: typing.List[int], junctions: bool = True) -> str:
+        """
+        Horizontal rule
+
+        :param widths: Column widths
+        :param junctions: Mark the column boundaries with the junction character
+
+        :return: Rule (str)
+        """
+        separator = self.JUNCTION_CHAR if junctions else self.HORIZONTAL_CHAR
+        padding = 2 * self.PADDING_WIDTH
+        return (self.JUNCTION_CHAR +
+                separator.join(self.HORIZONTAL_CHAR * (width + padding) for width in widths) +
+                self.JUNCTION_CHAR)
+
+    def _format_row(self, cells: typing.Sequence[str], widths: typing.List[int]) -> str:
+        """
+        Text line(s) of a row
+
+        :param cells: Cell text of each column
+        :param widths: Column widths
+
+        :return: Row text (multi-line cells: one text line per cell line)
+        """
+        pad = ' ' * self.PADDING_WIDTH
+        separator = f"{pad}{self.VERTICAL_CHAR}{pad}"
+        prefix = f"{self.VERTICAL_CHAR}{pad}"
+        suffix = f"{pad}{self.VERTICAL_CHAR}"
+
+        if self._plain:
+            return prefix + separator.join(
+                self.ASCII_JUSTIFY[alignment](cell, width)
+                for cell, width, alignment in zip(cells, widths, self.alignments)) + suffix
+
+        if not any(self.LINE_BREAK in cell for cell in cells):
+            return prefix + separator.join(
+                self._justify(cell, width, alignment)
+                for cell, width, alignment in zip(cells, widths, self.alignments)) + suffix
+
+        # Multi-line cells: top aligned, shorter cells padded with empty lines
+        cell_lines = [cell.split(self.LINE_BREAK) for cell in cells]
+        height = max(len(lines) for lines in cell_lines)
+        return self.LINE_BREAK.join(
+            prefix + separator.join(
+                self._justify(lines[line] if line < len(lines) else '', width, alignment)
+                for lines, width, alignment in zip(cell_lines, widths, self.alignments)) + suffix
+            for line in range(height))
+
+    def iter_text(self, title: typing.Optional[str] = None) -> typing.Iterator[str]:
+        """
+        Render the table as text, in chunks of CHUNK_ROWS rows. The chunks are complete lines, without the
+        trailing line break: joining the chunks with a line break gives the complete table (see get_string).
+
+        :param title: Table title (optional)
+
+        :return: Iterator of text chunks
+        """
+        widths = self._column_widths(title)
+        hrule = self._hrule(widths)
+
+        header = []
+        if title:
+            padding = ' ' * self.PADDING_WIDTH
+            title_width = sum(width + 2 * self.PADDING_WIDTH + 1 for width in widths) - 1
+            header.append(self._hrule(widths, junctions=False))
+            header.extend(f"{self.VERTICAL_CHAR}"
+                          f"{self._justify(f'{padding}{line}{padding}', title_width, self.CENTER)}"
+                          f"{self.VERTICAL_CHAR}" for line in title.split(self.LINE_BREAK))
+        header.extend([hrule, self._format_row(self.field_names, widths), hrule])
+        yield self.LINE_BREAK.join(header)
+
+        for start in range(0, self.rowcount, self.CHUNK_ROWS):
+            rows = zip(*(column[start:start + self.CHUNK_ROWS] for column in self._cells))
+            yield self.LINE_BREAK.join(self._format_row(cells, widths) for cells in rows)
+
+        yield hrule
+
+    def get_string(self, title: typing.Optional[str] = None) -> str:
+        """
+        Render the complete table as text
+
+        :param title: Table title (optional)
+
+        :return: Table (str)
+        """
+        return self.LINE_BREAK.join(self.iter_text(title=title))
+
+    def write_text(self, stream: typing.TextIO, title: typing.Optional[str] = None) -> typing.NoReturn:
+        """
+        Write the table as text (same output as get_string), one chunk at a time
+
+        :param stream: Open text file (or stream)
+        :param title: Table title (optional)
+
+        :return: None
+        """
+        for index, chunk in enumerate(self.iter_text(title=title)):
+            stream.write(f"{self.LINE_BREAK}{chunk}" if index else chunk)
+
+    def iter_html(self) -> typing.Iterator[str]:
+        """
+        Render the table as an HTML table, in chunks of CHUNK_ROWS rows (same convention as iter_text)
+
+        :return: Iterator of HTML chunks
+        """
+        header = ["<table>", "    <thead>", "        <tr>"]
+        header.extend(f"            <th>{escape(name).replace(self.LINE_BREAK, self.HTML_LINE_BREAK)}</th>"
+                      for name in self.field_names)
+        header.extend(["        </tr>", "    </thead>", "    <tbody>"])
+        yield self.LINE_BREAK.join(header)
+
+        for start in range(0, self.rowcount, self.CHUNK_ROWS):
+            lines = []
+            for cells in zip(*(column[start:start + self.CHUNK_ROWS] for column in self._cells)):
+                lines.append("        <tr>")
+                lines.extend(f"            <td>{escape(cell).replace(self.LINE_BREAK, self.HTML_LINE_BREAK)}</td>"
+                             for cell in cells)
+                lines.append("        </tr>")
+            yield self.LINE_BREAK.join(lines)
+
+        yield self.LINE_BREAK.join(["    </tbody>", "</table>"])
+
+    def get_html_string(self) -> str:
+        """
+        Render the complete table as an HTML table
+
+        :return: HTML table (str)
+        """
+        return self.LINE_BREAK.join(self.iter_html())
+
+    def write_html(self, stream: typing.TextIO) -> typing.NoReturn:
+        """
+        Write the table as HTML (same output as get_html_string), one chunk at a time
+
+        :param stream: Open text file (or stream)
+
+        :return: None
+        """
+        for index, chunk in enumerate(self.iter_html()):
+            stream.write(f"{self.LINE_BREAK}{chunk}" if index else chunk)